@@ -1,9 +1,8 @@
 # This file makes the app directory a Python package
-from .db import Base, engine, get_db, create_tables
+from .database import Base, engine, get_db, create_tables
 from . import models, schemas
 
-# Crea las tablas en la base de datos
-create_tables()
+# Las tablas se crean en el evento de inicio de la aplicación (ver app/main.py)
 
 __all__ = [
     'Base',
@@ -12,4 +11,4 @@ __all__ = [
     'models',
     'schemas',
     'create_tables'
-]
\ No newline at end of file
+]
@@ -0,0 +1,5 @@
+# Variantes asíncronas (AsyncSession) de las consultas de lectura del catálogo
+from .plazas import get_plaza, get_plazas
+from .locales import get_locale, get_locales
+from .menus import get_menu, get_menus_by_local
+from .productos import get_producto, get_productos_by_menu
@@ -0,0 +1,5 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+async def todos(db: AsyncSession, query) -> list:
+    """Ejecuta una consulta de entidades y devuelve todas las filas"""
+    return list((await db.scalars(query)).all())
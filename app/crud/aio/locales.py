@@ -0,0 +1,34 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...models import Locale, LocaleDB
+from ..paginacion import paginar
+from .consultas import todos
+from ...services.cache_service import cachear_async
+
+async def get_locale(db: AsyncSession, locale_id: int):
+    return await cachear_async("locales", Locale, ["id", locale_id],
+                               lambda: db.get(LocaleDB, locale_id))
+
+async def get_locales(
+    db: AsyncSession, 
+    skip: int = 0, 
+    limit: int = 100, 
+    plaza_id: int = None,
+    tipo_comercio: str = None,
+    id_gerente: int = None,
+    after: Optional[str] = None
+):
+    query = select(LocaleDB)
+    
+    # Aplicar filtros si se proporcionan
+    if plaza_id is not None:
+        query = query.where(LocaleDB.plaza_id == plaza_id)
+    if tipo_comercio is not None:
+        query = query.where(LocaleDB.tipo_comercio == tipo_comercio.lower())
+    if id_gerente is not None:
+        query = query.where(LocaleDB.id_gerente == id_gerente)
+    
+    query = paginar(query, [LocaleDB.id], skip=skip, limit=limit, after=after)
+    partes = ["lista", skip, limit, plaza_id, tipo_comercio and tipo_comercio.lower(), id_gerente, after]
+    return await cachear_async("locales", Locale, partes, lambda: todos(db, query))
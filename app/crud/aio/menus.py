@@ -0,0 +1,17 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...models import Menu, MenuDB
+from ..paginacion import paginar
+from .consultas import todos
+from ...services.cache_service import cachear_async
+
+async def get_menu(db: AsyncSession, menu_id: int):
+    return await cachear_async("menus", Menu, ["id", menu_id],
+                               lambda: db.get(MenuDB, menu_id))
+
+async def get_menus_by_local(db: AsyncSession, local_id: int, skip: int = 0, limit: int = 100, after: Optional[str] = None):
+    query = select(MenuDB).where(MenuDB.id_local == local_id)
+    query = paginar(query, [MenuDB.id], skip=skip, limit=limit, after=after)
+    return await cachear_async("menus", Menu, ["local", local_id, skip, limit, after],
+                               lambda: todos(db, query))
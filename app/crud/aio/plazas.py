@@ -0,0 +1,16 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...models import Plaza, PlazaDB
+from ..paginacion import paginar
+from .consultas import todos
+from ...services.cache_service import cachear_async
+
+async def get_plaza(db: AsyncSession, plaza_id: int):
+    return await cachear_async("plazas", Plaza, ["id", plaza_id],
+                               lambda: db.get(PlazaDB, plaza_id))
+
+async def get_plazas(db: AsyncSession, skip: int = 0, limit: int = 100, after: Optional[str] = None):
+    query = paginar(select(PlazaDB), [PlazaDB.id], skip=skip, limit=limit, after=after)
+    return await cachear_async("plazas", Plaza, ["lista", skip, limit, after],
+                               lambda: todos(db, query))
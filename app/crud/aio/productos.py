@@ -0,0 +1,24 @@
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...models import Producto, ProductoDB
+from ..paginacion import paginar
+from .consultas import todos
+from ...services.cache_service import cachear_async
+
+async def get_producto(db: AsyncSession, producto_id: int) -> Optional[dict]:
+    """Obtiene un producto por su ID"""
+    return await cachear_async("productos", Producto, ["id", producto_id],
+                               lambda: db.get(ProductoDB, producto_id))
+
+async def get_productos_by_menu(db: AsyncSession, menu_id: int, skip: int = 0, limit: int = 100, 
+                               solo_disponibles: bool = True, after: Optional[str] = None) -> List[dict]:
+    """Obtiene productos por menú, opcionalmente solo los disponibles"""
+    query = select(ProductoDB).where(ProductoDB.id_menu == menu_id)
+    
+    if solo_disponibles:
+        query = query.where(ProductoDB.disponible == True)
+        
+    query = paginar(query, [ProductoDB.id], skip=skip, limit=limit, after=after)
+    return await cachear_async("productos", Producto, ["menu", menu_id, skip, limit, solo_disponibles, after],
+                               lambda: todos(db, query))
@@ -0,0 +1,205 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional
+from sqlalchemy import Date, func
+from sqlalchemy.orm import Session
+
+from ..models import PedidoDB, PedidoItemDB, ProductoDB, VentaDiariaLocalDB, VentaDiariaProductoDB
+
+ESTADO_VENTA = "completado"
+
+COLUMNAS_LOCAL = ("pedidos", "ingresos", "items", "tiempo_preparacion")
+COLUMNAS_PRODUCTO = ("cantidad", "ingresos")
+# Filas por sentencia INSERT multi-fila
+FILAS_POR_SENTENCIA = 1000
+
+
+def _dia_pedido():
+    # Día del pedido como DATE en MySQL y SQLite
+    return func.date(PedidoDB.fecha_pedido, type_=Date)
+
+
+def _upsert_sumando(db: Session, modelo, filas: List[dict], columnas: Iterable[str]):
+    """
+    Inserta las filas o, si la clave primaria ya existe, suma sus columnas a
+    las existentes, en una sola sentencia multi-fila por tabla. El incremento
+    ocurre en la base de datos, así que dos transacciones que acumulan sobre el
+    mismo día no se pisan.
+    """
+    tabla = modelo.__table__
+    motor = db.get_bind().dialect.name
+    for inicio in range(0, len(filas), FILAS_POR_SENTENCIA):
+        lote = filas[inicio:inicio + FILAS_POR_SENTENCIA]
+        if motor == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+            sentencia = insert(tabla).values(lote)
+            sentencia = sentencia.on_duplicate_key_update(
+                {columna: tabla.c[columna] + sentencia.inserted[columna] for columna in columnas}
+            )
+        elif motor in ("sqlite", "postgresql"):
+            if motor == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            sentencia = insert(tabla).values(lote)
+            sentencia = sentencia.on_conflict_do_update(
+                index_elements=[columna.name for columna in tabla.primary_key],
+                set_={columna: tabla.c[columna] + sentencia.excluded[columna] for columna in columnas}
+            )
+        else:
+            raise RuntimeError(f"Upsert no soportado para el motor {motor}")
+        db.execute(sentencia)
+
+
+def _agregar(db: Session, filtro_pedidos) -> tuple:
+    """Agrega los pedidos que cumplen `filtro_pedidos` por local/día y por local/día/producto"""
+    dia = _dia_pedido()
+    por_local = db.query(
+        PedidoDB.id_local, dia, func.count(PedidoDB.id), func.sum(PedidoDB.total_pedido),
+        func.sum(PedidoDB.tiempo_preparacion_estimado)
+    ).filter(*filtro_pedidos).group_by(PedidoDB.id_local, dia).all()
+
+    por_producto = db.query(
+        PedidoDB.id_local, dia, PedidoItemDB.id_producto, func.sum(PedidoItemDB.cantidad),
+        func.sum(PedidoItemDB.cantidad * PedidoItemDB.precio_unitario)
+    ).join(PedidoItemDB, PedidoItemDB.id_pedido == PedidoDB.id).filter(
+        *filtro_pedidos
+    ).group_by(PedidoDB.id_local, dia, PedidoItemDB.id_producto).all()
+
+    items = {}
+    for id_local, fecha, _, cantidad, _ in por_producto:
+        items[(id_local, fecha)] = items.get((id_local, fecha), 0) + int(cantidad or 0)
+
+    filas_local = [
+        {
+            "id_local": id_local,
+            "fecha": fecha,
+            "pedidos": pedidos,
+            "ingresos": Decimal(ingresos or 0),
+            "items": items.get((id_local, fecha), 0),
+            "tiempo_preparacion": int(tiempo or 0),
+        }
+        for id_local, fecha, pedidos, ingresos, tiempo in por_local
+    ]
+    filas_producto = [
+        {
+            "id_local": id_local,
+            "fecha": fecha,
+            "id_producto": id_producto,
+            "cantidad": int(cantidad or 0),
+            "ingresos": Decimal(ingresos or 0),
+        }
+        for id_local, fecha, id_producto, cantidad, ingresos in por_producto
+    ]
+    return filas_local, filas_producto
+
+
+def acumular_ventas(db: Session, pedido_ids: List[int]):
+    """
+    Suma a los acumulados diarios los pedidos que acaban de pasar a
+    'completado'. No confirma: se llama dentro de la transacción del cambio de
+    estado, que con su UPDATE condicional garantiza que cada pedido se acumule
+    una sola vez.
+    """
+    if not pedido_ids:
+        return
+    filas_local, filas_producto = _agregar(db, [PedidoDB.id.in_(pedido_ids)])
+    _upsert_sumando(db, VentaDiariaLocalDB, filas_local, COLUMNAS_LOCAL)
+    _upsert_sumando(db, VentaDiariaProductoDB, filas_producto, COLUMNAS_PRODUCTO)
+
+
+def reconstruir_ventas(db: Session, desde: date, hasta: date, local_id: Optional[int] = None) -> int:
+    """
+    Recalcula los acumulados de [desde, hasta] a partir de pedidos y
+    pedido_items y los reemplaza en una transacción. Devuelve la cantidad de
+    filas por local/día escritas.
+    """
+    # Rango sobre fecha_pedido (no sobre DATE(fecha_pedido)) para usar su índice
+    filtro_pedidos = [
+        PedidoDB.estado_pedido == ESTADO_VENTA,
+        PedidoDB.fecha_pedido >= datetime.combine(desde, time.min),
+        PedidoDB.fecha_pedido < datetime.combine(hasta + timedelta(days=1), time.min),
+    ]
+    filtro_local = [VentaDiariaLocalDB.fecha >= desde, VentaDiariaLocalDB.fecha <= hasta]
+    filtro_producto = [VentaDiariaProductoDB.fecha >= desde, VentaDiariaProductoDB.fecha <= hasta]
+    if local_id is not None:
+        filtro_pedidos.append(PedidoDB.id_local == local_id)
+        filtro_local.append(VentaDiariaLocalDB.id_local == local_id)
+        filtro_producto.append(VentaDiariaProductoDB.id_local == local_id)
+
+    try:
+        db.query(VentaDiariaLocalDB).filter(*filtro_local).delete(synchronize_session=False)
+        db.query(VentaDiariaProductoDB).filter(*filtro_producto).delete(synchronize_session=False)
+        filas_local, filas_producto = _agregar(db, filtro_pedidos)
+        _upsert_sumando(db, VentaDiariaLocalDB, filas_local, COLUMNAS_LOCAL)
+        _upsert_sumando(db, VentaDiariaProductoDB, filas_producto, COLUMNAS_PRODUCTO)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(filas_local)
+
+
+def _promedio(total, cantidad) -> Optional[float]:
+    return round(total / cantidad, 1) if cantidad else None
+
+
+def get_estadisticas_local(
+    db: Session,
+    local_id: int,
+    desde: date,
+    hasta: date,
+    limite_productos: int = 10
+) -> dict:
+    """
+    Ventas de un local entre dos fechas (inclusive) leídas de los acumulados:
+    totales, una fila por día con ventas y los productos más vendidos. Cada
+    consulta recorre solo el rango de la clave primaria (id_local, fecha).
+    """
+    dias = db.query(VentaDiariaLocalDB).filter(
+        VentaDiariaLocalDB.id_local == local_id,
+        VentaDiariaLocalDB.fecha >= desde,
+        VentaDiariaLocalDB.fecha <= hasta
+    ).order_by(VentaDiariaLocalDB.fecha).all()
+
+    cantidad = func.sum(VentaDiariaProductoDB.cantidad).label("cantidad")
+    productos = db.query(
+        VentaDiariaProductoDB.id_producto, ProductoDB.nombre, cantidad,
+        func.sum(VentaDiariaProductoDB.ingresos)
+    ).outerjoin(
+        ProductoDB, ProductoDB.id == VentaDiariaProductoDB.id_producto
+    ).filter(
+        VentaDiariaProductoDB.id_local == local_id,
+        VentaDiariaProductoDB.fecha >= desde,
+        VentaDiariaProductoDB.fecha <= hasta
+    ).group_by(
+        VentaDiariaProductoDB.id_producto, ProductoDB.nombre
+    ).order_by(cantidad.desc()).limit(limite_productos).all()
+
+    pedidos = sum(dia.pedidos for dia in dias)
+    tiempo = sum(dia.tiempo_preparacion for dia in dias)
+    return {
+        "id_local": local_id,
+        "desde": desde,
+        "hasta": hasta,
+        "totales": {
+            "pedidos": pedidos,
+            "ingresos": sum((Decimal(dia.ingresos) for dia in dias), Decimal("0")),
+            "items": sum(dia.items for dia in dias),
+            "tiempo_preparacion_promedio": _promedio(tiempo, pedidos),
+        },
+        "dias": [
+            {
+                "fecha": dia.fecha,
+                "pedidos": dia.pedidos,
+                "ingresos": dia.ingresos,
+                "items": dia.items,
+                "tiempo_preparacion_promedio": _promedio(dia.tiempo_preparacion, dia.pedidos),
+            }
+            for dia in dias
+        ],
+        "productos": [
+            {"id_producto": id_producto, "nombre": nombre, "cantidad": int(cantidad), "ingresos": Decimal(ingresos)}
+            for id_producto, nombre, cantidad, ingresos in productos
+        ],
+    }
@@ -1,9 +1,13 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import or_
-from ..models import LocaleDB, UsuarioDB
+from typing import Optional
+from ..models import LocaleDB, UsuarioDB, MenuDB, ProductoDB, Locale, CatalogoLocal
+from .paginacion import paginar
+from ..services.cache_service import cache_catalogo, cachear, NO_ENCONTRADO
 
 def get_locale(db: Session, locale_id: int):
-    return db.query(LocaleDB).filter(LocaleDB.id == locale_id).first()
+    return cachear("locales", Locale, ["id", locale_id],
+                   lambda: db.query(LocaleDB).filter(LocaleDB.id == locale_id).first())
 
 def get_locales(
     db: Session, 
@@ -11,7 +15,8 @@ def get_locales(
     limit: int = 100, 
     plaza_id: int = None,
     tipo_comercio: str = None,
-    id_gerente: int = None
+    id_gerente: int = None,
+    after: Optional[str] = None
 ):
     query = db.query(LocaleDB)
     
@@ -23,7 +28,37 @@ def get_locales(
     if id_gerente is not None:
         query = query.filter(LocaleDB.id_gerente == id_gerente)
     
-    return query.offset(skip).limit(limit).all()
+    partes = ["lista", skip, limit, plaza_id, tipo_comercio and tipo_comercio.lower(), id_gerente, after]
+    return cachear("locales", Locale, partes,
+                   lambda: paginar(query, [LocaleDB.id], skip=skip, limit=limit, after=after).all())
+
+def get_catalogo_local(db: Session, locale_id: int) -> Optional[dict]:
+    """
+    Obtiene el local con sus menús y los productos disponibles de cada menú.
+    Usa un número fijo de consultas (local, menús y productos) y se guarda en
+    caché hasta que cambie algún local, menú o producto.
+    """
+    def cargar():
+        db_locale = db.get(LocaleDB, locale_id)
+        if not db_locale:
+            return None
+        menus = (db.query(MenuDB)
+                   .options(selectinload(MenuDB.productos.and_(ProductoDB.disponible == True)))
+                   .filter(MenuDB.id_local == locale_id)
+                   .order_by(MenuDB.id)
+                   .all())
+        datos = Locale.model_validate(db_locale).model_dump()
+        datos["menus"] = menus
+        return CatalogoLocal.model_validate(datos).model_dump(mode="json")
+
+    # La clave incluye las versiones de todo lo que forma el catálogo
+    partes = [locale_id] + [cache_catalogo.version(espacio) for espacio in ("locales", "menus", "productos")]
+    clave = cache_catalogo.clave("catalogo", partes)
+    datos = cache_catalogo.buscar("catalogo", clave)
+    if datos is NO_ENCONTRADO:
+        datos = cargar()
+        cache_catalogo.guardar(clave, datos)
+    return datos
 
 def create_locale(db: Session, locale):
     # Verificar que el gerente exista y sea un gerente si se proporciona
@@ -45,10 +80,11 @@ def create_locale(db: Session, locale):
     db.add(db_locale)
     db.commit()
     db.refresh(db_locale)
+    cache_catalogo.invalidar("locales")
     return db_locale
 
 def update_locale(db: Session, locale_id: int, locale_data):
-    db_locale = db.query(LocaleDB).filter(LocaleDB.id == locale_id).first()
+    db_locale = db.get(LocaleDB, locale_id)
     if not db_locale:
         return None
     
@@ -78,13 +114,16 @@ def update_locale(db: Session, locale_id: int, locale_data):
     
     db.commit()
     db.refresh(db_locale)
+    cache_catalogo.invalidar("locales")
     return db_locale
 
 def delete_locale(db: Session, locale_id: int):
-    db_locale = db.query(LocaleDB).filter(LocaleDB.id == locale_id).first()
+    db_locale = db.get(LocaleDB, locale_id)
     if not db_locale:
         return False
     
     db.delete(db_locale)
     db.commit()
+    # El borrado se propaga a menús y productos
+    cache_catalogo.invalidar("locales", cascada=True)
     return True
\ No newline at end of file
@@ -1,21 +1,28 @@
 from sqlalchemy.orm import Session
+from typing import Optional
 from ..models import MenuDB, MenuCreate, Menu
+from .paginacion import paginar
+from ..services.cache_service import cache_catalogo, cachear
 
 def get_menu(db: Session, menu_id: int):
-    return db.query(MenuDB).filter(MenuDB.id == menu_id).first()
+    return cachear("menus", Menu, ["id", menu_id],
+                   lambda: db.query(MenuDB).filter(MenuDB.id == menu_id).first())
 
-def get_menus_by_local(db: Session, local_id: int, skip: int = 0, limit: int = 100):
-    return db.query(MenuDB).filter(MenuDB.id_local == local_id).offset(skip).limit(limit).all()
+def get_menus_by_local(db: Session, local_id: int, skip: int = 0, limit: int = 100, after: Optional[str] = None):
+    query = db.query(MenuDB).filter(MenuDB.id_local == local_id)
+    return cachear("menus", Menu, ["local", local_id, skip, limit, after],
+                   lambda: paginar(query, [MenuDB.id], skip=skip, limit=limit, after=after).all())
 
 def create_menu(db: Session, menu: MenuCreate):
     db_menu = MenuDB(**menu.dict())
     db.add(db_menu)
     db.commit()
     db.refresh(db_menu)
+    cache_catalogo.invalidar("menus")
     return db_menu
 
 def update_menu(db: Session, menu_id: int, menu_data: dict):
-    db_menu = db.query(MenuDB).filter(MenuDB.id == menu_id).first()
+    db_menu = db.get(MenuDB, menu_id)
     if not db_menu:
         return None
     
@@ -24,13 +31,16 @@ def update_menu(db: Session, menu_id: int, menu_data: dict):
     
     db.commit()
     db.refresh(db_menu)
+    cache_catalogo.invalidar("menus")
     return db_menu
 
 def delete_menu(db: Session, menu_id: int):
-    db_menu = db.query(MenuDB).filter(MenuDB.id == menu_id).first()
+    db_menu = db.get(MenuDB, menu_id)
     if not db_menu:
         return False
     
     db.delete(db_menu)
     db.commit()
+    # El borrado se propaga a los productos del menú
+    cache_catalogo.invalidar("menus", cascada=True)
     return True
@@ -0,0 +1,69 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+from sqlalchemy import and_, or_
+
+# Nombre del encabezado con el cursor de la siguiente página
+ENCABEZADO_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(valores: Sequence) -> str:
+    """Codifica los valores de la clave de ordenamiento en un cursor opaco"""
+    serializables = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    contenido = json.dumps(serializables, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(contenido).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, columnas) -> list:
+    """
+    Decodifica un cursor generado por `codificar_cursor` para las columnas dadas.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != len(columnas):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if columna.type.python_type is datetime else columna.type.python_type(v)
+            for columna, v in zip(columnas, valores)
+        ]
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Cursor de paginación no válido")
+
+
+def paginar(query, columnas, skip: int = 0, limit: int = 100, after: Optional[str] = None):
+    """
+    Aplica orden estable y paginación a una consulta.
+
+    Si se proporciona `after` se usa paginación por cursor (keyset) sobre las
+    columnas dadas, que no se degrada con el número de filas previas; de lo
+    contrario se mantiene OFFSET/LIMIT por compatibilidad.
+    """
+    query = query.order_by(*columnas)
+    if after:
+        valores = decodificar_cursor(after, columnas)
+        # (c1, c2, ...) > (v1, v2, ...) expandido para que MySQL use el índice
+        condiciones = []
+        for i, columna in enumerate(columnas):
+            iguales = [columnas[j] == valores[j] for j in range(i)]
+            condiciones.append(and_(*iguales, columna > valores[i]))
+        query = query.filter(or_(*condiciones))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def siguiente_cursor(resultados: list, limit: int, *atributos: str) -> Optional[str]:
+    """Devuelve el cursor de la siguiente página, o None si ya no hay más resultados"""
+    if not resultados or len(resultados) < limit:
+        return None
+    ultimo = resultados[-1]
+    # Entidades o diccionarios de respuesta (lecturas servidas desde la caché)
+    if isinstance(ultimo, dict):
+        return codificar_cursor([ultimo[atributo] for atributo in atributos])
+    return codificar_cursor([getattr(ultimo, atributo) for atributo in atributos])
@@ -0,0 +1,267 @@
+from decimal import Decimal, ROUND_HALF_UP
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload, subqueryload
+from ..models import PedidoDB, PedidoItemDB, ProductoDB
+from .paginacion import paginar
+from .estadisticas import ESTADO_VENTA, acumular_ventas
+
+CENTAVOS = Decimal("0.01")
+
+# Transiciones permitidas de estado_pedido (completado y cancelado son finales)
+TRANSICIONES = {
+    "pendiente": ("en_preparacion", "cancelado"),
+    "en_preparacion": ("listo_para_recoger", "cancelado"),
+    "listo_para_recoger": ("completado", "cancelado"),
+    "completado": (),
+    "cancelado": (),
+}
+
+
+class ConflictoEstado(Exception):
+    """El pedido no está en un estado desde el que se pueda pasar al solicitado"""
+
+    def __init__(self, estado_actual: str, estado_nuevo: str):
+        self.estado_actual = estado_actual
+        self.estado_nuevo = estado_nuevo
+        super().__init__(
+            f"No se puede pasar el pedido de '{estado_actual}' a '{estado_nuevo}'"
+        )
+
+
+def estados_origen(estado_nuevo: str, estado_esperado: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Estados desde los que se puede llegar a `estado_nuevo` (solo `estado_esperado`
+    si se indica).
+
+    Raises:
+        ValueError: Si el estado no existe o la transición no está permitida
+    """
+    if estado_nuevo not in TRANSICIONES:
+        raise ValueError(f"Estado de pedido no válido: {estado_nuevo}")
+    origenes = tuple(origen for origen, destinos in TRANSICIONES.items() if estado_nuevo in destinos)
+    if estado_esperado is not None:
+        if estado_esperado not in TRANSICIONES:
+            raise ValueError(f"Estado de pedido no válido: {estado_esperado}")
+        if estado_esperado not in origenes:
+            raise ValueError(f"No se puede pasar un pedido de '{estado_esperado}' a '{estado_nuevo}'")
+        origenes = (estado_esperado,)
+    return origenes
+
+# Estrategias disponibles para cargar PedidoDB.items junto con los pedidos
+ESTRATEGIAS_CARGA = {
+    "selectin": selectinload,
+    "joined": joinedload,
+    "subquery": subqueryload,
+}
+
+
+def _opcion_carga_items(carga: str):
+    """Devuelve la opción de carga de ítems para la estrategia indicada"""
+    if carga not in ESTRATEGIAS_CARGA:
+        raise ValueError(f"Estrategia de carga no válida: {carga}")
+    return ESTRATEGIAS_CARGA[carga](PedidoDB.items)
+
+
+def get_pedido(db: Session, pedido_id: int, carga: str = "joined") -> Optional[PedidoDB]:
+    """Obtiene un pedido por su ID con sus ítems ya cargados"""
+    return (db.query(PedidoDB)
+             .options(_opcion_carga_items(carga))
+             .filter(PedidoDB.id == pedido_id)
+             .first())
+
+
+def get_pedidos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    estado: str = None,
+    local_id: int = None,
+    usuario_id: int = None,
+    carga: str = "selectin",
+    after: Optional[str] = None
+) -> List[PedidoDB]:
+    """
+    Lista pedidos con filtros opcionales, cargando los ítems de todos los
+    pedidos de la página en un número fijo de consultas (sin N+1).
+    Con `after` pagina por cursor sobre (fecha_pedido, id).
+    """
+    query = db.query(PedidoDB).options(_opcion_carga_items(carga))
+
+    if estado:
+        query = query.filter(PedidoDB.estado_pedido == estado)
+    if local_id is not None:
+        query = query.filter(PedidoDB.id_local == local_id)
+    if usuario_id is not None:
+        query = query.filter(PedidoDB.id_usuario == usuario_id)
+
+    columnas = [PedidoDB.fecha_pedido, PedidoDB.id]
+    return paginar(query, columnas, skip=skip, limit=limit, after=after).all()
+
+
+def actualizar_pedido(
+    db: Session,
+    pedido_id: int,
+    estado_pedido: Optional[str] = None,
+    estado_esperado: Optional[str] = None,
+    **campos
+) -> Tuple[Optional[PedidoDB], Optional[str]]:
+    """
+    Actualiza un pedido con un único UPDATE condicional: el cambio de estado
+    solo se aplica si el estado actual permite la transición, de modo que dos
+    actualizaciones simultáneas no pueden pisarse (la segunda no encuentra
+    filas). El resto de `campos` con valor distinto de None se actualiza en la
+    misma sentencia.
+
+    Returns:
+        Tupla (pedido actualizado o None si no existe, estado anterior si se
+        conoce sin otra consulta)
+
+    Raises:
+        ValueError: Si el estado no existe o la transición no está permitida
+        ConflictoEstado: Si el pedido ya no está en un estado de origen válido
+    """
+    valores = {campo: valor for campo, valor in campos.items() if valor is not None}
+    query = db.query(PedidoDB).filter(PedidoDB.id == pedido_id)
+    estado_anterior = None
+    if estado_pedido:
+        origenes = estados_origen(estado_pedido, estado_esperado)
+        query = query.filter(PedidoDB.estado_pedido.in_(origenes))
+        valores["estado_pedido"] = estado_pedido
+        if len(origenes) == 1:
+            estado_anterior = origenes[0]
+
+    if valores:
+        filas = query.update(valores, synchronize_session=False)
+        if filas and estado_pedido == ESTADO_VENTA:
+            # Misma transacción que el cambio de estado: se acumula una sola vez
+            acumular_ventas(db, [pedido_id])
+        db.commit()
+        if filas == 0:
+            # Solo en el caso de fallo: distinguir pedido inexistente de conflicto
+            actual = db.query(PedidoDB.estado_pedido).filter(PedidoDB.id == pedido_id).scalar()
+            if actual is None or not estado_pedido:
+                return None, None
+            raise ConflictoEstado(actual, estado_pedido)
+
+    return get_pedido(db, pedido_id), estado_anterior
+
+
+def actualizar_estados_pedidos(db: Session, cambios) -> Tuple[List[dict], List[PedidoDB]]:
+    """
+    Aplica muchos cambios de estado en una sola transacción: una consulta
+    bloquea y lee los pedidos, y un UPDATE por cada grupo de cambios con el
+    mismo destino los aplica (WHERE id IN (...)), en lugar de una ida y vuelta
+    por pedido. Los cambios no válidos no impiden aplicar el resto.
+
+    Args:
+        db: Sesión de base de datos
+        cambios: Objetos con id, estado_pedido y estado_esperado (PedidoEstadoBulk)
+
+    Returns:
+        Tupla (resultado por pedido en el orden recibido, pedidos
+        actualizados con sus ítems cargados)
+    """
+    resultados: Dict[int, dict] = {}
+    origenes_por_id = {}
+    for cambio in cambios:
+        if cambio.id in resultados:
+            resultados[cambio.id] = {"id": cambio.id, "resultado": "invalido", "detalle": "Pedido repetido en la solicitud"}
+            origenes_por_id.pop(cambio.id, None)
+            continue
+        try:
+            origenes_por_id[cambio.id] = estados_origen(cambio.estado_pedido, cambio.estado_esperado)
+            resultados[cambio.id] = {"id": cambio.id, "estado_pedido": cambio.estado_pedido}
+        except ValueError as e:
+            resultados[cambio.id] = {"id": cambio.id, "resultado": "invalido", "detalle": str(e)}
+
+    # Bloquear las filas hasta el commit: entre esta lectura y los UPDATE
+    # ningún otro cambio puede mover los pedidos de estado
+    actuales = dict(
+        db.query(PedidoDB.id, PedidoDB.estado_pedido)
+          .filter(PedidoDB.id.in_(origenes_por_id))
+          .with_for_update()
+          .all()
+    ) if origenes_por_id else {}
+
+    grupos = defaultdict(list)
+    for pedido_id, origenes in origenes_por_id.items():
+        resultado = resultados[pedido_id]
+        actual = actuales.get(pedido_id)
+        if actual is None:
+            resultado.update(resultado="no_encontrado", estado_pedido=None, detalle="Pedido no encontrado")
+        elif actual not in origenes:
+            resultado.update(
+                resultado="conflicto",
+                detalle=str(ConflictoEstado(actual, resultado["estado_pedido"])),
+                estado_pedido=actual
+            )
+        else:
+            resultado.update(resultado="actualizado", estado_anterior=actual)
+            grupos[(resultado["estado_pedido"], origenes)].append(pedido_id)
+
+    try:
+        for (estado_nuevo, origenes), ids in grupos.items():
+            (db.query(PedidoDB)
+               .filter(PedidoDB.id.in_(ids), PedidoDB.estado_pedido.in_(origenes))
+               .update({"estado_pedido": estado_nuevo}, synchronize_session=False))
+            if estado_nuevo == ESTADO_VENTA:
+                acumular_ventas(db, ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    actualizados = [pedido_id for ids in grupos.values() for pedido_id in ids]
+    pedidos = (db.query(PedidoDB)
+                 .options(_opcion_carga_items("selectin"))
+                 .filter(PedidoDB.id.in_(actualizados))
+                 .all()) if actualizados else []
+
+    return list(resultados.values()), pedidos
+
+
+def calcular_items_pedido(db: Session, items, bloquear: bool = False) -> Tuple[List[PedidoItemDB], Decimal]:
+    """
+    Resuelve todos los productos de un pedido con una sola consulta IN (...),
+    valida su disponibilidad y calcula el total en Decimal.
+
+    Args:
+        db: Sesión de base de datos
+        items: Ítems del pedido (PedidoItemCreate)
+        bloquear: Si es True, bloquea las filas de productos en modo compartido
+            hasta el commit para que el precio/disponibilidad no cambien a mitad del pedido
+
+    Returns:
+        Tupla (ítems listos para insertar, total del pedido)
+
+    Raises:
+        ValueError: Si algún producto no existe o no está disponible
+    """
+    ids_productos = {item.id_producto for item in items}
+    query = db.query(ProductoDB).filter(ProductoDB.id.in_(ids_productos))
+    if bloquear:
+        query = query.with_for_update(read=True)
+    productos = {producto.id: producto for producto in query.all()}
+
+    total_pedido = Decimal("0")
+    items_pedido = []
+    for item in items:
+        producto = productos.get(item.id_producto)
+        if not producto:
+            raise ValueError(f"Producto con ID {item.id_producto} no encontrado")
+        if not producto.disponible:
+            raise ValueError(f"El producto '{producto.nombre}' no está disponible")
+
+        # Usar el precio actual del producto, no el enviado por el cliente
+        precio = Decimal(producto.precio)
+        total_pedido += precio * item.cantidad
+
+        items_pedido.append(PedidoItemDB(
+            id_producto=item.id_producto,
+            cantidad=item.cantidad,
+            precio_unitario=precio,
+            instrucciones_especiales=item.instrucciones_especiales
+        ))
+
+    return items_pedido, total_pedido.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
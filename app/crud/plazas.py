@@ -1,21 +1,27 @@
 from sqlalchemy.orm import Session
-from ..models import PlazaDB
+from typing import Optional
+from ..models import Plaza, PlazaDB
+from .paginacion import paginar
+from ..services.cache_service import cache_catalogo, cachear
 
 def get_plaza(db: Session, plaza_id: int):
-    return db.query(PlazaDB).filter(PlazaDB.id == plaza_id).first()
+    return cachear("plazas", Plaza, ["id", plaza_id],
+                   lambda: db.query(PlazaDB).filter(PlazaDB.id == plaza_id).first())
 
-def get_plazas(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(PlazaDB).offset(skip).limit(limit).all()
+def get_plazas(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None):
+    return cachear("plazas", Plaza, ["lista", skip, limit, after],
+                   lambda: paginar(db.query(PlazaDB), [PlazaDB.id], skip=skip, limit=limit, after=after).all())
 
 def create_plaza(db: Session, plaza):
     db_plaza = PlazaDB(**plaza.dict())
     db.add(db_plaza)
     db.commit()
     db.refresh(db_plaza)
+    cache_catalogo.invalidar("plazas")
     return db_plaza
 
 def update_plaza(db: Session, plaza_id: int, plaza_data):
-    db_plaza = db.query(PlazaDB).filter(PlazaDB.id == plaza_id).first()
+    db_plaza = db.get(PlazaDB, plaza_id)
     if not db_plaza:
         return None
     
@@ -25,13 +31,16 @@ def update_plaza(db: Session, plaza_id: int, plaza_data):
     
     db.commit()
     db.refresh(db_plaza)
+    cache_catalogo.invalidar("plazas")
     return db_plaza
 
 def delete_plaza(db: Session, plaza_id: int):
-    db_plaza = db.query(PlazaDB).filter(PlazaDB.id == plaza_id).first()
+    db_plaza = db.get(PlazaDB, plaza_id)
     if not db_plaza:
         return False
     
     db.delete(db_plaza)
     db.commit()
+    # El borrado se propaga a locales, menús y productos
+    cache_catalogo.invalidar("plazas", cascada=True)
     return True
@@ -4,10 +4,13 @@ from sqlalchemy import and_
 from fastapi import HTTPException
 from .. import models, schemas
 from ..models import ProductoDB, ProductoCreate, Producto, ProductoUpdate
+from .paginacion import paginar
+from ..services.cache_service import cache_catalogo, cachear
 
-def get_producto(db: Session, producto_id: int) -> Optional[ProductoDB]:
-    """Obtiene un producto por su ID"""
-    return db.query(ProductoDB).filter(ProductoDB.id == producto_id).first()
+def get_producto(db: Session, producto_id: int) -> Optional[dict]:
+    """Obtiene un producto por su ID (forma de respuesta, de solo lectura; para modificarlo usar db.get)"""
+    return cachear("productos", Producto, ["id", producto_id],
+                   lambda: db.query(ProductoDB).filter(ProductoDB.id == producto_id).first())
 
 
 def get_productos_disponibles(db: Session, skip: int = 0, limit: int = 100) -> List[ProductoDB]:
@@ -19,14 +22,15 @@ def get_productos_disponibles(db: Session, skip: int = 0, limit: int = 100) -> L
              .all())
 
 def get_productos_by_menu(db: Session, menu_id: int, skip: int = 0, limit: int = 100, 
-                         solo_disponibles: bool = True) -> List[ProductoDB]:
+                         solo_disponibles: bool = True, after: Optional[str] = None) -> List[dict]:
     """Obtiene productos por menú, opcionalmente solo los disponibles"""
     query = db.query(ProductoDB).filter(ProductoDB.id_menu == menu_id)
     
     if solo_disponibles:
         query = query.filter(ProductoDB.disponible == True)
         
-    return query.offset(skip).limit(limit).all()
+    return cachear("productos", Producto, ["menu", menu_id, skip, limit, solo_disponibles, after],
+                   lambda: paginar(query, [ProductoDB.id], skip=skip, limit=limit, after=after).all())
 
 def create_producto(db: Session, producto: ProductoCreate) -> ProductoDB:
     """Crea un nuevo producto"""
@@ -34,11 +38,12 @@ def create_producto(db: Session, producto: ProductoCreate) -> ProductoDB:
     db.add(db_producto)
     db.commit()
     db.refresh(db_producto)
+    cache_catalogo.invalidar("productos")
     return db_producto
 
 def update_producto(db: Session, producto_id: int, producto_data: dict) -> Optional[ProductoDB]:
     """Actualiza un producto"""
-    db_producto = db.query(ProductoDB).filter(ProductoDB.id == producto_id).first()
+    db_producto = db.get(ProductoDB, producto_id)
     if not db_producto:
         return None
     
@@ -48,6 +53,7 @@ def update_producto(db: Session, producto_id: int, producto_data: dict) -> Optio
     
     db.commit()
     db.refresh(db_producto)
+    cache_catalogo.invalidar("productos")
     return db_producto
 
 def delete_producto(db: Session, producto_id: int) -> bool:
@@ -73,10 +79,11 @@ def delete_producto(db: Session, producto_id: int) -> bool:
         # Si hay algún error al verificar, asumimos que no hay pedidos
         pass
     
-    db_producto = db.query(ProductoDB).filter(ProductoDB.id == producto_id).first()
+    db_producto = db.get(ProductoDB, producto_id)
     if not db_producto:
         return False
     
     db.delete(db_producto)
     db.commit()
+    cache_catalogo.invalidar("productos")
     return True
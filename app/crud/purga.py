@@ -0,0 +1,19 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+
+def purgar_por_lotes(db: Session, modelo, *filtros, lote: int = 1000) -> int:
+    """
+    Elimina hasta `lote` filas de `modelo` que cumplen `filtros` y confirma;
+    devuelve cuántas borró. Primero se leen las claves con LIMIT y luego se
+    borra por clave primaria (DELETE ... IN), de modo que cada lote es una
+    transacción corta que no bloquea la tabla. Llamar hasta que devuelva
+    menos que `lote` (ver app.jobs.purgar).
+    """
+    clave = inspect(modelo).primary_key[0]
+    ids = [fila[0] for fila in db.query(clave).filter(*filtros).limit(lote)]
+    if not ids:
+        return 0
+    borradas = db.query(modelo).filter(clave.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return borradas
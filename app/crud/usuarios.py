@@ -1,57 +1,46 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from passlib.context import CryptContext
 from datetime import datetime
+from typing import Optional
 from ..models import UsuarioDB
-
-# Configuración para el hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from ..services.password_service import hash_password, verify_password, hash_password_async, verify_password_async
+from .paginacion import paginar
 
 def get_usuario(db: Session, usuario_id: int):
     """Obtiene un usuario por su ID"""
     return db.query(UsuarioDB).filter(UsuarioDB.id == usuario_id).first()
 
+def normalizar_email(email: str) -> str:
+    """
+    Forma canónica con la que se guardan y buscan los emails (sin espacios y en
+    minúsculas), así la búsqueda es una sola consulta sobre el índice único de email
+    """
+    return email.strip().lower()
+
 def get_usuario_by_email(db: Session, email: str):
-    """Obtiene un usuario por su email"""
-    print(f"[DEBUG] Buscando usuario con email: {email}")
-    try:
-        # Primero intentamos con búsqueda exacta
-        usuario = db.query(UsuarioDB).filter(UsuarioDB.email == email).first()
-        
-        # Si no encontramos, intentamos con case-insensitive
-        if not usuario:
-            print(f"[DEBUG] Búsqueda exacta fallida, intentando case-insensitive")
-            usuario = db.query(UsuarioDB).filter(
-                func.lower(UsuarioDB.email) == func.lower(email)
-            ).first()
-        
-        if usuario:
-            print(f"[DEBUG] Usuario encontrado: ID={usuario.id}, Email={usuario.email}")
-        else:
-            print(f"[DEBUG] No se encontró usuario con email: {email}")
-            
-        return usuario
-    except Exception as e:
-        print(f"[ERROR] Error al buscar usuario por email {email}: {str(e)}")
-        return None
+    """Obtiene un usuario por su email (sin distinguir mayúsculas)"""
+    return db.query(UsuarioDB).filter(UsuarioDB.email == normalizar_email(email)).first()
 
-def get_usuarios(db: Session, skip: int = 0, limit: int = 100, estado: str = None):
-    """Lista usuarios con paginación y filtro opcional por estado"""
+def get_usuarios(db: Session, skip: int = 0, limit: int = 100, estado: str = None, after: Optional[str] = None):
+    """Lista usuarios con paginación (offset o cursor) y filtro opcional por estado"""
     query = db.query(UsuarioDB)
     if estado:
         query = query.filter(UsuarioDB.estado == estado)
-    return query.offset(skip).limit(limit).all()
+    return paginar(query, [UsuarioDB.id], skip=skip, limit=limit, after=after).all()
 
 def create_usuario(db: Session, usuario_data):
     """Crea un nuevo usuario con la contraseña hasheada"""
     # Convertir el modelo a diccionario
     usuario_dict = usuario_data.dict()
+    usuario_dict["email"] = normalizar_email(usuario_dict["email"])
     # Hashear la contraseña
-    hashed_password = pwd_context.hash(usuario_dict["password"])
+    hashed_password = hash_password(usuario_dict["password"])
     # Crear el usuario en la base de datos
+    # El registro siempre crea usuarios con el rol 'usuario'
     db_usuario = UsuarioDB(
-        **{k: v for k, v in usuario_dict.items() if k != 'password'},
-        password=hashed_password
+        **{k: v for k, v in usuario_dict.items() if k not in ('password', 'rol')},
+        password=hashed_password,
+        rol="usuario"
     )
     db.add(db_usuario)
     db.commit()
@@ -77,9 +66,12 @@ def update_usuario(db: Session, usuario_id: int, usuario_data):
     else:
         update_data = dict(usuario_data)
     
+    if update_data.get("email"):
+        update_data["email"] = normalizar_email(update_data["email"])
+    
     # Si se proporciona una nueva contraseña, hashearla
     if "password" in update_data:
-        update_data["password"] = pwd_context.hash(update_data["password"])
+        update_data["password"] = hash_password(update_data["password"])
     
     # Actualizar los campos del usuario
     for key, value in update_data.items():
@@ -101,11 +93,40 @@ def delete_usuario(db: Session, usuario_id: int):
     db.refresh(db_usuario)
     return True
 
+def _actualizar_hash(db: Session, user: UsuarioDB, nuevo_hash: Optional[str]):
+    """Guarda el hash recalculado cuando cambió el costo de bcrypt"""
+    if nuevo_hash:
+        user.password = nuevo_hash
+        db.commit()
+
 def authenticate_user(db: Session, email: str, password: str):
     """Autentica un usuario por email y contraseña"""
     user = get_usuario_by_email(db, email)
     if not user:
         return None
-    if not pwd_context.verify(password, user.password):
+    valida, nuevo_hash = verify_password(password, user.password)
+    if not valida:
+        return None
+    _actualizar_hash(db, user, nuevo_hash)
+    return user
+
+async def authenticate_user_async(db: Session, email: str, password: str):
+    """Igual que `authenticate_user`, sin bloquear el event loop durante bcrypt"""
+    user = get_usuario_by_email(db, email)
+    if not user:
+        return None
+    valida, nuevo_hash = await verify_password_async(password, user.password)
+    if not valida:
         return None
+    _actualizar_hash(db, user, nuevo_hash)
     return user
+
+async def update_password_async(db: Session, usuario_id: int, password: str):
+    """Cambia la contraseña de un usuario calculando el hash fuera del event loop"""
+    db_usuario = get_usuario(db, usuario_id)
+    if not db_usuario:
+        return None
+    db_usuario.password = await hash_password_async(password)
+    db.commit()
+    db.refresh(db_usuario)
+    return db_usuario
@@ -1,42 +1,121 @@
+import asyncio
 import os
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from dotenv import load_dotenv
+from .services.instrumentacion_sql import instrumentar_engine
 
 # Cargar variables de entorno
 load_dotenv()
 
 # Configuración de la base de datos
+DB_DRIVER = os.getenv("DB_DRIVER", "mysql+pymysql")
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME", "foodplaza")
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
-
-# Crear el motor de SQLAlchemy
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    pool_size=5,
-    max_overflow=10
+# DATABASE_URL permite apuntar a otra base de datos (p. ej. SQLite para pruebas locales)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or URL.create(
+    DB_DRIVER,
+    username=DB_USER,
+    password=DB_PASSWORD,
+    host=DB_HOST,
+    port=int(DB_PORT) if DB_PORT else None,
+    database=DB_NAME,
 )
 
+# Tamaño del pool por proceso. Gunicorn levanta WORKERS procesos (ver Procfile) y
+# cada uno tiene su propio pool, así que el presupuesto total de conexiones
+# (DB_MAX_CONNECTIONS) se reparte entre ellos: mitad fijas y mitad de desborde.
+WORKERS = int(os.getenv("WORKERS", 4))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", 60))
+_conexiones_por_worker = max(2, DB_MAX_CONNECTIONS // max(1, WORKERS))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", max(1, _conexiones_por_worker // 2)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", _conexiones_por_worker - DB_POOL_SIZE))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+
+
+def _opciones_engine(url) -> dict:
+    """Opciones de create_engine según el motor de base de datos"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        opciones = {"connect_args": {"check_same_thread": False}}
+        # SQLite en memoria comparte una única conexión entre todos los hilos
+        if url.database in (None, "", ":memory:"):
+            opciones["poolclass"] = StaticPool
+            return opciones
+    else:
+        opciones = {"pool_pre_ping": True, "pool_recycle": 3600}
+    opciones.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    return opciones
+
+
+# Crear el motor de SQLAlchemy (único para toda la aplicación)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_opciones_engine(SQLALCHEMY_DATABASE_URL))
+# Tiempo por consulta para Server-Timing, /api/admin/sql y el log de consultas lentas
+instrumentar_engine(engine)
+
 # Crear una fábrica de sesiones
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Clase base para los modelos
 Base = declarative_base()
 
-def get_db():
+# Limita las sesiones simultáneas por proceso a la capacidad del pool. La espera
+# ocurre en el event loop y no en el threadpool: si los hilos se bloquearan
+# esperando conexión, las solicitudes que ya tienen una no tendrían hilo libre
+# para serializar la respuesta y el pool quedaría bloqueado hasta pool_timeout.
+_sesiones = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW) if isinstance(engine.pool, QueuePool) else None
+
+async def get_db():
     """
     Proveedor de dependencia para obtener una sesión de base de datos.
     Se cierra automáticamente después de su uso.
     """
+    if _sesiones is not None:
+        await _sesiones.acquire()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
+        if _sesiones is not None:
+            _sesiones.release()
+
+def create_tables():
+    """Crear tablas en la base de datos"""
+    # Importar modelos para asegurar que se registren con SQLAlchemy
+    from . import models  # noqa
+    Base.metadata.create_all(bind=engine)
+
+def estadisticas_pool() -> dict:
+    """Devuelve el estado actual del pool de conexiones de este proceso"""
+    pool = engine.pool
+    estadisticas = {
+        "pool": type(pool).__name__,
+        "pid": os.getpid(),
+        "workers": WORKERS,
+        "status": pool.status(),
+    }
+    # Solo QueuePool expone contadores de conexiones
+    if isinstance(pool, QueuePool):
+        estadisticas.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=DB_MAX_OVERFLOW,
+            timeout=pool.timeout(),
+            max_conexiones=pool.size() + DB_MAX_OVERFLOW,
+        )
+    return estadisticas
@@ -0,0 +1,76 @@
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from .database import (
+    SQLALCHEMY_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+)
+from .services.instrumentacion_sql import instrumentar_engine
+
+# Capa de datos asíncrona opcional (DB_ASYNC=true). Usa aiomysql para MySQL y
+# aiosqlite cuando DATABASE_URL apunta a SQLite (pruebas locales).
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "si", "yes")
+
+# Drivers asíncronos por motor de base de datos
+DRIVERS_ASYNC = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def url_async(url):
+    """Convierte la URL síncrona de la aplicación a su equivalente asíncrono"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise RuntimeError(f"No hay driver asíncrono configurado para '{backend}'")
+    return url.set(drivername=DRIVERS_ASYNC[backend])
+
+
+def get_async_engine():
+    """Crea (una sola vez por proceso) el motor asíncrono"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url = url_async(SQLALCHEMY_DATABASE_URL)
+        if url.get_backend_name() == "sqlite":
+            opciones = {}
+            if url.database in (None, "", ":memory:"):
+                opciones["poolclass"] = StaticPool
+        else:
+            opciones = {
+                "pool_pre_ping": True,
+                "pool_recycle": 3600,
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT,
+            }
+        _async_engine = create_async_engine(url, **opciones)
+        # Los eventos de cursor se registran en el engine síncrono subyacente
+        instrumentar_engine(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def get_async_db():
+    """
+    Proveedor de dependencia para obtener una sesión asíncrona.
+    Se cierra automáticamente después de su uso.
+    """
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """Cierra las conexiones del motor asíncrono al apagar la aplicación"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
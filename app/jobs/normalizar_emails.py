@@ -0,0 +1,88 @@
+"""
+Normaliza los emails existentes de la tabla usuarios (sin espacios y en minúsculas).
+
+Recorre la tabla por lotes ordenados por id y confirma cada lote por separado,
+así no mantiene bloqueos largos y puede interrumpirse y volver a ejecutarse.
+Los emails cuya forma normalizada ya pertenece a otro usuario no se modifican
+y se listan al final para resolverlos a mano (código de salida 1).
+
+Uso:
+    python -m app.jobs.normalizar_emails --lote 1000 [--simular]
+"""
+import argparse
+import sys
+
+from sqlalchemy import update
+
+from ..database import SessionLocal
+from ..models import UsuarioDB
+from ..crud.usuarios import normalizar_email
+
+
+def normalizar_lote(db, desde_id: int, lote: int, simular: bool = False):
+    """
+    Procesa hasta `lote` usuarios con id > desde_id.
+    Devuelve (ultimo_id, actualizados, conflictos) o ultimo_id None al terminar.
+    """
+    filas = db.query(UsuarioDB.id, UsuarioDB.email).filter(
+        UsuarioDB.id > desde_id
+    ).order_by(UsuarioDB.id).limit(lote).all()
+    if not filas:
+        return None, 0, []
+
+    originales = dict(filas)
+    cambios = {id_: normalizar_email(email) for id_, email in filas if email != normalizar_email(email)}
+
+    # Una sola consulta para saber qué emails normalizados ya están en uso
+    ocupados = {}
+    if cambios:
+        for id_, email in db.query(UsuarioDB.id, UsuarioDB.email).filter(UsuarioDB.email.in_(set(cambios.values()))):
+            ocupados.setdefault(normalizar_email(email), set()).add(id_)
+
+    actualizaciones = []
+    conflictos = []
+    asignados = set()
+    for id_, email in cambios.items():
+        otros = ocupados.get(email, set()) - {id_}
+        if otros or email in asignados:
+            conflictos.append((id_, originales[id_]))
+            continue
+        asignados.add(email)
+        actualizaciones.append({"id": id_, "email": email})
+
+    if actualizaciones and not simular:
+        db.execute(update(UsuarioDB), actualizaciones)
+        db.commit()
+    return filas[-1].id, len(actualizaciones), conflictos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lote", type=int, default=1000)
+    parser.add_argument("--simular", action="store_true", help="Solo informar, sin modificar la base de datos")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    ultimo_id, total, conflictos = 0, 0, []
+    try:
+        while True:
+            ultimo_id, actualizados, conflictos_lote = normalizar_lote(db, ultimo_id, args.lote, args.simular)
+            if ultimo_id is None:
+                break
+            total += actualizados
+            conflictos.extend(conflictos_lote)
+            print(f"Lote hasta id {ultimo_id}: {actualizados} emails normalizados")
+    finally:
+        db.close()
+
+    accion = "a normalizar" if args.simular else "normalizados"
+    print(f"Total {accion}: {total}")
+    if conflictos:
+        print(f"{len(conflictos)} emails no se modificaron porque su forma normalizada ya existe:")
+        for id_, email in conflictos:
+            print(f"  usuario {id_}: '{email}'")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
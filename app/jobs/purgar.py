@@ -0,0 +1,66 @@
+"""
+Elimina por lotes las filas que ya no hacen falta. Cada lote es una
+transacción corta (ver app.crud.purga.purgar_por_lotes), así que puede
+ejecutarse con la aplicación en marcha. Pensado para cron.
+
+Objetivos:
+    idempotencia     claves de idempotencia vencidas (tabla idempotencia)
+    codigos_reset    códigos de restablecimiento vencidos (tabla reset_codes; con
+                     PASSWORD_RESET_BACKEND=memoria o redis expiran solos)
+    trabajos_imagen  trabajos de subida de imágenes vencidos (tabla trabajos_imagen)
+    outbox           correos enviados o fallidos de hace más de
+                     EMAIL_RETENCION_HORAS (tabla email_outbox)
+
+Uso:
+    python -m app.jobs.purgar idempotencia --lote 1000
+    python -m app.jobs.purgar todos
+"""
+import argparse
+import importlib
+
+from ..database import SessionLocal
+
+# Objetivo -> función purgar(db, lote) que devuelve cuántas filas borró. Se
+# importan al usarse: algunos servicios exigen su configuración al importarse
+OBJETIVOS = {
+    "idempotencia": "app.services.idempotencia:purgar_vencidas",
+    "codigos_reset": "app.services.password_reset_service:purgar_codigos_vencidos",
+    "trabajos_imagen": "app.services.imagenes_service:purgar_trabajos_vencidos",
+    "outbox": "app.services.email.outbox:purgar_correos_procesados",
+}
+
+
+def cargar_purga(objetivo: str):
+    modulo, funcion = OBJETIVOS[objetivo].split(":")
+    return getattr(importlib.import_module(modulo), funcion)
+
+
+def purgar(objetivo: str, lote: int = 1000) -> int:
+    """Repite la purga de `objetivo` hasta que un lote venga incompleto; devuelve el total"""
+    purgar_lote = cargar_purga(objetivo)
+    db = SessionLocal()
+    total = 0
+    try:
+        while True:
+            borradas = purgar_lote(db, lote=lote)
+            total += borradas
+            if borradas < lote:
+                break
+    finally:
+        db.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("objetivos", nargs="+", choices=[*OBJETIVOS, "todos"])
+    parser.add_argument("--lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    objetivos = list(OBJETIVOS) if "todos" in args.objetivos else args.objetivos
+    for objetivo in objetivos:
+        print(f"{objetivo}: {purgar(objetivo, args.lote)} filas eliminadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Reconstruye los acumulados diarios de ventas (ventas_diarias_local y
+ventas_diarias_producto) a partir de los pedidos completados.
+
+Los acumulados se actualizan solos cuando un pedido pasa a 'completado'; este
+proceso sirve para llenarlos con el historial existente la primera vez o para
+corregirlos después de cambios manuales en los pedidos. Procesa el rango en
+lotes de días, cada uno en su propia transacción, para no mantener bloqueos
+largos sobre las tablas.
+
+Uso:
+    python -m app.jobs.reconstruir_ventas --desde 2024-01-01 --hasta 2024-12-31
+    python -m app.jobs.reconstruir_ventas --local 3   # todo el historial de un local
+"""
+import argparse
+from datetime import date, timedelta
+
+from sqlalchemy import func
+
+from ..database import SessionLocal, create_tables
+from ..crud.estadisticas import ESTADO_VENTA, reconstruir_ventas
+from ..models import PedidoDB
+
+
+def rango_historial(db, local_id=None) -> tuple:
+    """Primer y último día con pedidos completados"""
+    consulta = db.query(func.min(PedidoDB.fecha_pedido), func.max(PedidoDB.fecha_pedido)).filter(
+        PedidoDB.estado_pedido == ESTADO_VENTA
+    )
+    if local_id is not None:
+        consulta = consulta.filter(PedidoDB.id_local == local_id)
+    primero, ultimo = consulta.one()
+    if primero is None:
+        return None, None
+    return primero.date(), ultimo.date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primer día (por defecto, el del pedido más antiguo)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día (por defecto, el del pedido más reciente)")
+    parser.add_argument("--local", type=int, help="Reconstruir solo este local")
+    parser.add_argument("--dias-por-lote", type=int, default=31)
+    args = parser.parse_args()
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        primero, ultimo = rango_historial(db, args.local)
+        desde = args.desde or primero
+        hasta = args.hasta or ultimo
+        if desde is None or hasta is None:
+            print("No hay pedidos completados que acumular")
+            return
+
+        filas = 0
+        inicio = desde
+        while inicio <= hasta:
+            fin = min(inicio + timedelta(days=args.dias_por_lote - 1), hasta)
+            escritas = reconstruir_ventas(db, inicio, fin, local_id=args.local)
+            filas += escritas
+            print(f"{inicio} → {fin}: {escritas} filas")
+            inicio = fin + timedelta(days=1)
+    finally:
+        db.close()
+    print(f"Acumulados reconstruidos: {filas} filas por local y día")
+
+
+if __name__ == "__main__":
+    main()
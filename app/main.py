@@ -1,36 +1,91 @@
-from fastapi import FastAPI
+import hmac
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import router
 from app.routers.plazas_imagenes import router as plazas_imagenes_router
 from app.routers.locales_imagenes import router as locales_imagenes_router
 from app.routers.productos_imagenes import router as productos_imagenes_router
+from app.routers.imagenes import router as imagenes_router
 from app.routers.pedidos import router as pedidos_router
 from app.routers.auth import router as auth_router
-from app.db import create_tables
+from app.routers.admin import router as admin_router
+from app.database import DB_MAX_OVERFLOW, create_tables, engine
+from app.migrations import DB_MIGRAR_AL_INICIAR, aplicar_migraciones
+from app.database_async import DB_ASYNC, dispose_async_engine
+from app.services.http_cache import CacheHTTPMiddleware
+from app.services.ingesta_imagenes import LimiteSubidaMiddleware
+from app.services.instrumentacion_sql import SQL_INSTRUMENTACION, InstrumentacionSQLMiddleware
+from app.services.metricas import METRICAS_HABILITADAS, METRICAS_TOKEN, MetricasMiddleware, exportar, instrumentar_pool
+from app.services.email.outbox import EMAIL_OUTBOX_WORKER, remitente_correo
 
 app = FastAPI()
 
+# Tamaño máximo de las subidas de imágenes, antes de leer el formulario
+app.add_middleware(LimiteSubidaMiddleware)
+
+# ETag / If-None-Match y Cache-Control para las lecturas del catálogo
+app.add_middleware(CacheHTTPMiddleware)
+
 # Configuración CORS básica
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
 
+# Consultas por solicitud (Server-Timing y /api/admin/sql). Se agrega al final
+# para quedar por fuera de los demás middlewares y ver la respuesta definitiva
+if SQL_INSTRUMENTACION:
+    app.add_middleware(InstrumentacionSQLMiddleware)
+
+# Métricas de Prometheus por ruta y del pool, expuestas en /metrics
+if METRICAS_HABILITADAS:
+    app.add_middleware(MetricasMiddleware)
+    instrumentar_pool(engine, DB_MAX_OVERFLOW)
+
 # Incluir rutas
+if DB_ASYNC:
+    # Las lecturas del catálogo usan la capa asíncrona y tienen prioridad sobre las síncronas
+    from app.routers.catalogo_async import router as catalogo_async_router
+    app.include_router(catalogo_async_router, prefix="/api")
 app.include_router(router, prefix="/api")
 app.include_router(plazas_imagenes_router)
 app.include_router(locales_imagenes_router)
 app.include_router(productos_imagenes_router)
+app.include_router(imagenes_router)
 app.include_router(pedidos_router, prefix="/api")
 app.include_router(auth_router, prefix="/api/auth")
+app.include_router(admin_router, prefix="/api")
 
 # Crear tablas al iniciar
 @app.on_event("startup")
 def startup():
     create_tables()
+    if DB_MIGRAR_AL_INICIAR:
+        aplicar_migraciones()
     print("Base de datos lista")
+    if EMAIL_OUTBOX_WORKER:
+        remitente_correo.iniciar()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await run_in_threadpool(remitente_correo.detener)
+    await dispose_async_engine()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Métricas en formato de texto de Prometheus (sumadas entre workers de gunicorn)"""
+    if not METRICAS_HABILITADAS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if METRICAS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICAS_TOKEN}"
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de métricas inválido")
+    contenido, tipo = exportar()
+    return Response(content=contenido, headers={"Content-Type": tipo})
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,128 @@
+"""
+Migraciones versionadas del esquema.
+
+`create_tables` crea las tablas que no existen pero no modifica las existentes
+(índices o columnas nuevas). Esos cambios se escriben como migraciones en
+`versiones/` y se registran en la tabla `schema_migrations`, de modo que cada
+una se aplica una sola vez por base de datos.
+"""
+import importlib
+import os
+import pkgutil
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from ..database import engine
+from . import versiones
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Aplicar las migraciones pendientes al iniciar la aplicación. Con varios
+# workers solo uno las ejecuta (bloqueo con nombre en MySQL); el resto espera.
+DB_MIGRAR_AL_INICIAR = os.getenv("DB_MIGRAR_AL_INICIAR", "true").lower() in ("1", "true", "si", "yes")
+DB_MIGRACIONES_ESPERA = int(os.getenv("DB_MIGRACIONES_ESPERA", 600))
+NOMBRE_BLOQUEO = "foodplaza_schema_migrations"
+
+metadata_migraciones = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata_migraciones,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("descripcion", String(200), nullable=False),
+    Column("duracion_ms", Integer, nullable=False),
+    Column("aplicada_en", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def cargar_migraciones() -> list:
+    """Módulos de `versiones/` ordenados por VERSION"""
+    modulos = [
+        importlib.import_module(f"{versiones.__name__}.{info.name}")
+        for info in pkgutil.iter_modules(versiones.__path__)
+    ]
+    modulos.sort(key=lambda modulo: modulo.VERSION)
+    for anterior, siguiente in zip(modulos, modulos[1:]):
+        if anterior.VERSION == siguiente.VERSION:
+            raise RuntimeError(
+                f"Migraciones con la misma versión {anterior.VERSION}: {anterior.__name__} y {siguiente.__name__}"
+            )
+    return modulos
+
+
+@contextmanager
+def _bloqueo(conexion: Connection):
+    """Serializa las migraciones entre procesos (GET_LOCK de MySQL; en otros motores no hace nada)"""
+    if conexion.dialect.name != "mysql":
+        yield
+        return
+    obtenido = conexion.execute(
+        text("SELECT GET_LOCK(:nombre, :espera)"),
+        {"nombre": NOMBRE_BLOQUEO, "espera": DB_MIGRACIONES_ESPERA}
+    ).scalar()
+    conexion.commit()
+    if obtenido != 1:
+        raise RuntimeError("No se pudo obtener el bloqueo de migraciones")
+    try:
+        yield
+    finally:
+        conexion.execute(text("SELECT RELEASE_LOCK(:nombre)"), {"nombre": NOMBRE_BLOQUEO})
+        conexion.commit()
+
+
+def _versiones_aplicadas(conexion: Connection) -> dict:
+    filas = conexion.execute(select(schema_migrations).order_by(schema_migrations.c.version)).mappings().all()
+    conexion.commit()
+    return {fila["version"]: dict(fila) for fila in filas}
+
+
+def aplicar_migraciones(motor: Engine = engine, hasta: Optional[int] = None) -> List[int]:
+    """
+    Aplica en orden las migraciones pendientes (hasta la versión `hasta`, si se
+    indica) y devuelve las versiones aplicadas. Cada migración y su registro en
+    `schema_migrations` van en la misma transacción; en MySQL el DDL confirma
+    por sí mismo, por eso las operaciones comprueban si ya se hicieron y una
+    migración interrumpida puede volver a ejecutarse.
+    """
+    aplicadas_ahora = []
+    with motor.connect() as conexion:
+        with _bloqueo(conexion):
+            metadata_migraciones.create_all(conexion)
+            conexion.commit()
+            aplicadas = _versiones_aplicadas(conexion)
+
+            for migracion in cargar_migraciones():
+                if migracion.VERSION in aplicadas or (hasta is not None and migracion.VERSION > hasta):
+                    continue
+                print(f"Aplicando migración {migracion.VERSION:04d}: {migracion.DESCRIPCION}")
+                inicio = time.perf_counter()
+                with conexion.begin():
+                    migracion.aplicar(conexion)
+                    conexion.execute(schema_migrations.insert().values(
+                        version=migracion.VERSION,
+                        descripcion=migracion.DESCRIPCION,
+                        duracion_ms=int((time.perf_counter() - inicio) * 1000),
+                    ))
+                aplicadas_ahora.append(migracion.VERSION)
+    return aplicadas_ahora
+
+
+def estado_migraciones(motor: Engine = engine) -> List[dict]:
+    """Todas las migraciones conocidas con su fecha de aplicación (None si está pendiente)"""
+    with motor.connect() as conexion:
+        metadata_migraciones.create_all(conexion)
+        conexion.commit()
+        aplicadas = _versiones_aplicadas(conexion)
+    return [
+        {
+            "version": migracion.VERSION,
+            "descripcion": migracion.DESCRIPCION,
+            "aplicada_en": aplicadas.get(migracion.VERSION, {}).get("aplicada_en"),
+        }
+        for migracion in cargar_migraciones()
+    ]
@@ -0,0 +1,33 @@
+"""
+Aplica las migraciones pendientes del esquema o muestra su estado.
+
+Uso:
+    python -m app.migrations            # crea las tablas y aplica lo pendiente
+    python -m app.migrations --estado   # lista migraciones aplicadas y pendientes
+    python -m app.migrations --hasta 3  # aplica solo hasta la versión 3
+"""
+import argparse
+
+from ..database import create_tables
+from . import aplicar_migraciones, estado_migraciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--estado", action="store_true", help="Solo mostrar el estado de las migraciones")
+    parser.add_argument("--hasta", type=int, default=None, help="Última versión a aplicar")
+    args = parser.parse_args()
+
+    if args.estado:
+        for migracion in estado_migraciones():
+            aplicada = migracion["aplicada_en"] or "pendiente"
+            print(f"{migracion['version']:04d}  {aplicada!s:<19}  {migracion['descripcion']}")
+        return
+
+    create_tables()
+    aplicadas = aplicar_migraciones(hasta=args.hasta)
+    print(f"Migraciones aplicadas: {len(aplicadas)}" + (f" ({', '.join(map(str, aplicadas))})" if aplicadas else ""))
+
+
+if __name__ == "__main__":
+    main()
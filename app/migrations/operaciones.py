@@ -0,0 +1,79 @@
+from typing import Sequence
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def existe_tabla(conexion: Connection, tabla: str) -> bool:
+    return inspect(conexion).has_table(tabla)
+
+
+def existe_indice(conexion: Connection, tabla: str, nombre: str) -> bool:
+    return any(indice["name"] == nombre for indice in inspect(conexion).get_indexes(tabla))
+
+
+def crear_indice(conexion: Connection, tabla: str, nombre: str, columnas: Sequence[str], unico: bool = False) -> bool:
+    """
+    Crea un índice si no existe. En MySQL se crea en línea (ALGORITHM=INPLACE,
+    LOCK=NONE): la tabla sigue aceptando lecturas y escrituras mientras se
+    construye, y si el motor no puede hacerlo sin bloquear falla en lugar de
+    bloquear la tabla. Devuelve False si el índice ya existía.
+    """
+    if existe_indice(conexion, tabla, nombre):
+        return False
+
+    citar = conexion.dialect.identifier_preparer.quote
+    ddl = "CREATE {}INDEX {} ON {} ({})".format(
+        "UNIQUE " if unico else "",
+        citar(nombre),
+        citar(tabla),
+        ", ".join(citar(columna) for columna in columnas),
+    )
+    if conexion.dialect.name == "mysql":
+        ddl += " ALGORITHM=INPLACE LOCK=NONE"
+    conexion.execute(text(ddl))
+    return True
+
+
+def eliminar_indice(conexion: Connection, tabla: str, nombre: str) -> bool:
+    """Elimina un índice si existe (en línea en MySQL). Devuelve False si no existía"""
+    if not existe_indice(conexion, tabla, nombre):
+        return False
+
+    citar = conexion.dialect.identifier_preparer.quote
+    if conexion.dialect.name == "mysql":
+        conexion.execute(text(f"DROP INDEX {citar(nombre)} ON {citar(tabla)} ALGORITHM=INPLACE LOCK=NONE"))
+    else:
+        conexion.execute(text(f"DROP INDEX {citar(nombre)}"))
+    return True
+
+
+def longitud_columna(conexion: Connection, tabla: str, columna: str):
+    for definicion in inspect(conexion).get_columns(tabla):
+        if definicion["name"] == columna:
+            return getattr(definicion["type"], "length", None)
+    return None
+
+
+def ampliar_varchar(conexion: Connection, tabla: str, columna: str, longitud: int, nula: bool = False) -> bool:
+    """
+    Amplía una columna VARCHAR si es más corta que `longitud`. En MySQL se pide
+    en línea: ampliar un VARCHAR sin cruzar los 255 bytes solo cambia metadatos.
+    SQLite no limita la longitud de VARCHAR, así que ahí no hace nada. Devuelve
+    False si no hubo cambios.
+    """
+    actual = longitud_columna(conexion, tabla, columna)
+    if conexion.dialect.name == "sqlite" or actual is None or actual >= longitud:
+        return False
+
+    citar = conexion.dialect.identifier_preparer.quote
+    nulidad = "NULL" if nula else "NOT NULL"
+    if conexion.dialect.name == "mysql":
+        conexion.execute(text(
+            f"ALTER TABLE {citar(tabla)} MODIFY COLUMN {citar(columna)} VARCHAR({longitud}) {nulidad}, "
+            "ALGORITHM=INPLACE, LOCK=NONE"
+        ))
+    else:
+        conexion.execute(text(
+            f"ALTER TABLE {citar(tabla)} ALTER COLUMN {citar(columna)} TYPE VARCHAR({longitud})"
+        ))
+    return True
@@ -0,0 +1,2 @@
+# Cada módulo define VERSION, DESCRIPCION y aplicar(conexion).
+# El nombre (mNNNN_descripcion) solo ordena los archivos; manda VERSION.
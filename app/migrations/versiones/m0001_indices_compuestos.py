@@ -0,0 +1,22 @@
+"""Índices compuestos para los listados de pedidos, productos, locales y menús"""
+from ..operaciones import crear_indice
+
+VERSION = 1
+DESCRIPCION = "Índices compuestos para los filtros y ordenamientos de los listados"
+
+INDICES = (
+    ("locales", "ix_locales_plaza_tipo", ["plaza_id", "tipo_comercio"]),
+    ("pedidos", "ix_pedidos_local_estado_fecha", ["id_local", "estado_pedido", "fecha_pedido"]),
+    ("pedidos", "ix_pedidos_usuario_estado_fecha", ["id_usuario", "estado_pedido", "fecha_pedido"]),
+    ("pedidos", "ix_pedidos_fecha", ["fecha_pedido", "id"]),
+    ("pedido_items", "ix_pedido_items_pedido", ["id_pedido"]),
+    ("menus", "ix_menus_local", ["id_local"]),
+    ("productos", "ix_productos_menu_disponible", ["id_menu", "disponible"]),
+)
+
+
+def aplicar(conexion):
+    # En MySQL las claves foráneas ya tenían un índice implícito sobre la
+    # primera columna; el motor lo descarta cuando otro índice puede cubrirla.
+    for tabla, nombre, columnas in INDICES:
+        crear_indice(conexion, tabla, nombre, columnas)
@@ -0,0 +1,14 @@
+"""Códigos de restablecimiento guardados como HMAC y purga por vencimiento"""
+from ..operaciones import ampliar_varchar, crear_indice, existe_tabla
+
+VERSION = 2
+DESCRIPCION = "reset_codes.code guarda el HMAC del código; índice por expires_at para la purga"
+
+
+def aplicar(conexion):
+    if not existe_tabla(conexion, "reset_codes"):
+        return
+    # 32 caracteres hex (128 bits del HMAC). Con utf8mb4 son 128 bytes: sigue
+    # por debajo de 256 y MySQL amplía la columna sin copiar la tabla
+    ampliar_varchar(conexion, "reset_codes", "code", 32)
+    crear_indice(conexion, "reset_codes", "ix_reset_codes_expires_at", ["expires_at"])
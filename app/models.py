@@ -1,10 +1,38 @@
 from datetime import datetime, time
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DECIMAL, Boolean, Enum, TIMESTAMP, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DECIMAL, Boolean, Enum, TIMESTAMP, DateTime, Date, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from pydantic import BaseModel, Field, condecimal, EmailStr, validator
-from typing import Optional, List
-from .db import Base
+from typing import Optional, List, Literal
+from .database import Base
+
+class FechaHoraSegundos(TypeDecorator):
+    """
+    DATETIME con precisión de segundos en todos los motores. En SQLite se guarda
+    y se compara como 'YYYY-MM-DD HH:MM:SS', igual que CURRENT_TIMESTAMP (sin
+    esto los parámetros llevan '.000000' y no coinciden con el texto guardado);
+    en MySQL se truncan las fracciones en lugar de que el servidor las redondee.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        # Lo usa el cursor de paginación para decodificar la fecha
+        return datetime
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(sqlite.DATETIME(truncate_microseconds=True))
+        return dialect.type_descriptor(DateTime())
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, datetime):
+            return value.replace(microsecond=0)
+        return value
+
 
 # Modelos SQLAlchemy
 class PlazaDB(Base):
@@ -22,6 +50,9 @@ class PlazaDB(Base):
 
 class LocaleDB(Base):
     __tablename__ = 'locales'
+    __table_args__ = (
+        Index('ix_locales_plaza_tipo', 'plaza_id', 'tipo_comercio'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False)
@@ -97,11 +128,18 @@ class Locale(LocaleBase):
 # Modelo SQLAlchemy para Pedidos
 class PedidoDB(Base):
     __tablename__ = 'pedidos'
+    __table_args__ = (
+        # Listados por local o por usuario filtrando por estado, ordenados por fecha
+        Index('ix_pedidos_local_estado_fecha', 'id_local', 'estado_pedido', 'fecha_pedido'),
+        Index('ix_pedidos_usuario_estado_fecha', 'id_usuario', 'estado_pedido', 'fecha_pedido'),
+        Index('ix_pedidos_fecha', 'fecha_pedido', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     id_usuario = Column(Integer, ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False)
     id_local = Column(Integer, ForeignKey('locales.id', ondelete='CASCADE'), nullable=False)
-    fecha_pedido = Column(DateTime, server_default=func.now())
+    # Clave del orden y del cursor de los listados: misma precisión guardada y comparada
+    fecha_pedido = Column(FechaHoraSegundos, server_default=func.now())
     estado_pedido = Column(Enum('pendiente', 'en_preparacion', 'listo_para_recoger', 'completado', 'cancelado', 
                               name='estados_pedido'), 
                           nullable=False, 
@@ -118,6 +156,9 @@ class PedidoDB(Base):
 # Modelo SQLAlchemy para Ítems de Pedido
 class PedidoItemDB(Base):
     __tablename__ = 'pedido_items'
+    __table_args__ = (
+        Index('ix_pedido_items_pedido', 'id_pedido'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     id_pedido = Column(Integer, ForeignKey('pedidos.id', ondelete='CASCADE'), nullable=False)
@@ -133,6 +174,9 @@ class PedidoItemDB(Base):
 # Modelos para Menús
 class MenuDB(Base):
     __tablename__ = 'menus'
+    __table_args__ = (
+        Index('ix_menus_local', 'id_local'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     id_local = Column(Integer, ForeignKey('locales.id', ondelete='CASCADE'), nullable=False)
@@ -144,6 +188,9 @@ class MenuDB(Base):
 
 class ProductoDB(Base):
     __tablename__ = 'productos'
+    __table_args__ = (
+        Index('ix_productos_menu_disponible', 'id_menu', 'disponible'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False)
@@ -203,17 +250,96 @@ class Producto(ProductoBase):
     class Config:
         from_attributes = True
 
+# Modelos Pydantic para el catálogo completo de un local
+class MenuCatalogo(Menu):
+    productos: List[Producto] = []
+
+class CatalogoLocal(Locale):
+    menus: List[MenuCatalogo] = []
+
 # Modelo para códigos de restablecimiento de contraseña
 class ResetCodeDB(Base):
     __tablename__ = 'reset_codes'
+    __table_args__ = (
+        Index('ix_reset_codes_expires_at', 'expires_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(100), nullable=False, index=True)
-    code = Column(String(6), nullable=False)
+    # HMAC-SHA256 del código (truncado a 128 bits), nunca el código en claro
+    code = Column(String(32), nullable=False)
     expires_at = Column(DateTime, nullable=False)
     used = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
+# Bandeja de salida de correos: las solicitudes encolan y un proceso en segundo plano envía
+class EmailOutboxDB(Base):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        Index('ix_email_outbox_estado_proximo', 'estado', 'proximo_intento'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    destinatario = Column(String(100), nullable=False)
+    asunto = Column(String(200), nullable=False)
+    texto = Column(Text, nullable=False)
+    html = Column(Text, nullable=True)
+    estado = Column(String(20), nullable=False, default='pendiente')  # pendiente, enviando, enviado, fallido
+    intentos = Column(Integer, nullable=False, default=0)
+    proximo_intento = Column(DateTime, nullable=False, default=datetime.utcnow)
+    reservado_hasta = Column(DateTime, nullable=True)
+    ultimo_error = Column(Text, nullable=True)
+    fecha_creacion = Column(DateTime, server_default=func.now())
+    fecha_envio = Column(DateTime, nullable=True)
+
+# Ventas precalculadas por local y día (se acumulan cuando un pedido pasa a 'completado')
+class VentaDiariaLocalDB(Base):
+    __tablename__ = 'ventas_diarias_local'
+    
+    id_local = Column(Integer, ForeignKey('locales.id', ondelete='CASCADE'), primary_key=True)
+    fecha = Column(Date, primary_key=True)  # día de fecha_pedido
+    pedidos = Column(Integer, nullable=False, default=0)
+    ingresos = Column(DECIMAL(12, 2), nullable=False, default=0)
+    items = Column(Integer, nullable=False, default=0)
+    # Suma de tiempo_preparacion_estimado; el promedio es tiempo_preparacion / pedidos
+    tiempo_preparacion = Column(Integer, nullable=False, default=0)
+
+# Ventas precalculadas por local, día y producto
+class VentaDiariaProductoDB(Base):
+    __tablename__ = 'ventas_diarias_producto'
+    
+    id_local = Column(Integer, ForeignKey('locales.id', ondelete='CASCADE'), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    id_producto = Column(Integer, primary_key=True)  # sin FK: el histórico se conserva aunque se borre el producto
+    cantidad = Column(Integer, nullable=False, default=0)
+    ingresos = Column(DECIMAL(12, 2), nullable=False, default=0)
+
+# Respuestas guardadas por Idempotency-Key para que los reintentos no dupliquen operaciones
+class IdempotenciaDB(Base):
+    __tablename__ = 'idempotencia'
+    
+    # SHA-256 (hex) del usuario, la operación y la clave enviada por el cliente
+    clave = Column(String(64), primary_key=True)
+    # SHA-256 del cuerpo de la solicitud: la misma clave con otro contenido es un error
+    huella = Column(String(64), nullable=False)
+    estado = Column(String(20), nullable=False, default='en_proceso')  # en_proceso, completado
+    codigo = Column(Integer, nullable=True)
+    respuesta = Column(Text, nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expira_en = Column(DateTime, nullable=False, index=True)
+
+# Estado de las subidas de imágenes en segundo plano (compartido entre workers)
+class TrabajoImagenDB(Base):
+    __tablename__ = 'trabajos_imagen'
+
+    id = Column(String(32), primary_key=True)  # uuid4 en hex
+    estado = Column(String(20), nullable=False, default='pendiente')  # pendiente, procesando, completado, error
+    url = Column(String(500), nullable=True)
+    public_id = Column(String(500), nullable=True)
+    error = Column(Text, nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expira_en = Column(DateTime, nullable=False, index=True)
+
 # Modelo SQLAlchemy para Usuarios
 class UsuarioDB(Base):
     __tablename__ = 'usuarios'
@@ -238,7 +364,6 @@ class UsuarioBase(BaseModel):
     nombre: str = Field(..., max_length=100)
     email: EmailStr
     telefono: Optional[str] = Field(None, max_length=20)
-    rol: str = "usuario"
     imagen_url: Optional[str] = None
     imagen_public_id: Optional[str] = None
     
@@ -271,12 +396,17 @@ class UsuarioUpdate(BaseModel):
     nombre: Optional[str] = Field(None, max_length=100)
     email: Optional[EmailStr] = None
     telefono: Optional[str] = Field(None, max_length=20)
-    rol: Optional[str] = None
     estado: Optional[str] = None
     password: Optional[str] = Field(None, min_length=8)
 
+# El rol no se acepta al registrarse ni al actualizar el perfil: solo lo cambia
+# un administrador (PUT /api/admin/usuarios/{id}/rol)
+class UsuarioRolUpdate(BaseModel):
+    rol: Literal["usuario", "gerente", "administrador"]
+
 class Usuario(UsuarioBase):
     id: int
+    rol: str
     estado: str
     fecha_creacion: datetime
     fecha_actualizacion: datetime
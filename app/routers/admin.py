@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..crud import usuarios as crud_usuarios
+from ..database import estadisticas_pool, get_db
+from ..services.cache_service import cache_catalogo
+from ..services.email.outbox import estadisticas_outbox
+from ..services.eventos_pedidos import bus_pedidos
+from ..services.instrumentacion_sql import SQL_LENTA_MS, estadisticas_sql
+from ..services.token_service import require_roles
+
+# Solo administradores (el rol se toma del token, sin consultar la base de datos)
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_roles("administrador"))])
+
+@router.get("/pool")
+def obtener_estadisticas_pool():
+    """
+    Estado del pool de conexiones del proceso que atiende la solicitud.
+    Con varios workers de gunicorn cada proceso tiene su propio pool.
+    """
+    return estadisticas_pool()
+
+@router.get("/cache")
+def obtener_estadisticas_cache():
+    """Aciertos y fallos de la caché del catálogo por espacio de nombres"""
+    return cache_catalogo.estadisticas()
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+def limpiar_cache():
+    """Vacía la caché del catálogo"""
+    cache_catalogo.limpiar()
+    return None
+
+@router.get("/email")
+def obtener_estadisticas_email(db: Session = Depends(get_db)):
+    """Correos en la bandeja de salida por estado (pendiente, enviando, enviado, fallido)"""
+    return estadisticas_outbox(db)
+
+
+@router.get("/eventos")
+def obtener_estadisticas_eventos():
+    """Clientes conectados al stream de pedidos en este proceso"""
+    return bus_pedidos.estadisticas()
+
+
+@router.get("/sql")
+def obtener_estadisticas_sql():
+    """
+    Consultas por ruta en este proceso: promedio y máximo de consultas y de
+    tiempo de base de datos por solicitud, y la sentencia más lenta vista.
+    Las rutas con más consultas promedio (posibles N+1) aparecen primero.
+    """
+    return {"lenta_ms": SQL_LENTA_MS, "rutas": estadisticas_sql.resumen()}
+
+@router.delete("/sql", status_code=status.HTTP_204_NO_CONTENT)
+def limpiar_estadisticas_sql():
+    """Reinicia las estadísticas de consultas por ruta"""
+    estadisticas_sql.limpiar()
+    return None
+
+@router.put("/usuarios/{usuario_id}/rol", response_model=models.Usuario)
+def cambiar_rol_usuario(usuario_id: int, datos: models.UsuarioRolUpdate, db: Session = Depends(get_db)):
+    """
+    Cambia el rol de un usuario. Es la única forma de asignar 'gerente' o
+    'administrador'; el cambio llega al token del usuario al renovarlo.
+    """
+    db_usuario = crud_usuarios.update_usuario(db, usuario_id=usuario_id, usuario_data={"rol": datos.rol})
+    if db_usuario is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return db_usuario
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
 from .. import schemas
-from ..db import get_db
-from ..services.password_reset_service import PasswordResetService
+from ..database import get_db
+from ..services.password_reset_service import PasswordResetService, limitar_solicitud, limitar_verificacion
 from ..services.email.email_service import email_service
+from ..services.email.outbox import encolar_correo
+from ..services.limite_solicitudes import ip_cliente
+from ..services.token_service import REFRESH, crear_tokens, verificar_token
 from ..crud import usuarios as crud_usuarios
 
 router = APIRouter(tags=["auth"])
@@ -33,6 +36,14 @@ router = APIRouter(tags=["auth"])
                 }
             }
         },
+        429: {
+            "description": "Demasiadas solicitudes para el correo o la IP (ver Retry-After)",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Demasiadas solicitudes, intente más tarde"}
+                }
+            }
+        },
         500: {
             "description": "Error interno del servidor",
             "content": {
@@ -45,6 +56,7 @@ router = APIRouter(tags=["auth"])
 )
 async def request_password_reset(
     request: schemas.PasswordResetRequest,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -60,14 +72,20 @@ async def request_password_reset(
     ### Respuestas:
     - **200 OK**: El código de verificación ha sido enviado al correo electrónico si existe una cuenta asociada.
     - **404 Not Found**: No existe una cuenta con el correo electrónico proporcionado.
+    - **429 Too Many Requests**: Se superó el límite de solicitudes por correo o por IP.
     - **500 Internal Server Error**: Error inesperado al procesar la solicitud.
     
     ### Detalles adicionales:
     - El código de verificación es numérico de 6 dígitos.
     - El código expira después de 15 minutos (configurable).
     - Cada código solo puede ser utilizado una vez.
+    - Solo se guarda el HMAC del código, nunca el código en claro.
+    - El correo se envía en segundo plano; la respuesta no espera al servidor SMTP.
     - Por razones de seguridad, el mensaje de éxito es genérico.
     """
+    # Limitar por correo y por IP antes de consultar la base de datos
+    limitar_solicitud(request.email, ip_cliente(http_request))
+
     # Verificar si el correo existe
     user = crud_usuarios.get_usuario_by_email(db, email=request.email)
     if not user:
@@ -81,15 +99,14 @@ async def request_password_reset(
         )
     
     try:
-        # Generar y guardar el código de restablecimiento
+        # Generar el código; con el almacén SQL se confirma en el mismo commit
+        # que el correo encolado
         reset_service = PasswordResetService(db)
-        reset_code = reset_service.create_reset_code(email=request.email)
+        codigo = reset_service.create_reset_code(email=request.email)
         
-        # Enviar el código por correo electrónico
-        await email_service.send_verification_code(
-            to_email=request.email,
-            verification_code=reset_code.code
-        )
+        # Encolar el correo con el código; el envío ocurre en segundo plano
+        asunto, texto, html = email_service.build_verification_code(codigo)
+        encolar_correo(db, request.email, asunto, texto, html)
         
         return {
             "message": "Se ha enviado un código de verificación a tu correo electrónico",
@@ -129,6 +146,14 @@ async def request_password_reset(
                 }
             }
         },
+        429: {
+            "description": "Demasiados intentos de verificación para el correo o la IP (ver Retry-After)",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Demasiadas solicitudes, intente más tarde"}
+                }
+            }
+        },
         404: {
             "description": "No existe una cuenta con este correo electrónico",
             "content": {
@@ -149,6 +174,7 @@ async def request_password_reset(
 )
 async def verify_reset_code(
     request: schemas.PasswordResetVerify,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -171,6 +197,7 @@ async def verify_reset_code(
       - Código ya utilizado
       - La nueva contraseña no cumple con los requisitos
     - **404 Not Found**: No existe una cuenta con el correo electrónico proporcionado.
+    - **429 Too Many Requests**: Demasiados intentos para el correo o desde la IP.
     - **500 Internal Server Error**: Error inesperado al procesar la solicitud.
     
     ### Requisitos de la contraseña:
@@ -179,6 +206,8 @@ async def verify_reset_code(
     - Al menos una letra minúscula
     - Al menos un número
     """
+    # Limitar los intentos antes de comparar códigos
+    limitar_verificacion(request.email, ip_cliente(http_request))
     reset_service = PasswordResetService(db)
     
     # Verificar si el código es válido
@@ -196,8 +225,32 @@ async def verify_reset_code(
             detail="Usuario no encontrado"
         )
     
-    # Actualizar la contraseña
-    update_data = {"password": request.new_password}
-    crud_usuarios.update_usuario(db, user.id, update_data)
+    # Actualizar la contraseña (el hash se calcula fuera del event loop)
+    await crud_usuarios.update_password_async(db, user.id, request.new_password)
     
     return {"message": "Contraseña actualizada exitosamente"}
+
+
+@router.post(
+    "/refresh",
+    summary="Renovar tokens de acceso",
+    response_model=schemas.Tokens,
+    responses={401: {"description": "Token de renovación inválido o expirado"}}
+)
+def refresh_tokens(request: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Emite un nuevo par de tokens a partir de un `refresh_token` válido.
+    
+    Es el único punto donde se vuelve a consultar el usuario: si fue desactivado
+    o cambió su rol, el nuevo token lo refleja.
+    """
+    try:
+        claims = verificar_token(request.refresh_token, REFRESH)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    
+    user = crud_usuarios.get_usuario(db, usuario_id=int(claims["sub"]))
+    if not user or user.estado != "activo":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no válido")
+    
+    return crear_tokens(user)
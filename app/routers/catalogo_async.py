@@ -0,0 +1,151 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ..database_async import get_async_db
+from ..models import Plaza, Locale, Menu, Producto, UsuarioDB
+from ..crud import aio as crud_aio
+from ..crud.paginacion import ENCABEZADO_CURSOR, siguiente_cursor
+
+# Endpoints de lectura del catálogo sobre la capa asíncrona (DB_ASYNC=true).
+# Se registran antes que los síncronos y atienden las mismas rutas sin ocupar
+# el threadpool; la documentación OpenAPI sigue siendo la de los síncronos.
+router = APIRouter(include_in_schema=False)
+
+CURSOR = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)")
+
+
+def _con_cursor(response: Response, resultados, limit: int):
+    cursor = siguiente_cursor(resultados, limit, "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
+    return resultados
+
+
+@router.get("/plazas/{plaza_id}", response_model=Plaza)
+async def read_plaza(plaza_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_plaza = await crud_aio.get_plaza(db, plaza_id=plaza_id)
+    if db_plaza is None:
+        raise HTTPException(status_code=404, detail="Plaza no encontrada")
+    return db_plaza
+
+@router.get("/plazas/", response_model=List[Plaza])
+async def read_plazas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = CURSOR,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        plazas = await crud_aio.get_plazas(db, skip=skip, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _con_cursor(response, plazas, limit)
+
+@router.get("/locales/{locale_id}", response_model=Locale)
+async def read_locale(locale_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_locale = await crud_aio.get_locale(db, locale_id=locale_id)
+    if db_locale is None:
+        raise HTTPException(status_code=404, detail="Local no encontrado")
+    return db_locale
+
+@router.get("/locales/", response_model=List[Locale])
+async def read_locales(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    plaza_id: Optional[int] = None,
+    tipo_comercio: Optional[str] = None,
+    id_gerente: Optional[int] = None,
+    after: Optional[str] = CURSOR,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Validar que el tipo de comercio sea válido si se proporciona
+    if tipo_comercio:
+        tipos_validos = ['restaurante', 'cafeteria', 'tienda', 'servicio', 'otro']
+        if tipo_comercio.lower() not in tipos_validos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tipo de comercio no válido. Debe ser uno de: {', '.join(tipos_validos)}"
+            )
+
+    # Validar que el gerente exista si se proporciona
+    if id_gerente is not None:
+        gerente = await db.scalar(select(UsuarioDB.id).where(
+            UsuarioDB.id == id_gerente,
+            UsuarioDB.rol == 'gerente',
+            UsuarioDB.estado == 'activo'
+        ))
+        if not gerente:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El ID de gerente proporcionado no es válido o el usuario no tiene permisos de gerente"
+            )
+
+    try:
+        locales = await crud_aio.get_locales(
+            db,
+            skip=skip,
+            limit=limit,
+            plaza_id=plaza_id,
+            tipo_comercio=tipo_comercio,
+            id_gerente=id_gerente,
+            after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _con_cursor(response, locales, limit)
+
+@router.get("/menus/{menu_id}", response_model=Menu)
+async def read_menu(menu_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_menu = await crud_aio.get_menu(db, menu_id=menu_id)
+    if db_menu is None:
+        raise HTTPException(status_code=404, detail="Menú no encontrado")
+    return db_menu
+
+@router.get("/menus/local/{local_id}", response_model=List[Menu])
+async def read_menus_by_local(
+    local_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = CURSOR,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        menus = await crud_aio.get_menus_by_local(db, local_id=local_id, skip=skip, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _con_cursor(response, menus, limit)
+
+@router.get("/productos/{producto_id}", response_model=Producto)
+async def read_producto(producto_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_producto = await crud_aio.get_producto(db, producto_id=producto_id)
+    if db_producto is None:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    return db_producto
+
+@router.get("/productos/menu/{menu_id}", response_model=List[Producto])
+async def read_productos_by_menu(
+    menu_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    solo_disponibles: bool = True,
+    after: Optional[str] = CURSOR,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        productos = await crud_aio.get_productos_by_menu(
+            db=db,
+            menu_id=menu_id,
+            skip=skip,
+            limit=limit,
+            solo_disponibles=solo_disponibles,
+            after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _con_cursor(response, productos, limit)
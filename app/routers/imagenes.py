@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas import ImagenResponse, TrabajoImagen
+from ..services.imagenes_service import obtener_trabajo
+
+router = APIRouter(prefix="/api/imagenes", tags=["imagenes"])
+
+# Parámetro común de los endpoints de subida
+ASINCRONO = Query(False, description="Procesar la subida en segundo plano y responder 202 con el trabajo")
+
+# Documentación de las respuestas de los endpoints de subida
+RESPUESTAS_SUBIDA = {
+    status.HTTP_202_ACCEPTED: {"model": TrabajoImagen, "description": "Subida aceptada para procesarse en segundo plano"},
+    status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Demasiadas subidas en proceso"},
+}
+
+
+def respuesta_subida(resultado: dict, asincrono: bool):
+    """Respuesta 202 con el trabajo creado, o el resultado de la subida"""
+    if asincrono:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=resultado,
+            headers={"Location": f"{router.prefix}/trabajos/{resultado['id']}"}
+        )
+    return ImagenResponse(url=resultado["url"], public_id=resultado["public_id"])
+
+
+@router.get("/trabajos/{trabajo_id}", response_model=TrabajoImagen)
+def obtener_trabajo_imagen(trabajo_id: str, db: Session = Depends(get_db)):
+    """Consulta el estado de una subida iniciada con `asincrono=true`"""
+    trabajo = obtener_trabajo(db, trabajo_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
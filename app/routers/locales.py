@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
+from datetime import date, timedelta
 from typing import List, Optional
 
-from app.db import get_db
-from app.models import Locale, LocaleCreate, UsuarioDB
+from app.database import get_db
+from app.models import Locale, LocaleCreate, CatalogoLocal, UsuarioDB
 from app.crud.locales import (
     get_locale,
     get_locales,
+    get_catalogo_local,
     create_locale as crud_create_locale,
     update_locale as crud_update_locale,
     delete_locale as crud_delete_locale
 )
 from app.crud import usuarios as crud_usuarios
+from app.crud.estadisticas import get_estadisticas_local
+from app.crud.paginacion import ENCABEZADO_CURSOR, siguiente_cursor
+from app.services.http_cache import respuesta_condicional
+from app.services.token_service import require_roles
+from app.schemas import EstadisticasLocal
+
+# Rango máximo de días que se puede pedir de una vez a las estadísticas
+ESTADISTICAS_MAX_DIAS = 366
 
 router = APIRouter(prefix="", tags=["locales"])
 
@@ -22,13 +32,59 @@ def read_locale(locale_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Local no encontrado")
     return db_locale
 
+@router.get("/{locale_id}/catalogo", response_model=CatalogoLocal)
+def read_catalogo_local(locale_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Devuelve el local con sus menús y los productos disponibles de cada menú en
+    una sola respuesta. Soporta If-None-Match: si el catálogo no cambió responde 304.
+    """
+    catalogo = get_catalogo_local(db, locale_id=locale_id)
+    if catalogo is None:
+        raise HTTPException(status_code=404, detail="Local no encontrado")
+    return respuesta_condicional(request, catalogo)
+
+@router.get(
+    "/{locale_id}/estadisticas",
+    response_model=EstadisticasLocal,
+    dependencies=[Depends(require_roles("gerente", "administrador"))]
+)
+def read_estadisticas_local(
+    locale_id: int,
+    desde: Optional[date] = Query(None, description="Primer día (por defecto, hace 29 días)"),
+    hasta: Optional[date] = Query(None, description="Último día, inclusive (por defecto, hoy)"),
+    limite_productos: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Ventas del local por día (pedidos completados, ingresos, ítems y tiempo de
+    preparación promedio) y sus productos más vendidos. Se leen de los
+    acumulados diarios, así que el costo no depende de la cantidad de pedidos.
+    """
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=29)
+    if desde > hasta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'desde' no puede ser posterior a 'hasta'"
+        )
+    if (hasta - desde).days + 1 > ESTADISTICAS_MAX_DIAS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango no puede superar {ESTADISTICAS_MAX_DIAS} días"
+        )
+    if get_locale(db, locale_id=locale_id) is None:
+        raise HTTPException(status_code=404, detail="Local no encontrado")
+    return get_estadisticas_local(db, locale_id, desde, hasta, limite_productos=limite_productos)
+
 @router.get("/", response_model=List[Locale])
 def read_locales(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     plaza_id: Optional[int] = None,
     tipo_comercio: Optional[str] = None,
     id_gerente: Optional[int] = None,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)"),
     db: Session = Depends(get_db)
 ):
     # Validar que el tipo de comercio sea válido si se proporciona
@@ -53,14 +109,22 @@ def read_locales(
                 detail="El ID de gerente proporcionado no es válido o el usuario no tiene permisos de gerente"
             )
     
-    return get_locales(
-        db, 
-        skip=skip, 
-        limit=limit, 
-        plaza_id=plaza_id,
-        tipo_comercio=tipo_comercio,
-        id_gerente=id_gerente
-    )
+    try:
+        locales = get_locales(
+            db, 
+            skip=skip, 
+            limit=limit, 
+            plaza_id=plaza_id,
+            tipo_comercio=tipo_comercio,
+            id_gerente=id_gerente,
+            after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    cursor = siguiente_cursor(locales, limit, "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
+    return locales
 
 @router.post("/", response_model=Locale, status_code=status.HTTP_201_CREATED)
 def create_new_locale(locale: LocaleCreate, db: Session = Depends(get_db)):
@@ -1,25 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
-import cloudinary
-import cloudinary.uploader
 
-from ..db import get_db
-from ..crud import get_locale, update_locale
+from ..database import get_db
+from ..crud import update_locale
 from ..models import LocaleDB
 from ..schemas import ImagenResponse
-from ..services.cloudinary_service import upload_image, delete_image
+from ..services.cloudinary_service import delete_image_async
+from ..services.imagenes_service import subir_imagen
+from ..services.ingesta_imagenes import recibir_imagen
+from .imagenes import ASINCRONO, RESPUESTAS_SUBIDA, respuesta_subida
 
 router = APIRouter(prefix="/api/locales", tags=["locales"])
 
-@router.post("/{local_id}/imagen", response_model=ImagenResponse)
+@router.post("/{local_id}/imagen", response_model=ImagenResponse, responses=RESPUESTAS_SUBIDA)
 async def subir_imagen_local(
     local_id: int,
     file: UploadFile = File(...),
+    asincrono: bool = ASINCRONO,
     db: Session = Depends(get_db)
 ):
     # Verificar que el local existe
-    db_local = get_locale(db, locale_id=local_id)
+    db_local = db.get(LocaleDB, local_id)
     if not db_local:
         raise HTTPException(status_code=404, detail="Local no encontrado")
     
@@ -28,33 +30,27 @@ async def subir_imagen_local(
         raise HTTPException(status_code=400, detail="Solo se permiten archivos de imagen")
     
     try:
-        # Subir imagen a Cloudinary
-        upload_result = upload_image(
-            await file.read(),
-            folder="foodplaza/locales",
-            public_id=f"local_{local_id}"
-        )
-        
-        # Si ya existe una imagen, eliminarla de Cloudinary
-        if db_local.imagen_public_id:
-            try:
-                delete_image(db_local.imagen_public_id)
-            except Exception as e:
-                print(f"Error al eliminar imagen anterior: {str(e)}")
-        
-        # Actualizar el local con la nueva imagen
-        update_data = {
-            "imagen_url": upload_result["url"],
-            "imagen_public_id": upload_result["public_id"]
-        }
-        update_locale(db, local_id, update_data)
+        # Devolver la conexión al pool: la lectura del archivo y la subida
+        # pueden tardar y la sesión no se vuelve a usar
+        db.close()
+
+        # Copiar el archivo por bloques validando tamaño y tipo real
+        imagen = await recibir_imagen(file)
         
-        return {
-            "url": upload_result["url"],
-            "public_id": upload_result["public_id"],
-            "mensaje": "Imagen subida exitosamente"
-        }
+        # Subir imagen a Cloudinary fuera del event loop y guardar la URL
+        resultado = await subir_imagen(
+            imagen,
+            carpeta="foodplaza/locales",
+            public_id=f"local_{local_id}",
+            actualizar=update_locale,
+            entidad_id=local_id,
+            public_id_anterior=db_local.imagen_public_id,
+            asincrono=asincrono
+        )
+        return respuesta_subida(resultado, asincrono)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error al subir imagen: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error al procesar la imagen: {str(e)}")
@@ -65,7 +61,7 @@ async def eliminar_imagen_local(
     db: Session = Depends(get_db)
 ):
     # Verificar que el local existe
-    db_local = get_locale(db, locale_id=local_id)
+    db_local = db.get(LocaleDB, local_id)
     if not db_local:
         raise HTTPException(status_code=404, detail="Local no encontrado")
     
@@ -74,8 +70,7 @@ async def eliminar_imagen_local(
         raise HTTPException(status_code=404, detail="El local no tiene una imagen asociada")
     
     try:
-        # Eliminar la imagen de Cloudinary
-        delete_image(db_local.imagen_public_id)
+        public_id_anterior = db_local.imagen_public_id
         
         # Actualizar el local
         update_data = {
@@ -84,6 +79,9 @@ async def eliminar_imagen_local(
         }
         update_locale(db, local_id, update_data)
         
+        # Eliminar la imagen de Cloudinary en segundo plano
+        delete_image_async(public_id_anterior)
+        
         return {"mensaje": "Imagen eliminada exitosamente"}
         
     except Exception as e:
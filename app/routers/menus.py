@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.db import get_db
+from app.database import get_db
 from app.models import Menu, MenuCreate
+from app.crud.paginacion import ENCABEZADO_CURSOR, siguiente_cursor
 from app.crud.menus import (
     get_menu,
     get_menus_by_local,
@@ -22,8 +23,22 @@ def read_menu(menu_id: int, db: Session = Depends(get_db)):
     return db_menu
 
 @router.get("/local/{local_id}", response_model=List[Menu])
-def read_menus_by_local(local_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return get_menus_by_local(db, local_id=local_id, skip=skip, limit=limit)
+def read_menus_by_local(
+    local_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)"),
+    db: Session = Depends(get_db)
+):
+    try:
+        menus = get_menus_by_local(db, local_id=local_id, skip=skip, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    cursor = siguiente_cursor(menus, limit, "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
+    return menus
 
 @router.post("/", response_model=Menu, status_code=status.HTTP_201_CREATED)
 def create_menu(menu: MenuCreate, db: Session = Depends(get_db)):
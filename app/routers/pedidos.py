@@ -1,11 +1,24 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import SessionLocal, get_db
 from ..models import PedidoDB, PedidoItemDB, ProductoDB, LocaleDB
-from ..schemas.pedidos import Pedido, PedidoCreate, PedidoUpdate, PedidoItemCreate
+from ..crud import pedidos as crud_pedidos
+from ..crud.pedidos import ConflictoEstado, calcular_items_pedido
+from ..crud.paginacion import ENCABEZADO_CURSOR, siguiente_cursor
+from ..schemas.pedidos import (
+    Pedido, PedidoCreate, PedidoUpdate, PedidoItemCreate, PedidosBulkUpdate, ResultadoPedidoBulk
+)
+from ..schemas.auth import UsuarioToken
+from ..services.token_service import obtener_usuario_opcional
+from ..services import idempotencia
+from ..services.eventos_pedidos import (
+    ACTUALIZADO, CREADO, EVENTOS_HEARTBEAT, SuscripcionDesbordada, bus_pedidos, publicar_pedido
+)
 
 router = APIRouter(
     prefix="/pedidos",
@@ -13,94 +26,100 @@ router = APIRouter(
     responses={404: {"description": "No encontrado"}},
 )
 
+# Estrategia de carga de PedidoDB.items por endpoint ("selectin", "joined" o "subquery").
+# Todas cargan los ítems en un número fijo de consultas sin importar el tamaño de página.
+CARGA_ITEMS = {
+    "get_pedidos": "selectin",
+    "obtener_pedido": "joined",
+    "obtener_pedidos_usuario": "selectin",
+    "obtener_pedidos_local": "selectin",
+}
+
 @router.get("/", response_model=List[Pedido])
 def get_pedidos(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     estado: Optional[str] = None,
     local_id: Optional[int] = None,
-    usuario_id: Optional[int] = None
+    usuario_id: Optional[int] = None,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)")
 ):
     """
     Obtiene una lista de pedidos con opciones de filtrado.
     """
-    query = db.query(PedidoDB)
-    
-    # Aplicar filtros
-    if estado:
-        query = query.filter(PedidoDB.estado_pedido == estado)
-    if local_id:
-        query = query.filter(PedidoDB.id_local == local_id)
-    if usuario_id is not None:
-        query = query.filter(PedidoDB.id_usuario == usuario_id)
-    
-    pedidos = query.offset(skip).limit(limit).all()
+    try:
+        pedidos = crud_pedidos.get_pedidos(
+            db,
+            skip=skip,
+            limit=limit,
+            estado=estado,
+            local_id=local_id,
+            usuario_id=usuario_id,
+            carga=CARGA_ITEMS["get_pedidos"],
+            after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cursor = siguiente_cursor(pedidos, limit, "fecha_pedido", "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
     return pedidos
 
-@router.post("/", response_model=Pedido, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=Pedido,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        401: {"description": "Se envió Idempotency-Key sin token de acceso"},
+        409: {"description": "Otra solicitud con la misma Idempotency-Key está en proceso"}
+    }
+)
 def crear_pedido(
     pedido: PedidoCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    usuario: Optional[UsuarioToken] = Depends(obtener_usuario_opcional),
+    idempotency_key: Optional[str] = Header(
+        None, description="Clave única por pedido; los reintentos con la misma clave devuelven el pedido ya creado"
+    )
 ):
     """
-    Crea un nuevo pedido.
+    Crea un nuevo pedido a nombre del usuario del token de acceso.
+
+    Con `Idempotency-Key`, un reintento de la misma solicitud (p. ej. tras un
+    corte de red) recibe la respuesta original sin crear otro pedido.
     """
-    # Verificar que el local existe
-    db_local = db.query(LocaleDB).filter(LocaleDB.id == pedido.id_local).first()
-    if not db_local:
-        raise HTTPException(status_code=404, detail="Local no encontrado")
-    
-    # Verificar que hay al menos un ítem en el pedido
-    if not pedido.items or len(pedido.items) == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="El pedido debe contener al menos un producto"
-        )
-    
-    # Verificar que los productos existen y están disponibles
-    total_pedido = 0
-    items_pedido = []
+    clave = None
+    if idempotency_key is not None:
+        clave = idempotencia.calcular_clave(idempotency_key, "crear_pedido", usuario.id if usuario else None)
+        repetida = idempotencia.reclamar(db, clave, idempotencia.calcular_huella(pedido.model_dump(mode="json")))
+        if repetida is not None:
+            return repetida
     
     try:
-        # Validar todos los productos
-        for item in pedido.items:
-            # Obtener el producto
-            producto = db.query(ProductoDB).filter(
-                ProductoDB.id == item.id_producto
-            ).first()
-            
-            if not producto:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Producto con ID {item.id_producto} no encontrado"
-                )
-                
-            if not producto.disponible:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"El producto '{producto.nombre}' no está disponible"
-                )
-            
-            # Calcular el total para este ítem
-            total_por_item = float(producto.precio) * item.cantidad
-            total_pedido += total_por_item
-            
-            # Crear el ítem del pedido
-            db_item = PedidoItemDB(
-                id_producto=item.id_producto,
-                cantidad=item.cantidad,
-                precio_unitario=producto.precio,  # Usar el precio actual del producto
-                instrucciones_especiales=item.instrucciones_especiales
+        # Verificar que el local existe
+        db_local = db.query(LocaleDB).filter(LocaleDB.id == pedido.id_local).first()
+        if not db_local:
+            raise HTTPException(status_code=404, detail="Local no encontrado")
+        
+        # Verificar que hay al menos un ítem en el pedido
+        if not pedido.items or len(pedido.items) == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="El pedido debe contener al menos un producto"
             )
-            items_pedido.append(db_item)
+        
+        # Validar todos los productos con una sola consulta y calcular el total
+        items_pedido, total_pedido = calcular_items_pedido(db, pedido.items, bloquear=True)
         
         # Calcular tiempo estimado de preparación
         tiempo_estimado = 30 + (5 * len(items_pedido))
         
-        # Crear el pedido (usando un ID de usuario fijo para pruebas)
+        # Crear el pedido para el usuario del token (sin token se mantiene el
+        # usuario fijo de pruebas hasta que los clientes envíen Authorization)
         db_pedido = PedidoDB(
-            id_usuario=1,  # TODO: Reemplazar con el ID del usuario autenticado
+            id_usuario=usuario.id if usuario else 1,
             id_local=pedido.id_local,
             total_pedido=total_pedido,
             instrucciones_especiales=pedido.instrucciones_especiales,
@@ -110,20 +129,35 @@ def crear_pedido(
         )
         
         db.add(db_pedido)
-        db.commit()
+        db.flush()
         db.refresh(db_pedido)
+        respuesta = Pedido.model_validate(db_pedido).model_dump(mode="json")
+        # El pedido y la respuesta guardada para la clave se confirman juntos
+        if clave is not None:
+            idempotencia.completar(db, clave, status.HTTP_201_CREATED, respuesta)
+        db.commit()
+        
+        # Avisar a las pantallas de cocina del local
+        publicar_pedido(CREADO, respuesta)
         
-        return db_pedido
+        return respuesta
         
-    except HTTPException:
+    except ValueError as e:
         db.rollback()
-        raise
+        error = HTTPException(status_code=400, detail=str(e))
+    except HTTPException as e:
+        db.rollback()
+        error = e
     except Exception as e:
         db.rollback()
-        raise HTTPException(
+        error = HTTPException(
             status_code=500,
             detail=f"Error al procesar el pedido: {str(e)}"
         )
+    # Sin pedido creado la clave se libera para que el cliente pueda reintentar
+    if clave is not None:
+        idempotencia.liberar(db, clave)
+    raise error
 
 @router.get("/{pedido_id}", response_model=Pedido)
 def obtener_pedido(
@@ -133,7 +167,7 @@ def obtener_pedido(
     """
     Obtiene un pedido por su ID.
     """
-    pedido = db.query(PedidoDB).filter(PedidoDB.id == pedido_id).first()
+    pedido = crud_pedidos.get_pedido(db, pedido_id, carga=CARGA_ITEMS["obtener_pedido"])
     
     if not pedido:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
@@ -142,63 +176,106 @@ def obtener_pedido(
     
     return pedido
 
-@router.patch("/{pedido_id}", response_model=Pedido)
+# Debe declararse antes de /{pedido_id} para que "bulk" no se tome como ID
+@router.patch("/bulk", response_model=List[ResultadoPedidoBulk])
+def actualizar_pedidos_bulk(
+    cambios: PedidosBulkUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Cambia el estado de varios pedidos en una sola solicitud y transacción
+    (p. ej. la cocina marca muchos tickets como listos a la vez). Aplica las
+    mismas transiciones que `PATCH /{pedido_id}` y devuelve un resultado por
+    pedido: actualizado, conflicto, no_encontrado o invalido.
+    """
+    # TODO: Agregar lógica de autenticación y autorización
+    
+    resultados, pedidos = crud_pedidos.actualizar_estados_pedidos(db, cambios.pedidos)
+    
+    anteriores = {r["id"]: r.get("estado_anterior") for r in resultados}
+    for db_pedido in pedidos:
+        evento = Pedido.model_validate(db_pedido).model_dump(mode="json")
+        publicar_pedido(ACTUALIZADO, {**evento, "estado_anterior": anteriores.get(db_pedido.id)})
+    
+    return resultados
+
+@router.patch("/{pedido_id}", response_model=Pedido, responses={409: {"description": "Transición de estado no permitida desde el estado actual"}})
 def actualizar_pedido(
     pedido_id: int,
     pedido_update: PedidoUpdate,
     db: Session = Depends(get_db)
 ):
     """
-    Actualiza el estado de un pedido existente.
+    Actualiza un pedido existente. El estado solo avanza según
+    crud.pedidos.TRANSICIONES (pendiente → en_preparacion → listo_para_recoger
+    → completado, o cancelado desde cualquiera no final); si otro cambio llegó
+    antes y la transición ya no es válida se responde 409.
     """
-    db_pedido = db.query(PedidoDB).filter(PedidoDB.id == pedido_id).first()
+    # TODO: Agregar lógica de autenticación y autorización
+    
+    try:
+        db_pedido, estado_anterior = crud_pedidos.actualizar_pedido(
+            db,
+            pedido_id,
+            estado_pedido=pedido_update.estado_pedido,
+            estado_esperado=pedido_update.estado_esperado,
+            instrucciones_especiales=pedido_update.instrucciones_especiales,
+            tiempo_preparacion_estimado=pedido_update.tiempo_preparacion_estimado
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ConflictoEstado as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     
     if not db_pedido:
         raise HTTPException(status_code=404, detail="Pedido no encontrado")
     
-    # TODO: Agregar lógica de autenticación y autorización
-    
-    # Actualizar campos
-    if pedido_update.estado_pedido:
-        db_pedido.estado_pedido = pedido_update.estado_pedido
-    if pedido_update.instrucciones_especiales is not None:
-        db_pedido.instrucciones_especiales = pedido_update.instrucciones_especiales
-    if pedido_update.tiempo_preparacion_estimado is not None:
-        db_pedido.tiempo_preparacion_estimado = pedido_update.tiempo_preparacion_estimado
-    
-    db.commit()
-    db.refresh(db_pedido)
+    evento = Pedido.model_validate(db_pedido).model_dump(mode="json")
+    publicar_pedido(ACTUALIZADO, {**evento, "estado_anterior": estado_anterior})
     
     return db_pedido
 
 @router.get("/usuario/{usuario_id}", response_model=List[Pedido])
 def obtener_pedidos_usuario(
     usuario_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
-    estado: Optional[str] = None
+    estado: Optional[str] = None,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)")
 ):
     """
     Obtiene los pedidos de un usuario específico.
     """
     # TODO: Agregar verificación de autenticación
     
-    query = db.query(PedidoDB).filter(PedidoDB.id_usuario == usuario_id)
-    
-    if estado:
-        query = query.filter(PedidoDB.estado_pedido == estado)
-    
-    pedidos = query.offset(skip).limit(limit).all()
+    try:
+        pedidos = crud_pedidos.get_pedidos(
+            db,
+            skip=skip,
+            limit=limit,
+            estado=estado,
+            usuario_id=usuario_id,
+            carga=CARGA_ITEMS["obtener_pedidos_usuario"],
+            after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cursor = siguiente_cursor(pedidos, limit, "fecha_pedido", "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
     return pedidos
 
 @router.get("/local/{local_id}", response_model=List[Pedido])
 def obtener_pedidos_local(
     local_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
-    estado: Optional[str] = None
+    estado: Optional[str] = None,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)")
 ):
     """
     Obtiene los pedidos de un local específico.
@@ -210,10 +287,71 @@ def obtener_pedidos_local(
     
     # TODO: Agregar verificación de autorización
     
-    query = db.query(PedidoDB).filter(PedidoDB.id_local == local_id)
+    try:
+        pedidos = crud_pedidos.get_pedidos(
+            db,
+            skip=skip,
+            limit=limit,
+            estado=estado,
+            local_id=local_id,
+            carga=CARGA_ITEMS["obtener_pedidos_local"],
+            after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cursor = siguiente_cursor(pedidos, limit, "fecha_pedido", "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
+    return pedidos
+
+
+def _existe_local(local_id: int) -> bool:
+    # Sesión propia y breve: con Depends(get_db) la conexión quedaría tomada
+    # mientras dure el stream
+    with SessionLocal() as db:
+        return db.query(LocaleDB.id).filter(LocaleDB.id == local_id).first() is not None
+
+@router.get(
+    "/local/{local_id}/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Stream de eventos (SSE)"}},
+)
+async def stream_pedidos_local(
+    local_id: int,
+    last_event_id: Optional[str] = Header(None),
+    desde: Optional[str] = Query(None, alias="last_event_id", description="Alternativa al encabezado Last-Event-ID")
+):
+    """
+    Stream de eventos (Server-Sent Events) con los pedidos nuevos
+    (`pedido_creado`) y sus cambios (`pedido_actualizado`) de un local.
+
+    Al reconectar, el navegador envía `Last-Event-ID` y se reenvían los eventos
+    perdidos; si ya no están en el historial se envía `reinicio` y el cliente
+    debe volver a consultar `GET /api/pedidos/local/{local_id}`.
+    """
+    if not await run_in_threadpool(_existe_local, local_id):
+        raise HTTPException(status_code=404, detail="Local no encontrado")
     
-    if estado:
-        query = query.filter(PedidoDB.estado_pedido == estado)
+    # TODO: Agregar verificación de autorización
     
-    pedidos = query.offset(skip).limit(limit).all()
-    return pedidos
+    suscripcion = await bus_pedidos.suscribir(local_id, last_event_id or desde)
+
+    async def eventos():
+        try:
+            yield "retry: 3000\n\n"
+            # StreamingResponse cancela el generador cuando el cliente se desconecta
+            while True:
+                evento = await suscripcion.siguiente(EVENTOS_HEARTBEAT)
+                # Comentario periódico para que proxies y balanceadores no corten la conexión
+                yield evento.sse() if evento is not None else ": ping\n\n"
+        except SuscripcionDesbordada:
+            # El cliente reconecta con Last-Event-ID y recupera lo pendiente del historial
+            pass
+        finally:
+            await suscripcion.cerrar()
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.db import get_db
+from app.database import get_db
 from app.models import Plaza, PlazaCreate
+from app.crud.paginacion import ENCABEZADO_CURSOR, siguiente_cursor
 from app.crud.plazas import (
     get_plaza,
     get_plazas,
@@ -22,8 +23,21 @@ def read_plaza(plaza_id: int, db: Session = Depends(get_db)):
     return db_plaza
 
 @router.get("/", response_model=List[Plaza])
-def read_plazas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return get_plazas(db, skip=skip, limit=limit)
+def read_plazas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)"),
+    db: Session = Depends(get_db)
+):
+    try:
+        plazas = get_plazas(db, skip=skip, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    cursor = siguiente_cursor(plazas, limit, "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
+    return plazas
 
 @router.post("/", response_model=Plaza, status_code=status.HTTP_201_CREATED)
 def create_new_plaza(plaza: PlazaCreate, db: Session = Depends(get_db)):
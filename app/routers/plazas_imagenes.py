@@ -1,25 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
-import cloudinary
-import cloudinary.uploader
 
-from ..db import get_db
-from ..crud import get_plaza, update_plaza
+from ..database import get_db
+from ..crud import update_plaza
 from ..models import PlazaDB
 from ..schemas import ImagenResponse
-from ..services.cloudinary_service import upload_image, delete_image
+from ..services.cloudinary_service import delete_image_async
+from ..services.imagenes_service import subir_imagen
+from ..services.ingesta_imagenes import recibir_imagen
+from .imagenes import ASINCRONO, RESPUESTAS_SUBIDA, respuesta_subida
 
 router = APIRouter(prefix="/api/plazas", tags=["plazas"])
 
-@router.post("/{plaza_id}/imagen", response_model=ImagenResponse)
+@router.post("/{plaza_id}/imagen", response_model=ImagenResponse, responses=RESPUESTAS_SUBIDA)
 async def subir_imagen_plaza(
     plaza_id: int,
     file: UploadFile = File(...),
+    asincrono: bool = ASINCRONO,
     db: Session = Depends(get_db)
 ):
     # Verificar que la plaza existe
-    db_plaza = get_plaza(db, plaza_id=plaza_id)
+    db_plaza = db.get(PlazaDB, plaza_id)
     if not db_plaza:
         raise HTTPException(status_code=404, detail="Plaza no encontrada")
     
@@ -28,33 +30,27 @@ async def subir_imagen_plaza(
         raise HTTPException(status_code=400, detail="Solo se permiten archivos de imagen")
     
     try:
-        # Subir imagen a Cloudinary
-        upload_result = upload_image(
-            await file.read(),
-            folder="foodplaza/plazas",
-            public_id=f"plaza_{plaza_id}"
-        )
-        
-        # Si ya existe una imagen, eliminarla de Cloudinary
-        if db_plaza.imagen_public_id:
-            try:
-                delete_image(db_plaza.imagen_public_id)
-            except Exception as e:
-                print(f"Error al eliminar imagen anterior: {str(e)}")
-        
-        # Actualizar la plaza con la nueva imagen
-        update_data = {
-            "imagen_url": upload_result["url"],
-            "imagen_public_id": upload_result["public_id"]
-        }
-        update_plaza(db, plaza_id, update_data)
+        # Devolver la conexión al pool: la lectura del archivo y la subida
+        # pueden tardar y la sesión no se vuelve a usar
+        db.close()
+
+        # Copiar el archivo por bloques validando tamaño y tipo real
+        imagen = await recibir_imagen(file)
         
-        return {
-            "url": upload_result["url"],
-            "public_id": upload_result["public_id"],
-            "mensaje": "Imagen subida exitosamente"
-        }
+        # Subir imagen a Cloudinary fuera del event loop y guardar la URL
+        resultado = await subir_imagen(
+            imagen,
+            carpeta="foodplaza/plazas",
+            public_id=f"plaza_{plaza_id}",
+            actualizar=update_plaza,
+            entidad_id=plaza_id,
+            public_id_anterior=db_plaza.imagen_public_id,
+            asincrono=asincrono
+        )
+        return respuesta_subida(resultado, asincrono)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error al subir imagen: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error al procesar la imagen: {str(e)}")
@@ -65,7 +61,7 @@ async def eliminar_imagen_plaza(
     db: Session = Depends(get_db)
 ):
     # Verificar que la plaza existe
-    db_plaza = get_plaza(db, plaza_id=plaza_id)
+    db_plaza = db.get(PlazaDB, plaza_id)
     if not db_plaza:
         raise HTTPException(status_code=404, detail="Plaza no encontrada")
     
@@ -74,8 +70,7 @@ async def eliminar_imagen_plaza(
         raise HTTPException(status_code=404, detail="La plaza no tiene una imagen asociada")
     
     try:
-        # Eliminar la imagen de Cloudinary
-        delete_image(db_plaza.imagen_public_id)
+        public_id_anterior = db_plaza.imagen_public_id
         
         # Actualizar la plaza
         update_data = {
@@ -84,6 +79,9 @@ async def eliminar_imagen_plaza(
         }
         update_plaza(db, plaza_id, update_data)
         
+        # Eliminar la imagen de Cloudinary en segundo plano
+        delete_image_async(public_id_anterior)
+        
         return {"mensaje": "Imagen eliminada exitosamente"}
         
     except Exception as e:
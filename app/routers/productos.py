@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.db import get_db
+from app.database import get_db
 from app.models import Producto, ProductoCreate, ProductoUpdate
+from app.crud.paginacion import ENCABEZADO_CURSOR, siguiente_cursor
 from app.crud.productos import (
     get_producto,
     get_productos_by_menu,
@@ -24,18 +25,28 @@ def read_producto(producto_id: int, db: Session = Depends(get_db)):
 @router.get("/menu/{menu_id}", response_model=List[Producto])
 def read_productos_by_menu(
     menu_id: int, 
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     solo_disponibles: bool = True,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)"),
     db: Session = Depends(get_db)
 ):
-    return get_productos_by_menu(
-        db=db, 
-        menu_id=menu_id, 
-        skip=skip, 
-        limit=limit, 
-        solo_disponibles=solo_disponibles
-    )
+    try:
+        productos = get_productos_by_menu(
+            db=db, 
+            menu_id=menu_id, 
+            skip=skip, 
+            limit=limit, 
+            solo_disponibles=solo_disponibles,
+            after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    cursor = siguiente_cursor(productos, limit, "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
+    return productos
 
 @router.post("/", response_model=Producto, status_code=status.HTTP_201_CREATED)
 def create_producto(producto: ProductoCreate, db: Session = Depends(get_db)):
@@ -57,18 +68,15 @@ def update_producto(
             detail="No se proporcionaron datos para actualizar"
         )
     
-    # Check if the product exists
-    db_producto = get_producto(db, producto_id=producto_id)
-    if db_producto is None:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    
-    # Update the product
+    # Update the product (reads it fresh from the database, not from the cache)
     updated_product = crud_update_producto(
-        db, 
-        producto_id=producto_id, 
+        db,
+        producto_id=producto_id,
         producto_data=update_data
     )
-    
+    if updated_product is None:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+
     return updated_product
 
 @router.delete("/{producto_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 import os
 
 from .. import models, schemas
-from ..db import get_db
+from ..database import get_db
 from ..crud import usuarios as crud_usuarios
+from ..crud.paginacion import ENCABEZADO_CURSOR, siguiente_cursor
 from email_validator import validate_email, EmailNotValidError
-from ..services.cloudinary_service import upload_image, delete_image
+from ..services.imagenes_service import subir_imagen
+from ..services.ingesta_imagenes import recibir_imagen
+from ..services.token_service import crear_tokens
+from .imagenes import ASINCRONO, RESPUESTAS_SUBIDA, respuesta_subida
 
 router = APIRouter()
 
@@ -24,11 +28,8 @@ async def buscar_usuario_por_email(
     """
     print(f"[DEBUG] Búsqueda de usuario con email: {email}")
     
-    # Buscar usuario en la base de datos (case-insensitive)
-    print("[DEBUG] Buscando usuario en la base de datos...")
-    db_usuario = db.query(models.UsuarioDB).filter(
-        func.lower(models.UsuarioDB.email) == func.lower(email.strip())
-    ).first()
+    # Los emails se guardan normalizados: una sola consulta sobre el índice
+    db_usuario = crud_usuarios.get_usuario_by_email(db, email=email)
     
     if not db_usuario:
         print(f"[DEBUG] Usuario con email '{email}' no encontrado")
@@ -53,9 +54,11 @@ def crear_usuario(usuario: models.UsuarioCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[models.Usuario])
 def leer_usuarios(
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
     estado: str = None,
+    after: Optional[str] = Query(None, description="Cursor de la página anterior (encabezado X-Next-Cursor)"),
     db: Session = Depends(get_db)
 ):
     """Obtiene la lista de usuarios con paginación"""
@@ -64,7 +67,14 @@ def leer_usuarios(
             status_code=400,
             detail="El estado debe ser 'activo' o 'inactivo'"
         )
-    return crud_usuarios.get_usuarios(db, skip=skip, limit=limit, estado=estado)
+    try:
+        usuarios = crud_usuarios.get_usuarios(db, skip=skip, limit=limit, estado=estado, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cursor = siguiente_cursor(usuarios, limit, "id")
+    if cursor:
+        response.headers[ENCABEZADO_CURSOR] = cursor
+    return usuarios
 
 @router.get("/{usuario_id}", response_model=models.Usuario)
 def leer_usuario(usuario_id: int, db: Session = Depends(get_db)):
@@ -93,10 +103,11 @@ def eliminar_usuario(usuario_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return None
 
-@router.post("/{usuario_id}/imagen", response_model=schemas.ImagenResponse)
+@router.post("/{usuario_id}/imagen", response_model=schemas.ImagenResponse, responses=RESPUESTAS_SUBIDA)
 async def subir_imagen_perfil(
     usuario_id: int,
     file: UploadFile = File(...),
+    asincrono: bool = ASINCRONO,
     db: Session = Depends(get_db)
 ):
     """
@@ -104,6 +115,7 @@ async def subir_imagen_perfil(
     
     - **usuario_id**: ID del usuario
     - **file**: Archivo de imagen a subir (jpg, jpeg, png, webp)
+    - **asincrono**: Si es true, responde 202 y la subida continúa en segundo plano
     """
     # Verificar que el usuario existe
     db_usuario = crud_usuarios.get_usuario(db, usuario_id=usuario_id)
@@ -119,30 +131,27 @@ async def subir_imagen_perfil(
         )
     
     try:
-        # Leer el contenido del archivo
-        file_content = await file.read()
+        # Devolver la conexión al pool: la lectura del archivo y la subida
+        # pueden tardar y la sesión no se vuelve a usar
+        db.close()
+
+        # Copiar el archivo por bloques validando tamaño y tipo real
+        imagen = await recibir_imagen(file, permitidos=allowed_types)
         
-        # Subir a Cloudinary
-        upload_result = upload_image(
-            file_content,
-            folder="usuarios",
-            public_id=f"user_{usuario_id}"
+        # Subir a Cloudinary fuera del event loop y guardar la URL
+        resultado = await subir_imagen(
+            imagen,
+            carpeta="usuarios",
+            public_id=f"user_{usuario_id}",
+            actualizar=crud_usuarios.update_usuario,
+            entidad_id=usuario_id,
+            public_id_anterior=db_usuario.imagen_public_id,
+            asincrono=asincrono
         )
+        return respuesta_subida(resultado, asincrono)
         
-        # Actualizar usuario con la nueva imagen
-        if db_usuario.imagen_public_id:
-            delete_image(db_usuario.imagen_public_id)
-        
-        db_usuario.imagen_url = upload_result["url"]
-        db_usuario.imagen_public_id = upload_result["public_id"]
-        db.commit()
-        db.refresh(db_usuario)
-        
-        return {
-            "url": upload_result["url"],
-            "public_id": upload_result["public_id"]
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -151,9 +160,12 @@ async def subir_imagen_perfil(
 
 @router.post("/login", response_model=dict)
 async def login(credenciales: models.UsuarioLogin, db: Session = Depends(get_db)):
-    """Inicia sesión con email y contraseña"""
+    """
+    Inicia sesión con email y contraseña.
+    Devuelve los datos del usuario junto con `access_token` y `refresh_token`.
+    """
     try:
-        usuario = crud_usuarios.authenticate_user(
+        usuario = await crud_usuarios.authenticate_user_async(
             db, 
             email=credenciales.email, 
             password=credenciales.password
@@ -163,8 +175,14 @@ async def login(credenciales: models.UsuarioLogin, db: Session = Depends(get_db)
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas"
             )
+        # Igual que al renovar: un usuario dado de baja no recibe tokens
+        if usuario.estado != "activo":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="El usuario está inactivo"
+            )
         
-        # Respuesta simple sin JWT
+        # Datos del usuario y tokens JWT (id y rol viajan en los claims)
         return {
             "mensaje": "Inicio de sesión exitoso",
             "usuario": {
@@ -173,8 +191,11 @@ async def login(credenciales: models.UsuarioLogin, db: Session = Depends(get_db)
                 "email": usuario.email,
                 "rol": usuario.rol,
                 "estado": usuario.estado
-            }
+            },
+            **crear_tokens(usuario)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
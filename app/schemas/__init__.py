@@ -1,6 +1,8 @@
 from .plazas import Plaza, PlazaCreate
 from .locales import Locale, LocaleCreate
-from .imagen import ImagenResponse
+from .imagen import ImagenResponse, TrabajoImagen
+from .auth import Tokens, RefreshRequest, UsuarioToken
+from .estadisticas import EstadisticasLocal, ResumenVentas, VentaDiaria, VentaProducto
 from .password_reset import PasswordResetRequest, PasswordResetVerify, ResetCodeInDB, PasswordResetResponse
 from .pedidos import (
     Pedido, 
@@ -10,5 +12,8 @@ from .pedidos import (
     PedidoItemCreate,
     PedidoItemUpdate,
     PedidoBase,
-    PedidoItemBase
+    PedidoItemBase,
+    PedidoEstadoBulk,
+    PedidosBulkUpdate,
+    ResultadoPedidoBulk
 )
\ No newline at end of file
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+class Tokens(BaseModel):
+    """Par de tokens JWT emitido al iniciar sesión o al renovar"""
+    access_token: str = Field(..., description="Token de acceso (encabezado Authorization: Bearer)")
+    refresh_token: str = Field(..., description="Token para obtener un nuevo token de acceso")
+    token_type: str = "bearer"
+    expires_in: int = Field(..., description="Segundos de validez del token de acceso")
+
+class RefreshRequest(BaseModel):
+    """Esquema para renovar los tokens"""
+    refresh_token: str = Field(..., description="Token de renovación recibido al iniciar sesión")
+
+class UsuarioToken(BaseModel):
+    """Usuario autenticado según los claims del token de acceso"""
+    id: int
+    rol: str
@@ -0,0 +1,27 @@
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel
+
+class ResumenVentas(BaseModel):
+    pedidos: int
+    ingresos: Decimal
+    items: int
+    tiempo_preparacion_promedio: Optional[float] = None
+
+class VentaDiaria(ResumenVentas):
+    fecha: date
+
+class VentaProducto(BaseModel):
+    id_producto: int
+    nombre: Optional[str] = None  # None si el producto ya no existe
+    cantidad: int
+    ingresos: Decimal
+
+class EstadisticasLocal(BaseModel):
+    id_local: int
+    desde: date
+    hasta: date
+    totales: ResumenVentas
+    dias: List[VentaDiaria]
+    productos: List[VentaProducto]
@@ -1,7 +1,16 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class ImagenResponse(BaseModel):
     """Esquema de respuesta para la subida de imágenes"""
     url: str
     public_id: str
     mensaje: str = "Imagen subida exitosamente"
+
+class TrabajoImagen(BaseModel):
+    """Estado de una subida de imagen en segundo plano"""
+    id: str
+    estado: str  # 'pendiente', 'procesando', 'completado' o 'error'
+    url: Optional[str] = None
+    public_id: Optional[str] = None
+    error: Optional[str] = None
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..database import get_db
 from ..crud import get_locale, get_locales, create_locale, update_locale, delete_locale
 from ..models import Locale, LocaleCreate
 
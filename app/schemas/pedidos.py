@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, condecimal
 
 class PedidoItemBase(BaseModel):
@@ -31,9 +31,26 @@ class PedidoCreate(PedidoBase):
 
 class PedidoUpdate(BaseModel):
     estado_pedido: Optional[str] = None
+    # Control de concurrencia opcional: el cambio solo se aplica si el pedido sigue en este estado
+    estado_esperado: Optional[str] = None
     instrucciones_especiales: Optional[str] = None
     tiempo_preparacion_estimado: Optional[int] = None
 
+class PedidoEstadoBulk(BaseModel):
+    id: int
+    estado_pedido: str
+    estado_esperado: Optional[str] = None
+
+class PedidosBulkUpdate(BaseModel):
+    pedidos: List[PedidoEstadoBulk] = Field(..., min_length=1, max_length=500)
+
+class ResultadoPedidoBulk(BaseModel):
+    id: int
+    resultado: Literal["actualizado", "conflicto", "no_encontrado", "invalido"]
+    estado_pedido: Optional[str] = None
+    estado_anterior: Optional[str] = None
+    detalle: Optional[str] = None
+
 class Pedido(PedidoBase):
     id: int
     id_usuario: int
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..database import get_db
 from ..crud import get_plaza, get_plazas, create_plaza, update_plaza, delete_plaza
 from ..models import PlazaBase, Plaza, PlazaCreate
 
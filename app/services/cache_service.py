@@ -0,0 +1,221 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Espacios de nombres del catálogo y los que dependen de ellos (borrado en cascada)
+DEPENDENCIAS = {
+    "plazas": ("locales",),
+    "locales": ("menus",),
+    "menus": ("productos",),
+}
+
+NO_ENCONTRADO = object()
+
+
+class MemoryBackend:
+    """Backend en memoria del proceso con expiración por TTL y desalojo LRU"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._datos = OrderedDict()
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def get(self, clave: str):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return NO_ENCONTRADO
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return NO_ENCONTRADO
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave: str, valor, ttl: int):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entries:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave: str):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def version(self, nombre: str) -> int:
+        # Los contadores de versión no se desalojan por LRU
+        return self._versiones.get(nombre, 0)
+
+    def incrementar_version(self, nombre: str) -> int:
+        with self._lock:
+            self._versiones[nombre] = self._versiones.get(nombre, 0) + 1
+            return self._versiones[nombre]
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class RedisBackend:
+    """Backend compartido entre workers (requiere el paquete `redis`)"""
+
+    def __init__(self, url: str, prefijo: str = "foodplaza:cache:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requiere instalar el paquete 'redis'")
+        self.cliente = redis.Redis.from_url(url)
+        self.prefijo = prefijo
+
+    def get(self, clave: str):
+        valor = self.cliente.get(self.prefijo + clave)
+        return NO_ENCONTRADO if valor is None else pickle.loads(valor)
+
+    def set(self, clave: str, valor, ttl: int):
+        self.cliente.set(self.prefijo + clave, pickle.dumps(valor), ex=ttl)
+
+    def delete(self, clave: str):
+        self.cliente.delete(self.prefijo + clave)
+
+    def version(self, nombre: str) -> int:
+        return int(self.cliente.get(f"{self.prefijo}version:{nombre}") or 0)
+
+    def incrementar_version(self, nombre: str) -> int:
+        return self.cliente.incr(f"{self.prefijo}version:{nombre}")
+
+    def limpiar(self):
+        for clave in self.cliente.scan_iter(f"{self.prefijo}*"):
+            self.cliente.delete(clave)
+
+    def __len__(self):
+        return sum(1 for _ in self.cliente.scan_iter(f"{self.prefijo}*"))
+
+
+class CacheCatalogo:
+    """
+    Caché de lectura (read-through) para el catálogo plaza → local → menú → producto.
+
+    Las claves incluyen un contador de versión por espacio de nombres; invalidar
+    un espacio solo incrementa su contador, lo que funciona igual con el backend
+    en memoria y con uno compartido.
+    """
+
+    def __init__(self, backend, ttl: int = 60, habilitado: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.habilitado = habilitado
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_entorno(cls):
+        habilitado = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "si", "yes")
+        ttl = int(os.getenv("CACHE_TTL_SECONDS", 60))
+        if os.getenv("CACHE_BACKEND", "memoria") == "redis":
+            backend = RedisBackend(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        else:
+            backend = MemoryBackend(int(os.getenv("CACHE_MAX_ENTRIES", 2048)))
+        return cls(backend, ttl=ttl, habilitado=habilitado)
+
+    def _contar(self, espacio: str, resultado: str):
+        with self._lock:
+            contadores = self._contadores.setdefault(espacio, {"hits": 0, "misses": 0})
+            contadores[resultado] += 1
+
+    def version(self, espacio: str) -> int:
+        return self.backend.version(espacio)
+
+    def clave(self, espacio: str, partes: Iterable) -> str:
+        return f"{espacio}:v{self.version(espacio)}:" + ":".join(str(p) for p in partes)
+
+    def buscar(self, espacio: str, clave: str):
+        """Devuelve el valor guardado en `clave` o NO_ENCONTRADO, registrando el hit/miss"""
+        if not self.habilitado:
+            return NO_ENCONTRADO
+        valor = self.backend.get(clave)
+        self._contar(espacio, "misses" if valor is NO_ENCONTRADO else "hits")
+        return valor
+
+    def guardar(self, clave: str, valor):
+        """
+        Guarda bajo la misma `clave` que se usó al buscar: si una escritura
+        invalida el espacio mientras se leía, lo leído queda con la versión
+        anterior y no se sirve después.
+        """
+        if self.habilitado:
+            self.backend.set(clave, valor, self.ttl)
+
+    def invalidar(self, espacio: str, cascada: bool = False):
+        """Invalida un espacio de nombres (y sus dependientes si `cascada`)"""
+        self.backend.incrementar_version(espacio)
+        if cascada:
+            for dependiente in DEPENDENCIAS.get(espacio, ()):
+                self.invalidar(dependiente, cascada=True)
+
+    def limpiar(self):
+        self.backend.limpiar()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            por_espacio = {
+                espacio: dict(valores, ratio=round(valores["hits"] / max(1, valores["hits"] + valores["misses"]), 3))
+                for espacio, valores in self._contadores.items()
+            }
+        return {
+            "habilitado": self.habilitado,
+            "backend": type(self.backend).__name__,
+            "ttl": self.ttl,
+            "entradas": len(self.backend),
+            "espacios": por_espacio,
+        }
+
+
+# Instancia global de la caché del catálogo
+cache_catalogo = CacheCatalogo.desde_entorno()
+
+
+def serializar_respuesta(esquema, resultado):
+    """Convierte entidades SQLAlchemy (o listas de ellas) en el diccionario del esquema de respuesta"""
+    if resultado is None:
+        return None
+    if isinstance(resultado, (list, tuple)):
+        return [serializar_respuesta(esquema, r) for r in resultado]
+    return esquema.model_validate(resultado).model_dump(mode="json")
+
+
+def cachear(espacio: str, esquema, partes: Iterable, cargar: Callable[[], Any]):
+    """
+    Lectura a través de la caché para funciones CRUD síncronas. Guarda y
+    devuelve la forma de respuesta (`esquema` serializado), nunca entidades: el
+    resultado no pertenece a ninguna sesión y es de solo lectura. Las rutas que
+    modifican o borran leen la entidad de la base de datos con db.get. La
+    clave (con la versión del espacio) se calcula una vez, antes de `cargar`.
+    """
+    clave = cache_catalogo.clave(espacio, partes)
+    datos = cache_catalogo.buscar(espacio, clave)
+    if datos is NO_ENCONTRADO:
+        datos = serializar_respuesta(esquema, cargar())
+        cache_catalogo.guardar(clave, datos)
+    return datos
+
+
+async def cachear_async(espacio: str, esquema, partes: Iterable, cargar: Callable[[], Any]):
+    """Variante de `cachear` para funciones CRUD asíncronas (`cargar` devuelve una corrutina)"""
+    clave = cache_catalogo.clave(espacio, partes)
+    datos = cache_catalogo.buscar(espacio, clave)
+    if datos is NO_ENCONTRADO:
+        datos = serializar_respuesta(esquema, await cargar())
+        cache_catalogo.guardar(clave, datos)
+    return datos
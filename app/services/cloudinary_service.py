@@ -1,20 +1,32 @@
+import asyncio
 import cloudinary
 import cloudinary.uploader
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from fastapi import HTTPException, status
 import os
 from dotenv import load_dotenv
+from .metricas import medir_externo
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Configuración de Cloudinary
+# Configuración de Cloudinary. CLOUDINARY_UPLOAD_PREFIX permite apuntar la API
+# a un servidor local que imite a Cloudinary (pruebas sin cuenta real).
 cloudinary.config(
     cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
     api_key=os.getenv("CLOUDINARY_API_KEY"),
     api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+    upload_prefix=os.getenv("CLOUDINARY_UPLOAD_PREFIX") or None,
     secure=True
 )
 
+# Las llamadas a Cloudinary son HTTP bloqueantes: se ejecutan en un pool de
+# hilos propio y acotado para no detener el event loop ni agotar el threadpool
+# que usan los endpoints síncronos.
+CLOUDINARY_MAX_WORKERS = int(os.getenv("CLOUDINARY_MAX_WORKERS", 4))
+ejecutor_cloudinary = ThreadPoolExecutor(max_workers=CLOUDINARY_MAX_WORKERS, thread_name_prefix="cloudinary")
+
 def upload_image(file, folder: str, public_id: str = None):
     """
     Sube una imagen a Cloudinary
@@ -28,12 +40,13 @@ def upload_image(file, folder: str, public_id: str = None):
         dict: Diccionario con 'url' y 'public_id' de la imagen
     """
     try:
-        upload_result = cloudinary.uploader.upload(
-            file,
-            folder=f"foodplaza/{folder}",
-            public_id=public_id,
-            resource_type="auto"
-        )
+        with medir_externo("cloudinary", "subir"):
+            upload_result = cloudinary.uploader.upload(
+                file,
+                folder=f"foodplaza/{folder}",
+                public_id=public_id,
+                resource_type="auto"
+            )
         
         return {
             "url": upload_result.get('secure_url'),
@@ -55,11 +68,24 @@ def delete_image(public_id: str):
     """
     try:
         if public_id:
-            cloudinary.uploader.destroy(public_id)
+            with medir_externo("cloudinary", "eliminar"):
+                cloudinary.uploader.destroy(public_id)
     except Exception as e:
         # No lanzamos excepción para no afectar el flujo principal
         print(f"Error al eliminar imagen de Cloudinary: {str(e)}")
 
+async def upload_image_async(file, folder: str, public_id: str = None):
+    """Versión no bloqueante de `upload_image` para endpoints asíncronos"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        ejecutor_cloudinary, partial(upload_image, file, folder=folder, public_id=public_id)
+    )
+
+def delete_image_async(public_id: str):
+    """Programa la eliminación de una imagen sin esperar a que termine"""
+    if public_id:
+        ejecutor_cloudinary.submit(delete_image, public_id)
+
 def get_image_url(public_id: str, width: int = None, height: int = None):
     """
     Genera la URL de una imagen con transformaciones opcionales
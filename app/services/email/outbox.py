@@ -0,0 +1,194 @@
+import os
+import random
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from ...crud.purga import purgar_por_lotes
+from ...database import SessionLocal
+from ...models import EmailOutboxDB
+from .email_service import email_service, ConexionSMTP
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Ejecutar el remitente en este proceso (con varios workers la reserva con
+# SKIP LOCKED evita que dos envíen el mismo correo)
+EMAIL_OUTBOX_WORKER = os.getenv("EMAIL_OUTBOX_WORKER", "true").lower() in ("1", "true", "si", "yes")
+EMAIL_LOTE = int(os.getenv("EMAIL_LOTE", 20))
+EMAIL_INTERVALO = float(os.getenv("EMAIL_INTERVALO", 2))
+EMAIL_MAX_INTENTOS = int(os.getenv("EMAIL_MAX_INTENTOS", 5))
+EMAIL_BACKOFF_BASE = int(os.getenv("EMAIL_BACKOFF_BASE", 30))
+EMAIL_BACKOFF_MAX = int(os.getenv("EMAIL_BACKOFF_MAX", 3600))
+# Tiempo que un lote queda reservado; si el proceso muere se vuelve a tomar
+EMAIL_RESERVA_SEGUNDOS = int(os.getenv("EMAIL_RESERVA_SEGUNDOS", 300))
+# Horas que se conservan los correos enviados o fallidos (ya sin cuerpo) antes de purgarlos
+EMAIL_RETENCION_HORAS = int(os.getenv("EMAIL_RETENCION_HORAS", 24))
+
+ESTADOS = ("pendiente", "enviando", "enviado", "fallido")
+
+
+def encolar_correo(db: Session, destinatario: str, asunto: str, texto: str, html: str = None) -> EmailOutboxDB:
+    """Guarda el correo en la bandeja de salida y avisa al remitente de este proceso"""
+    correo = EmailOutboxDB(destinatario=destinatario, asunto=asunto, texto=texto, html=html)
+    db.add(correo)
+    db.commit()
+    db.refresh(correo)
+    remitente_correo.notificar()
+    return correo
+
+
+def calcular_espera(intentos: int) -> timedelta:
+    """Backoff exponencial con variación aleatoria para el siguiente intento"""
+    segundos = min(EMAIL_BACKOFF_MAX, EMAIL_BACKOFF_BASE * 2 ** (intentos - 1))
+    return timedelta(seconds=segundos * random.uniform(0.8, 1.2))
+
+
+def es_error_permanente(error: Exception) -> bool:
+    """Errores que no se resuelven reintentando (destinatario rechazado, 5xx del servidor)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException) and not isinstance(error, smtplib.SMTPAuthenticationError):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+def reservar_lote(db: Session, lote: int = EMAIL_LOTE):
+    """
+    Toma hasta `lote` correos listos para enviar y los marca como 'enviando'.
+    FOR UPDATE SKIP LOCKED permite varios remitentes sin bloquearse entre sí.
+    """
+    ahora = datetime.utcnow()
+    correos = db.query(EmailOutboxDB).filter(
+        or_(
+            and_(EmailOutboxDB.estado == "pendiente", EmailOutboxDB.proximo_intento <= ahora),
+            and_(EmailOutboxDB.estado == "enviando", EmailOutboxDB.reservado_hasta < ahora)
+        )
+    ).order_by(EmailOutboxDB.id).limit(lote).with_for_update(skip_locked=True).all()
+
+    for correo in correos:
+        correo.estado = "enviando"
+        correo.reservado_hasta = ahora + timedelta(seconds=EMAIL_RESERVA_SEGUNDOS)
+    db.commit()
+    return correos
+
+
+def descartar_cuerpo(correo: EmailOutboxDB):
+    """
+    Vacía el cuerpo de un correo que ya no se va a enviar: puede contener
+    datos sensibles (el código de restablecimiento) y no debe quedar guardado.
+    """
+    correo.texto = ""
+    correo.html = None
+
+
+def registrar_resultado(correo: EmailOutboxDB, error: Exception = None):
+    """Actualiza el correo tras un intento: enviado, reintento con backoff o fallido"""
+    ahora = datetime.utcnow()
+    correo.reservado_hasta = None
+    if error is None:
+        correo.estado = "enviado"
+        correo.fecha_envio = ahora
+        correo.ultimo_error = None
+        descartar_cuerpo(correo)
+        return
+
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:1000]
+    if correo.intentos >= EMAIL_MAX_INTENTOS or es_error_permanente(error):
+        correo.estado = "fallido"
+        descartar_cuerpo(correo)
+    else:
+        correo.estado = "pendiente"
+        correo.proximo_intento = ahora + calcular_espera(correo.intentos)
+
+
+def purgar_correos_procesados(db: Session, lote: int = 1000, retencion_horas: int = EMAIL_RETENCION_HORAS) -> int:
+    """Elimina hasta `lote` correos enviados o fallidos de hace más de `retencion_horas`; devuelve cuántos borró"""
+    limite = datetime.utcnow() - timedelta(hours=retencion_horas)
+    return purgar_por_lotes(
+        db, EmailOutboxDB,
+        EmailOutboxDB.estado.in_(("enviado", "fallido")),
+        EmailOutboxDB.fecha_creacion <= limite,
+        lote=lote
+    )
+
+
+def estadisticas_outbox(db: Session) -> dict:
+    """Cantidad de correos por estado en la bandeja de salida"""
+    conteo = dict(db.query(EmailOutboxDB.estado, func.count(EmailOutboxDB.id)).group_by(EmailOutboxDB.estado).all())
+    return {estado: conteo.get(estado, 0) for estado in ESTADOS}
+
+
+class RemitenteCorreo:
+    """
+    Hilo en segundo plano que vacía la bandeja de salida por lotes usando una
+    única conexión SMTP autenticada.
+    """
+
+    def __init__(self, intervalo: float = EMAIL_INTERVALO):
+        self.intervalo = intervalo
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._ejecutar, name="email-outbox", daemon=True)
+            self._hilo.start()
+
+    def detener(self, timeout: float = 10):
+        if self._hilo is not None:
+            self._detener.set()
+            self._despertar.set()
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    def notificar(self):
+        """Despierta al remitente para enviar sin esperar al siguiente intervalo"""
+        self._despertar.set()
+
+    def procesar_lote(self, conexion: ConexionSMTP) -> int:
+        """Envía un lote; devuelve cuántos correos se tomaron de la bandeja"""
+        db = SessionLocal()
+        try:
+            correos = reservar_lote(db)
+            for correo in correos:
+                try:
+                    conexion.enviar(email_service.build_message(
+                        correo.destinatario, correo.asunto, correo.texto, correo.html
+                    ))
+                    registrar_resultado(correo)
+                except Exception as e:
+                    print(f"[ERROR] No se pudo enviar el correo {correo.id} a {correo.destinatario}: {str(e)}")
+                    # Tras un error la conexión puede quedar en mal estado
+                    conexion.cerrar()
+                    registrar_resultado(correo, e)
+                db.commit()
+            return len(correos)
+        finally:
+            db.close()
+
+    def _ejecutar(self):
+        conexion = ConexionSMTP(email_service)
+        try:
+            while not self._detener.is_set():
+                self._despertar.clear()
+                try:
+                    procesados = self.procesar_lote(conexion)
+                except Exception as e:
+                    print(f"[ERROR] Error en la bandeja de salida de correo: {str(e)}")
+                    procesados = 0
+                # Si el lote vino lleno puede haber más pendientes: seguir sin esperar
+                if procesados < EMAIL_LOTE:
+                    self._despertar.wait(self.intervalo)
+        finally:
+            conexion.cerrar()
+
+
+# Remitente de este proceso (se inicia en el evento startup de la aplicación)
+remitente_correo = RemitenteCorreo()
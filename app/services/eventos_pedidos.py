@@ -0,0 +1,258 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# "memoria" solo reparte eventos dentro del proceso; con varios workers de
+# gunicorn se necesita "redis" para que un pedido creado en un worker llegue a
+# los clientes conectados a otro
+EVENTOS_BACKEND = os.getenv("EVENTOS_BACKEND", "memoria")
+EVENTOS_REDIS_URL = os.getenv("EVENTOS_REDIS_URL", os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+# Eventos recientes que se guardan por local para reanudar con Last-Event-ID
+EVENTOS_HISTORIAL = int(os.getenv("EVENTOS_HISTORIAL", 200))
+# Eventos pendientes por cliente; un cliente más lento que esto se desconecta
+# y al reconectar recupera lo perdido desde el historial
+EVENTOS_COLA_MAX = int(os.getenv("EVENTOS_COLA_MAX", 100))
+# Segundos sin eventos tras los que se envía un comentario para mantener viva la conexión
+EVENTOS_HEARTBEAT = float(os.getenv("EVENTOS_HEARTBEAT", 15))
+
+CREADO = "pedido_creado"
+ACTUALIZADO = "pedido_actualizado"
+# El historial ya no alcanza para reanudar: el cliente debe volver a consultar la lista
+REINICIO = "reinicio"
+
+
+class Evento:
+    def __init__(self, id: str, tipo: str, datos: dict):
+        self.id = id
+        self.tipo = tipo
+        self.datos = datos
+
+    def sse(self) -> str:
+        """Formato text/event-stream"""
+        return f"id: {self.id}\nevent: {self.tipo}\ndata: {json.dumps(self.datos, separators=(',', ':'))}\n\n"
+
+
+class SuscripcionDesbordada(Exception):
+    """El cliente no consumió los eventos a tiempo y se descartó su cola"""
+
+
+_DESBORDE = object()
+
+
+class SuscripcionMemoria:
+    def __init__(self, bus: "BusMemoria", local_id: int, pendientes: list):
+        self.bus = bus
+        self.local_id = local_id
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(maxsize=EVENTOS_COLA_MAX)
+        self.pendientes = deque(pendientes)
+
+    def entregar(self, evento: Evento):
+        # Corre en el event loop del suscriptor
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Backpressure: no se acumula memoria por un cliente lento
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(_DESBORDE)
+
+    async def siguiente(self, timeout: float) -> Optional[Evento]:
+        """Siguiente evento, o None si no llegó ninguno en `timeout` segundos"""
+        if self.pendientes:
+            return self.pendientes.popleft()
+        try:
+            evento = await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if evento is _DESBORDE:
+            raise SuscripcionDesbordada()
+        return evento
+
+    async def cerrar(self):
+        self.bus._quitar(self)
+
+
+class BusMemoria:
+    """
+    Pub/sub dentro del proceso. Los endpoints síncronos publican desde el
+    threadpool; la entrega a cada cliente se agenda en su event loop con
+    call_soon_threadsafe.
+    """
+
+    def __init__(self, historial: int = EVENTOS_HISTORIAL):
+        # La época distingue ids de otro arranque del proceso
+        self._epoca = format(int(time.time() * 1000), "x")
+        self._historial_max = historial
+        self._secuencias = {}
+        self._historial = {}
+        self._suscripciones = {}
+        self._lock = threading.Lock()
+
+    def publicar(self, local_id: int, tipo: str, datos: dict):
+        with self._lock:
+            secuencia = self._secuencias.get(local_id, 0) + 1
+            self._secuencias[local_id] = secuencia
+            evento = Evento(f"{self._epoca}-{secuencia}", tipo, datos)
+            self._historial.setdefault(local_id, deque(maxlen=self._historial_max)).append(evento)
+            suscripciones = list(self._suscripciones.get(local_id, ()))
+        for suscripcion in suscripciones:
+            suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, evento)
+
+    def _reanudar(self, local_id: int, ultimo_id: Optional[str]) -> list:
+        """Eventos posteriores a `ultimo_id` (se llama con el lock tomado)"""
+        if not ultimo_id:
+            return []
+        actual = self._secuencias.get(local_id, 0)
+        reinicio = [Evento(f"{self._epoca}-{actual}", REINICIO, {"local_id": local_id})]
+        epoca, _, secuencia = ultimo_id.partition("-")
+        if epoca != self._epoca or not secuencia.isdigit() or int(secuencia) > actual:
+            return reinicio
+
+        historial = self._historial.get(local_id, ())
+        desde = int(secuencia)
+        if historial and int(historial[0].id.split("-")[1]) > desde + 1:
+            return reinicio
+        return [evento for evento in historial if int(evento.id.split("-")[1]) > desde]
+
+    async def suscribir(self, local_id: int, ultimo_id: Optional[str] = None) -> SuscripcionMemoria:
+        # El historial y el registro se toman bajo el mismo lock: ningún evento
+        # se pierde ni se entrega dos veces entre la reanudación y lo nuevo
+        with self._lock:
+            suscripcion = SuscripcionMemoria(self, local_id, self._reanudar(local_id, ultimo_id))
+            self._suscripciones.setdefault(local_id, set()).add(suscripcion)
+        return suscripcion
+
+    def _quitar(self, suscripcion: SuscripcionMemoria):
+        with self._lock:
+            suscripciones = self._suscripciones.get(suscripcion.local_id)
+            if suscripciones is not None:
+                suscripciones.discard(suscripcion)
+                if not suscripciones:
+                    del self._suscripciones[suscripcion.local_id]
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memoria",
+                "locales": len(self._suscripciones),
+                "suscripciones": sum(len(s) for s in self._suscripciones.values()),
+            }
+
+
+def _id_stream(id_evento: str) -> tuple:
+    milisegundos, _, secuencia = id_evento.partition("-")
+    return int(milisegundos), int(secuencia or 0)
+
+
+class SuscripcionRedis:
+    def __init__(self, bus: "BusRedis", local_id: int, ultimo_id: Optional[str]):
+        self.bus = bus
+        self.clave = bus.clave(local_id)
+        self.local_id = local_id
+        self.ultimo_id = ultimo_id
+        self.pendientes = deque()
+
+    async def iniciar(self):
+        cliente = self.bus.cliente_async
+        recientes = await cliente.xrevrange(self.clave, count=1)
+        actual = recientes[0][0].decode() if recientes else "0-0"
+        if not self.ultimo_id:
+            self.ultimo_id = actual
+            return
+        # Si el último evento recibido ya se recortó del stream puede haber
+        # eventos perdidos entre ese y el primero que queda
+        primeros = await cliente.xrange(self.clave, count=1)
+        try:
+            ultimo = _id_stream(self.ultimo_id)
+            perdido = ultimo > _id_stream(actual) or (
+                bool(primeros) and ultimo < _id_stream(primeros[0][0].decode())
+            )
+        except ValueError:
+            perdido = True
+        if perdido:
+            self.pendientes.append(Evento(actual, REINICIO, {"local_id": self.local_id}))
+            self.ultimo_id = actual
+
+    async def siguiente(self, timeout: float) -> Optional[Evento]:
+        if not self.pendientes:
+            respuesta = await self.bus.cliente_async.xread(
+                {self.clave: self.ultimo_id}, count=EVENTOS_COLA_MAX, block=max(1, int(timeout * 1000))
+            )
+            for _, entradas in respuesta or ():
+                for id_entrada, campos in entradas:
+                    self.ultimo_id = id_entrada.decode()
+                    self.pendientes.append(Evento(
+                        self.ultimo_id, campos[b"tipo"].decode(), json.loads(campos[b"datos"])
+                    ))
+        return self.pendientes.popleft() if self.pendientes else None
+
+    async def cerrar(self):
+        pass
+
+
+class BusRedis:
+    """
+    Pub/sub compartido entre workers con un stream de Redis por local. El
+    stream guarda el historial (recortado a EVENTOS_HISTORIAL) y sus ids sirven
+    como Last-Event-ID; cada cliente lee a su propio ritmo con XREAD.
+    """
+
+    def __init__(self, url: str, historial: int = EVENTOS_HISTORIAL, prefijo: str = "foodplaza:pedidos:"):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError:
+            raise RuntimeError("EVENTOS_BACKEND=redis requiere instalar el paquete 'redis'")
+        self.cliente = redis.Redis.from_url(url)
+        self.cliente_async = redis.asyncio.Redis.from_url(url)
+        self.historial = historial
+        self.prefijo = prefijo
+
+    def clave(self, local_id: int) -> str:
+        return f"{self.prefijo}local:{local_id}"
+
+    def publicar(self, local_id: int, tipo: str, datos: dict):
+        self.cliente.xadd(
+            self.clave(local_id),
+            {"tipo": tipo, "datos": json.dumps(datos, separators=(",", ":"))},
+            maxlen=self.historial,
+            approximate=True,
+        )
+
+    async def suscribir(self, local_id: int, ultimo_id: Optional[str] = None) -> SuscripcionRedis:
+        suscripcion = SuscripcionRedis(self, local_id, ultimo_id)
+        await suscripcion.iniciar()
+        return suscripcion
+
+    def estadisticas(self) -> dict:
+        return {"backend": "redis"}
+
+
+def crear_bus():
+    if EVENTOS_BACKEND == "redis":
+        return BusRedis(EVENTOS_REDIS_URL)
+    return BusMemoria()
+
+
+# Bus de eventos de pedidos de este proceso
+bus_pedidos = crear_bus()
+
+
+def publicar_pedido(tipo: str, pedido: dict):
+    """
+    Publica un evento de pedido para los clientes del local. Un fallo al
+    publicar no debe revertir ni romper la operación que ya se confirmó.
+    """
+    try:
+        bus_pedidos.publicar(pedido["id_local"], tipo, pedido)
+    except Exception as e:
+        print(f"[ERROR] No se pudo publicar el evento {tipo} del pedido {pedido.get('id')}: {str(e)}")
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+
+# Cargar variables de entorno
+load_dotenv()
+
+
+def calcular_etag(contenido: bytes) -> str:
+    """ETag fuerte a partir del contenido exacto de la respuesta"""
+    return '"' + hashlib.sha256(contenido).hexdigest()[:32] + '"'
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara el encabezado If-None-Match (puede traer varias ETags o '*') con la ETag actual"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidatos = [valor.strip() for valor in if_none_match.split(",")]
+    # Para GET la comparación es débil: se ignora el prefijo W/
+    return any((c[2:] if c.startswith("W/") else c) == etag for c in candidatos)
+
+
+def respuesta_condicional(request: Request, datos, cache_control: Optional[str] = None) -> Response:
+    """
+    Serializa `datos` como JSON con su ETag y responde 304 sin cuerpo si el
+    cliente ya tiene esa misma versión. Sin `cache_control` se aplica la
+    política de la ruta en CacheHTTPMiddleware.
+    """
+    contenido = json.dumps(jsonable_encoder(datos), ensure_ascii=False, separators=(",", ":")).encode()
+    etag = calcular_etag(contenido)
+    encabezados = {"ETag": etag}
+    if cache_control:
+        encabezados["Cache-Control"] = cache_control
+    if etag_coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=encabezados)
+    return Response(content=contenido, media_type="application/json", headers=encabezados)
+
+
+# Cache-Control por plantilla de ruta para las lecturas del catálogo. Las rutas
+# que no aparecen aquí pasan por el middleware sin cambios.
+CACHE_CONTROL_CATALOGO = os.getenv("CACHE_CONTROL_CATALOGO", "public, max-age=30, stale-while-revalidate=60")
+POLITICAS_CACHE = {
+    "/api/plazas/": CACHE_CONTROL_CATALOGO,
+    "/api/plazas/{plaza_id}": CACHE_CONTROL_CATALOGO,
+    "/api/locales/": CACHE_CONTROL_CATALOGO,
+    "/api/locales/{locale_id}": CACHE_CONTROL_CATALOGO,
+    "/api/locales/{locale_id}/catalogo": "public, no-cache",
+    "/api/menus/{menu_id}": CACHE_CONTROL_CATALOGO,
+    "/api/menus/local/{local_id}": CACHE_CONTROL_CATALOGO,
+    "/api/productos/{producto_id}": CACHE_CONTROL_CATALOGO,
+    "/api/productos/menu/{menu_id}": CACHE_CONTROL_CATALOGO,
+}
+
+
+class CacheHTTPMiddleware:
+    """
+    Middleware ASGI de solicitudes condicionales para las rutas de POLITICAS_CACHE.
+
+    En respuestas GET 200 calcula una ETag fuerte sobre el cuerpo, responde 304
+    si coincide con If-None-Match y añade el Cache-Control de la ruta, de modo
+    que CDN y clientes puedan revalidar sin descargar de nuevo el contenido.
+    """
+
+    def __init__(self, app, politicas: dict = None):
+        self.app = app
+        self.politicas = POLITICAS_CACHE if politicas is None else politicas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        cuerpo = []
+
+        async def enviar(mensaje):
+            nonlocal inicio
+            if mensaje["type"] == "http.response.start":
+                # El router ya resolvió la ruta y la dejó en el scope
+                ruta = scope.get("route")
+                politica = self.politicas.get(getattr(ruta, "path", None))
+                encabezados = MutableHeaders(raw=mensaje["headers"])
+                if politica is None or mensaje["status"] not in (200, 304):
+                    await send(mensaje)
+                    return
+                if "cache-control" not in encabezados:
+                    encabezados["Cache-Control"] = politica
+                if mensaje["status"] == 304 or "etag" in encabezados:
+                    # El endpoint ya resolvió la solicitud condicional
+                    await send(mensaje)
+                    return
+                inicio = mensaje
+                return
+            if inicio is None:
+                await send(mensaje)
+                return
+
+            cuerpo.append(mensaje.get("body", b""))
+            if mensaje.get("more_body", False):
+                return
+
+            contenido = b"".join(cuerpo)
+            etag = calcular_etag(contenido)
+            encabezados = MutableHeaders(raw=inicio["headers"])
+            encabezados["ETag"] = etag
+            if etag_coincide(Headers(scope=scope).get("if-none-match"), etag):
+                del encabezados["content-length"]
+                del encabezados["content-type"]
+                await send({"type": "http.response.start", "status": 304, "headers": encabezados.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(inicio)
+            await send({"type": "http.response.body", "body": contenido})
+
+        await self.app(scope, receive, enviar)
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..crud.purga import purgar_por_lotes
+from ..models import IdempotenciaDB
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Tiempo durante el que un reintento con la misma clave recibe la respuesta guardada
+IDEMPOTENCIA_TTL_HORAS = int(os.getenv("IDEMPOTENCIA_TTL_HORAS", 24))
+# Una clave que sigue "en proceso" pasado este tiempo se considera abandonada
+# (el proceso que la tomó murió) y otro reintento puede ejecutarla
+IDEMPOTENCIA_PROCESO_SEGUNDOS = int(os.getenv("IDEMPOTENCIA_PROCESO_SEGUNDOS", 60))
+IDEMPOTENCIA_MAX_LONGITUD = 255
+
+ENCABEZADO_REPETIDA = "Idempotent-Replayed"
+
+
+def _sha256(texto: str) -> str:
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def calcular_clave(clave_cliente: str, operacion: str, usuario_id: Optional[int]) -> str:
+    """
+    Clave almacenada: la del cliente limitada a su usuario y a la operación.
+    Exige un usuario autenticado: sin él todos los clientes anónimos
+    compartirían el mismo espacio de claves y podrían recibir respuestas ajenas.
+    """
+    if usuario_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Idempotency-Key requiere un token de acceso",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if not clave_cliente or len(clave_cliente) > IDEMPOTENCIA_MAX_LONGITUD:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key debe tener entre 1 y {IDEMPOTENCIA_MAX_LONGITUD} caracteres"
+        )
+    return _sha256(f"{usuario_id}:{operacion}:{clave_cliente}")
+
+
+def calcular_huella(cuerpo: dict) -> str:
+    return _sha256(json.dumps(cuerpo, sort_keys=True, separators=(",", ":"), default=str))
+
+
+def reclamar(db: Session, clave: str, huella: str, reintentar: bool = True) -> Optional[JSONResponse]:
+    """
+    Reserva la clave para esta solicitud insertando su fila. Si la clave ya
+    existía devuelve la respuesta guardada para repetirla, o lanza 409 si la
+    solicitud original sigue en proceso y 422 si el contenido es distinto.
+    Devuelve None cuando esta solicitud debe ejecutar la operación.
+
+    La clave primaria resuelve los duplicados simultáneos: solo un INSERT gana.
+    """
+    ahora = datetime.utcnow()
+    db.add(IdempotenciaDB(
+        clave=clave,
+        huella=huella,
+        fecha_creacion=ahora,
+        expira_en=ahora + timedelta(hours=IDEMPOTENCIA_TTL_HORAS)
+    ))
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    existente = db.query(IdempotenciaDB).filter(IdempotenciaDB.clave == clave).first()
+    if existente is None and reintentar:
+        # Se liberó entre el INSERT y la lectura: volver a intentar una vez
+        return reclamar(db, clave, huella, reintentar=False)
+
+    if existente is not None and (existente.expira_en <= ahora or (
+        existente.estado == "en_proceso"
+        and existente.fecha_creacion <= ahora - timedelta(seconds=IDEMPOTENCIA_PROCESO_SEGUNDOS)
+    )):
+        # Vencida o abandonada: tomarla con un UPDATE condicional (solo uno lo logra)
+        tomadas = db.query(IdempotenciaDB).filter(
+            IdempotenciaDB.clave == clave,
+            IdempotenciaDB.fecha_creacion == existente.fecha_creacion
+        ).update({
+            "huella": huella,
+            "estado": "en_proceso",
+            "codigo": None,
+            "respuesta": None,
+            "fecha_creacion": ahora,
+            "expira_en": ahora + timedelta(hours=IDEMPOTENCIA_TTL_HORAS),
+        }, synchronize_session=False)
+        db.commit()
+        if tomadas:
+            return None
+        # Otro reintento la tomó primero: responder según su estado actual
+        existente = db.query(IdempotenciaDB).filter(IdempotenciaDB.clave == clave).first()
+
+    if existente is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Una solicitud con la misma Idempotency-Key está en proceso",
+            headers={"Retry-After": "1"}
+        )
+    if existente.huella != huella:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="La Idempotency-Key ya se usó con una solicitud distinta"
+        )
+    if existente.estado != "completado":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Una solicitud con la misma Idempotency-Key está en proceso",
+            headers={"Retry-After": "1"}
+        )
+    return JSONResponse(
+        status_code=existente.codigo,
+        content=json.loads(existente.respuesta),
+        headers={ENCABEZADO_REPETIDA: "true"}
+    )
+
+
+def completar(db: Session, clave: str, codigo: int, cuerpo) -> None:
+    """
+    Guarda la respuesta de la clave. No confirma: se llama antes del commit de
+    la operación para que el resultado y su respuesta se guarden juntos.
+    """
+    db.query(IdempotenciaDB).filter(IdempotenciaDB.clave == clave).update({
+        "estado": "completado",
+        "codigo": codigo,
+        "respuesta": json.dumps(cuerpo, separators=(",", ":")),
+    }, synchronize_session=False)
+
+
+def liberar(db: Session, clave: str) -> None:
+    """Elimina la reserva tras un error para que el cliente pueda reintentar"""
+    try:
+        db.query(IdempotenciaDB).filter(
+            IdempotenciaDB.clave == clave,
+            IdempotenciaDB.estado == "en_proceso"
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[ERROR] No se pudo liberar la clave de idempotencia: {str(e)}")
+
+
+def purgar_vencidas(db: Session, lote: int = 1000) -> int:
+    """Elimina hasta `lote` claves vencidas; devuelve cuántas borró"""
+    return purgar_por_lotes(db, IdempotenciaDB, IdempotenciaDB.expira_en <= datetime.utcnow(), lote=lote)
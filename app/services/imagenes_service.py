@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..crud.purga import purgar_por_lotes
+from ..database import SessionLocal
+from ..models import TrabajoImagenDB
+from .cloudinary_service import ejecutor_cloudinary, upload_image, delete_image_async
+from .ingesta_imagenes import ImagenRecibida, optimizar_imagen
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Máximo de subidas en curso o en cola por proceso; por encima se responde 503
+IMAGEN_MAX_PENDIENTES = int(os.getenv("IMAGEN_MAX_PENDIENTES", 32))
+# Tiempo que se conserva el estado de un trabajo de subida
+IMAGEN_TRABAJO_TTL = int(os.getenv("IMAGEN_TRABAJO_TTL", 3600))
+
+_pendientes = threading.BoundedSemaphore(IMAGEN_MAX_PENDIENTES)
+
+
+def _como_dict(trabajo: TrabajoImagenDB) -> dict:
+    return {
+        "id": trabajo.id,
+        "estado": trabajo.estado,
+        "url": trabajo.url,
+        "public_id": trabajo.public_id,
+        "error": trabajo.error,
+    }
+
+
+def guardar_trabajo(trabajo_id: str, **datos) -> dict:
+    """
+    Crea o actualiza el estado de un trabajo en la tabla trabajos_imagen, de
+    modo que cualquier worker puede responder la consulta del estado sin
+    depender de la caché (que es por proceso y se puede vaciar o desalojar).
+    """
+    db = SessionLocal()
+    try:
+        trabajo = db.get(TrabajoImagenDB, trabajo_id)
+        if trabajo is None:
+            trabajo = TrabajoImagenDB(id=trabajo_id, estado="pendiente")
+            db.add(trabajo)
+        for campo, valor in datos.items():
+            setattr(trabajo, campo, valor)
+        trabajo.expira_en = datetime.utcnow() + timedelta(seconds=IMAGEN_TRABAJO_TTL)
+        db.commit()
+        return _como_dict(trabajo)
+    finally:
+        db.close()
+
+
+def obtener_trabajo(db: Session, trabajo_id: str) -> Optional[dict]:
+    """Devuelve el estado de un trabajo de subida o None si no existe (o expiró)"""
+    trabajo = db.get(TrabajoImagenDB, trabajo_id)
+    if trabajo is None or trabajo.expira_en <= datetime.utcnow():
+        return None
+    return _como_dict(trabajo)
+
+
+def purgar_trabajos_vencidos(db: Session, lote: int = 1000) -> int:
+    """Elimina hasta `lote` trabajos vencidos; devuelve cuántos borró"""
+    return purgar_por_lotes(db, TrabajoImagenDB, TrabajoImagenDB.expira_en <= datetime.utcnow(), lote=lote)
+
+
+def _procesar(
+    trabajo_id: Optional[str],
+    imagen: ImagenRecibida,
+    carpeta: str,
+    public_id: str,
+    actualizar: Callable,
+    entidad_id: int,
+    public_id_anterior: Optional[str],
+) -> dict:
+    """
+    Optimiza y sube la imagen y actualiza la entidad; se ejecuta en el pool de
+    Cloudinary. Solo las subidas asíncronas (con `trabajo_id`) guardan su estado.
+    """
+    def registrar(**datos):
+        if trabajo_id is not None:
+            guardar_trabajo(trabajo_id, **datos)
+
+    try:
+        registrar(estado="procesando")
+        imagen = optimizar_imagen(imagen)
+        resultado = upload_image(imagen.archivo, folder=carpeta, public_id=public_id)
+
+        # Sesión propia: la de la solicitud puede estar cerrada cuando esto termine
+        db = SessionLocal()
+        try:
+            actualizar(db, entidad_id, {
+                "imagen_url": resultado["url"],
+                "imagen_public_id": resultado["public_id"]
+            })
+        finally:
+            db.close()
+    except Exception as e:
+        detalle = e.detail if isinstance(e, HTTPException) else str(e)
+        registrar(estado="error", error=detalle)
+        raise
+    finally:
+        imagen.cerrar()
+        _pendientes.release()
+
+    registrar(estado="completado", url=resultado["url"], public_id=resultado["public_id"])
+
+    # Con el mismo public_id Cloudinary ya sobrescribió la imagen anterior
+    if public_id_anterior and public_id_anterior != resultado["public_id"]:
+        delete_image_async(public_id_anterior)
+    return resultado
+
+
+async def subir_imagen(
+    imagen: ImagenRecibida,
+    carpeta: str,
+    public_id: str,
+    actualizar: Callable,
+    entidad_id: int,
+    public_id_anterior: Optional[str] = None,
+    asincrono: bool = False,
+) -> dict:
+    """
+    Sube una imagen (ver `recibir_imagen`) a Cloudinary sin bloquear el event
+    loop y guarda la URL en la entidad mediante `actualizar(db, entidad_id, datos)`.
+    El archivo temporal se cierra al terminar el trabajo.
+
+    Con `asincrono` la subida queda en segundo plano y se devuelve el trabajo
+    (estado "pendiente") para consultarlo en /api/imagenes/trabajos/{id}; sin
+    él se espera el resultado ({"url", "public_id"}) y no se guarda ningún
+    trabajo. El llamador debe cerrar antes su sesión para no retener una
+    conexión del pool mientras espera.
+    """
+    if not _pendientes.acquire(blocking=False):
+        imagen.cerrar()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hay demasiadas imágenes en proceso, intente de nuevo más tarde"
+        )
+
+    trabajo_id = trabajo = None
+    try:
+        if asincrono:
+            trabajo_id = uuid.uuid4().hex
+            trabajo = await run_in_threadpool(guardar_trabajo, trabajo_id)
+        futuro = ejecutor_cloudinary.submit(
+            _procesar, trabajo_id, imagen, carpeta, public_id, actualizar, entidad_id, public_id_anterior
+        )
+    except Exception:
+        imagen.cerrar()
+        _pendientes.release()
+        raise
+
+    if asincrono:
+        return trabajo
+    return await asyncio.wrap_future(futuro)
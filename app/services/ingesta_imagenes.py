@@ -0,0 +1,239 @@
+import os
+from tempfile import SpooledTemporaryFile
+from typing import Iterable, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él las imágenes se suben tal cual
+    Image = ImageOps = None
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Tamaño máximo aceptado por archivo (por defecto 5 MB)
+IMAGEN_MAX_BYTES = int(os.getenv("IMAGEN_MAX_BYTES", 5 * 1024 * 1024))
+# A partir de este tamaño la copia temporal pasa de memoria a disco
+IMAGEN_MAX_MEMORIA = int(os.getenv("IMAGEN_MAX_MEMORIA", 1024 * 1024))
+TAMANO_BLOQUE = 64 * 1024
+# Encabezados y delimitadores del formulario multipart que se permiten sobre IMAGEN_MAX_BYTES
+MARGEN_MULTIPART = 64 * 1024
+
+# Procesamiento local antes de subir (requiere Pillow)
+IMAGEN_MAX_DIMENSION = int(os.getenv("IMAGEN_MAX_DIMENSION", 0))
+IMAGEN_CONVERTIR_WEBP = os.getenv("IMAGEN_CONVERTIR_WEBP", "false").lower() in ("1", "true", "si", "yes")
+IMAGEN_CALIDAD_WEBP = int(os.getenv("IMAGEN_CALIDAD_WEBP", 80))
+# Límite de píxeles al decodificar, para rechazar "bombas de descompresión"
+IMAGEN_MAX_PIXELES = int(os.getenv("IMAGEN_MAX_PIXELES", 40_000_000))
+
+if (IMAGEN_MAX_DIMENSION or IMAGEN_CONVERTIR_WEBP) and Image is None:
+    raise RuntimeError("IMAGEN_MAX_DIMENSION/IMAGEN_CONVERTIR_WEBP requieren instalar el paquete 'Pillow'")
+if Image is not None:
+    Image.MAX_IMAGE_PIXELS = IMAGEN_MAX_PIXELES
+
+# Firmas (magic bytes) de los formatos aceptados
+FIRMAS = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def detectar_tipo(cabecera: bytes) -> Optional[str]:
+    """Tipo MIME real de la imagen según sus primeros bytes, o None si no se reconoce"""
+    for firma, tipo in FIRMAS:
+        if cabecera.startswith(firma):
+            return tipo
+    if cabecera[:4] == b"RIFF" and cabecera[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _mensaje_tamano(max_bytes: int) -> str:
+    return f"La imagen supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB"
+
+
+def es_subida_imagen(scope) -> bool:
+    """POST /api/{entidad}/{id}/imagen"""
+    return scope["method"] == "POST" and scope["path"].rstrip("/").endswith("/imagen")
+
+
+class LimiteSubidaMiddleware:
+    """
+    Middleware ASGI que limita el cuerpo de las subidas de imágenes antes de que
+    se lea el formulario (Starlette lo copia entero a un temporal antes de
+    llamar al endpoint). Con un Content-Length mayor que el límite responde 413
+    sin leer el cuerpo; sin Content-Length (chunked) corta la lectura con 413
+    en cuanto se supera.
+    """
+
+    def __init__(self, app, max_bytes: int = IMAGEN_MAX_BYTES, es_subida=es_subida_imagen):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_cuerpo = max_bytes + MARGEN_MULTIPART
+        self.es_subida = es_subida
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.es_subida(scope):
+            await self.app(scope, receive, send)
+            return
+
+        longitud = dict(scope["headers"]).get(b"content-length")
+        if longitud is not None and longitud.isdigit() and int(longitud) > self.max_cuerpo:
+            respuesta = JSONResponse(
+                {"detail": _mensaje_tamano(self.max_bytes)},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                headers={"Connection": "close"}
+            )
+            await respuesta(scope, receive, send)
+            return
+
+        recibidos = 0
+
+        async def recibir():
+            nonlocal recibidos
+            mensaje = await receive()
+            if mensaje["type"] == "http.request":
+                recibidos += len(mensaje.get("body", b""))
+                if recibidos > self.max_cuerpo:
+                    # FastAPI propaga las HTTPException del análisis del formulario
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=_mensaje_tamano(self.max_bytes)
+                    )
+            return mensaje
+
+        await self.app(scope, recibir, send)
+
+
+class ImagenRecibida:
+    """Copia temporal de una imagen subida, ya validada, lista para procesar y subir"""
+
+    def __init__(self, archivo, tipo: str, tamano: int):
+        self.archivo = archivo
+        self.tipo = tipo
+        self.tamano = tamano
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+async def recibir_imagen(
+    file: UploadFile,
+    max_bytes: int = IMAGEN_MAX_BYTES,
+    permitidos: Optional[Iterable[str]] = None
+) -> ImagenRecibida:
+    """
+    Copia la subida por bloques a un archivo temporal (en memoria hasta
+    IMAGEN_MAX_MEMORIA, luego en disco) sin cargarla entera. Responde 413 en
+    cuanto se supera `max_bytes` y 400 si el contenido no es una imagen
+    reconocida o su tipo no está en `permitidos`.
+    """
+    destino = SpooledTemporaryFile(max_size=IMAGEN_MAX_MEMORIA)
+    try:
+        tamano = 0
+        cabecera = b""
+        while True:
+            bloque = await file.read(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            tamano += len(bloque)
+            if tamano > max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=_mensaje_tamano(max_bytes)
+                )
+            if len(cabecera) < 16:
+                cabecera += bloque[:16]
+            destino.write(bloque)
+
+        tipo = detectar_tipo(cabecera)
+        if tipo is None:
+            raise HTTPException(status_code=400, detail="El archivo no es una imagen válida")
+        if permitidos is not None and tipo not in permitidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tipo de archivo no permitido. Tipos permitidos: {', '.join(permitidos)}"
+            )
+    except Exception:
+        destino.close()
+        raise
+
+    destino.seek(0)
+    return ImagenRecibida(destino, tipo, tamano)
+
+
+def _demasiados_pixeles() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="La imagen tiene demasiados píxeles"
+    )
+
+
+def _imagen_no_valida() -> HTTPException:
+    return HTTPException(status_code=400, detail="El archivo no es una imagen válida")
+
+
+def optimizar_imagen(imagen: ImagenRecibida) -> ImagenRecibida:
+    """
+    Reduce la imagen a IMAGEN_MAX_DIMENSION y/o la recodifica a WebP según la
+    configuración. Trabajo de CPU: se ejecuta en el pool de subidas, no en el
+    event loop. Devuelve la misma imagen si no hay nada que hacer.
+    """
+    if Image is None or not (IMAGEN_MAX_DIMENSION or IMAGEN_CONVERTIR_WEBP):
+        return imagen
+    # Los GIF pueden ser animados; se suben sin tocar
+    if imagen.tipo == "image/gif":
+        return imagen
+
+    try:
+        original = Image.open(imagen.archivo)
+    except Image.DecompressionBombError:
+        raise _demasiados_pixeles()
+    except (Image.UnidentifiedImageError, OSError, SyntaxError):
+        raise _imagen_no_valida()
+
+    destino = None
+    try:
+        with original:
+            # Pillow solo falla a partir del doble de MAX_IMAGE_PIXELS (antes emite
+            # una advertencia); aquí se rechaza desde el límite configurado
+            if original.width * original.height > IMAGEN_MAX_PIXELES:
+                raise _demasiados_pixeles()
+            reducir = IMAGEN_MAX_DIMENSION and max(original.size) > IMAGEN_MAX_DIMENSION
+            if not reducir and not IMAGEN_CONVERTIR_WEBP:
+                imagen.archivo.seek(0)
+                return imagen
+
+            # Al recodificar se pierde el EXIF: aplicar antes la orientación.
+            # Pillow decodifica recién aquí, así que un archivo truncado o dañado
+            # con cabecera válida falla en este bloque y no al abrirlo
+            procesada = ImageOps.exif_transpose(original)
+            if reducir:
+                procesada.thumbnail((IMAGEN_MAX_DIMENSION, IMAGEN_MAX_DIMENSION))
+
+            destino = SpooledTemporaryFile(max_size=IMAGEN_MAX_MEMORIA)
+            if IMAGEN_CONVERTIR_WEBP:
+                if procesada.mode not in ("RGB", "RGBA"):
+                    procesada = procesada.convert("RGBA" if procesada.mode in ("LA", "P", "PA") else "RGB")
+                procesada.save(destino, format="WEBP", quality=IMAGEN_CALIDAD_WEBP)
+                tipo = "image/webp"
+            else:
+                procesada.save(destino, format=original.format)
+                tipo = imagen.tipo
+    except (Image.UnidentifiedImageError, OSError, SyntaxError):
+        if destino is not None:
+            destino.close()
+        raise _imagen_no_valida()
+    except BaseException:
+        if destino is not None:
+            destino.close()
+        raise
+
+    tamano = destino.tell()
+    destino.seek(0)
+    imagen.cerrar()
+    return ImagenRecibida(destino, tipo, tamano)
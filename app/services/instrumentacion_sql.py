@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Registrar consultas por solicitud (cantidad, tiempo y la más lenta)
+SQL_INSTRUMENTACION = os.getenv("SQL_INSTRUMENTACION", "true").lower() in ("1", "true", "si", "yes")
+# Agregar el encabezado Server-Timing con los tiempos de base de datos
+SQL_SERVER_TIMING = os.getenv("SQL_SERVER_TIMING", "true").lower() in ("1", "true", "si", "yes")
+# Las sentencias que tardan más que esto se registran en el log con su plan
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", 200))
+SQL_EXPLAIN_LENTAS = os.getenv("SQL_EXPLAIN_LENTAS", "true").lower() in ("1", "true", "si", "yes")
+# Caracteres de cada sentencia que se guardan en las estadísticas
+SQL_LONGITUD_SENTENCIA = 300
+
+
+def _resumir(sentencia: str) -> str:
+    return " ".join(sentencia.split())[:SQL_LONGITUD_SENTENCIA]
+
+
+class ConsultasSolicitud:
+    """Consultas de una solicitud HTTP; el objeto se comparte con el threadpool a través del contexto"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_ms = 0.0
+        self.mas_lenta_ms = 0.0
+        self.mas_lenta = None
+
+    def registrar(self, sentencia: str, duracion_ms: float):
+        self.consultas += 1
+        self.tiempo_ms += duracion_ms
+        if duracion_ms > self.mas_lenta_ms:
+            self.mas_lenta_ms = duracion_ms
+            self.mas_lenta = sentencia
+
+
+_solicitud_actual: ContextVar[Optional[ConsultasSolicitud]] = ContextVar("consultas_solicitud", default=None)
+_ruta_actual: ContextVar[Optional[str]] = ContextVar("ruta_solicitud", default=None)
+
+
+def consultas_actuales() -> Optional[ConsultasSolicitud]:
+    return _solicitud_actual.get()
+
+
+def _explicar(conexion, sentencia: str, parametros) -> list:
+    """
+    Plan de una sentencia lenta. Usa un cursor DBAPI directo sobre la misma
+    conexión: no dispara estos eventos de nuevo y ve los mismos datos de la
+    transacción en curso.
+    """
+    prefijo = "EXPLAIN QUERY PLAN " if conexion.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conexion.connection.cursor()
+    try:
+        cursor.execute(prefijo + sentencia, parametros)
+        columnas = [columna[0] for columna in cursor.description or ()]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _antes(conexion, cursor, sentencia, parametros, contexto, executemany):
+    # El inicio va en el contexto de ejecución de la sentencia y no en la
+    # conexión: si la sentencia falla after_cursor_execute no se llama y no
+    # queda nada pendiente en una conexión que vuelve al pool
+    if contexto is not None:
+        contexto._inicio_sql = time.perf_counter()
+
+
+def _despues(conexion, cursor, sentencia, parametros, contexto, executemany):
+    inicio = getattr(contexto, "_inicio_sql", None)
+    if inicio is None:
+        return
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+    solicitud = _solicitud_actual.get()
+    if solicitud is not None:
+        solicitud.registrar(sentencia, duracion_ms)
+
+    if duracion_ms < SQL_LENTA_MS:
+        return
+    ruta = _ruta_actual.get() or "fuera de solicitud"
+    print(f"[SQL LENTA] {duracion_ms:.1f} ms en {ruta}: {_resumir(sentencia)}")
+    if SQL_EXPLAIN_LENTAS and not executemany and sentencia.lstrip().upper().startswith("SELECT"):
+        try:
+            for paso in _explicar(conexion, sentencia, parametros):
+                print(f"[SQL LENTA]     {paso}")
+        except Exception as e:
+            print(f"[ERROR] No se pudo obtener el plan de la consulta lenta: {str(e)}")
+
+
+def instrumentar_engine(engine):
+    """Registra los eventos de tiempo en un engine síncrono (o en el sync_engine de uno asíncrono)"""
+    if SQL_INSTRUMENTACION and not event.contains(engine, "before_cursor_execute", _antes):
+        event.listen(engine, "before_cursor_execute", _antes)
+        event.listen(engine, "after_cursor_execute", _despues)
+
+
+class EstadisticasRutas:
+    """Agregado por ruta (método + plantilla) de las consultas de cada solicitud en este proceso"""
+
+    def __init__(self):
+        self._rutas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, ruta: str, solicitud: ConsultasSolicitud, duracion_ms: float):
+        with self._lock:
+            datos = self._rutas.get(ruta)
+            if datos is None:
+                datos = self._rutas[ruta] = {
+                    "solicitudes": 0, "consultas": 0, "consultas_max": 0,
+                    "tiempo_db_ms": 0.0, "tiempo_db_max_ms": 0.0, "tiempo_total_ms": 0.0,
+                    "mas_lenta_ms": 0.0, "mas_lenta": None,
+                }
+            datos["solicitudes"] += 1
+            datos["consultas"] += solicitud.consultas
+            datos["consultas_max"] = max(datos["consultas_max"], solicitud.consultas)
+            datos["tiempo_db_ms"] += solicitud.tiempo_ms
+            datos["tiempo_db_max_ms"] = max(datos["tiempo_db_max_ms"], solicitud.tiempo_ms)
+            datos["tiempo_total_ms"] += duracion_ms
+            if solicitud.mas_lenta_ms > datos["mas_lenta_ms"]:
+                datos["mas_lenta_ms"] = solicitud.mas_lenta_ms
+                datos["mas_lenta"] = _resumir(solicitud.mas_lenta)
+
+    def resumen(self) -> list:
+        """Rutas ordenadas por consultas promedio por solicitud (las N+1 quedan arriba)"""
+        with self._lock:
+            rutas = [(ruta, dict(datos)) for ruta, datos in self._rutas.items()]
+        resumen = []
+        for ruta, datos in rutas:
+            n = datos["solicitudes"]
+            resumen.append({
+                "ruta": ruta,
+                "solicitudes": n,
+                "consultas_promedio": round(datos["consultas"] / n, 2),
+                "consultas_max": datos["consultas_max"],
+                "tiempo_db_promedio_ms": round(datos["tiempo_db_ms"] / n, 2),
+                "tiempo_db_max_ms": round(datos["tiempo_db_max_ms"], 2),
+                "tiempo_total_promedio_ms": round(datos["tiempo_total_ms"] / n, 2),
+                "mas_lenta_ms": round(datos["mas_lenta_ms"], 2),
+                "mas_lenta": datos["mas_lenta"],
+            })
+        return sorted(resumen, key=lambda r: r["consultas_promedio"], reverse=True)
+
+    def limpiar(self):
+        with self._lock:
+            self._rutas.clear()
+
+
+# Estadísticas por ruta de este proceso
+estadisticas_sql = EstadisticasRutas()
+
+
+def _server_timing(solicitud: ConsultasSolicitud) -> str:
+    valor = f'db;dur={solicitud.tiempo_ms:.1f};desc="{solicitud.consultas} consultas"'
+    if solicitud.consultas:
+        valor += f", db-max;dur={solicitud.mas_lenta_ms:.1f}"
+    return valor
+
+
+class InstrumentacionSQLMiddleware:
+    """
+    Middleware ASGI que abre un registro de consultas por solicitud. Al enviar
+    los encabezados agrega Server-Timing con las consultas hechas hasta ese
+    momento y al terminar acumula el total (incluido el cierre de la sesión) en
+    las estadísticas de la ruta.
+    """
+
+    def __init__(self, app, server_timing: bool = SQL_SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        solicitud = ConsultasSolicitud()
+        token = _solicitud_actual.set(solicitud)
+        token_ruta = _ruta_actual.set(f"{scope['method']} {scope['path']}")
+        inicio = time.perf_counter()
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start" and self.server_timing:
+                MutableHeaders(raw=mensaje["headers"]).append("Server-Timing", _server_timing(solicitud))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _solicitud_actual.reset(token)
+            _ruta_actual.reset(token_ruta)
+            # Plantilla de la ruta para no separar /pedidos/1 de /pedidos/2;
+            # las rutas no encontradas se agrupan juntas
+            ruta = getattr(scope.get("route"), "path", None) or "(sin ruta)"
+            estadisticas_sql.registrar(
+                f"{scope['method']} {ruta}", solicitud, (time.perf_counter() - inicio) * 1000
+            )
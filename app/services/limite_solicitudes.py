@@ -0,0 +1,169 @@
+import ipaddress
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+# Cargar variables de entorno
+load_dotenv()
+
+# "memoria" limita por proceso (con N workers el límite efectivo es N veces
+# mayor); "redis" comparte las cubetas entre todos los workers
+LIMITE_BACKEND = os.getenv("LIMITE_BACKEND", "memoria")
+LIMITE_REDIS_URL = os.getenv("LIMITE_REDIS_URL", os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+# Cubetas guardadas como máximo en memoria
+LIMITE_MAX_CUBETAS = int(os.getenv("LIMITE_MAX_CUBETAS", 10000))
+# Proxies de los que se acepta X-Forwarded-For (IPs o redes separadas por
+# comas, "*" para cualquiera). Sin configurar se usa la IP de la conexión.
+PROXIES_CONFIABLES = [
+    valor.strip() for valor in os.getenv("PROXIES_CONFIABLES", "").split(",") if valor.strip()
+]
+
+
+def _redes(valores) -> list:
+    return [ipaddress.ip_network(valor, strict=False) for valor in valores if valor != "*"]
+
+
+_REDES_CONFIABLES = _redes(PROXIES_CONFIABLES)
+_CUALQUIER_PROXY = "*" in PROXIES_CONFIABLES
+
+
+def es_proxy_confiable(ip: str) -> bool:
+    if _CUALQUIER_PROXY:
+        return True
+    try:
+        direccion = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(direccion in red for red in _REDES_CONFIABLES)
+
+
+def ip_cliente(request) -> str:
+    """
+    IP del cliente para los límites. Si la conexión llega desde un proxy
+    confiable se recorre X-Forwarded-For de derecha a izquierda saltando los
+    proxies confiables: la primera IP que no lo es la escribió el último proxy
+    propio y no la puede falsificar el cliente.
+    """
+    ip = request.client.host if request.client else "desconocida"
+    if not es_proxy_confiable(ip):
+        return ip
+    reenviadas = [
+        valor.strip()
+        for encabezado in request.headers.getlist("x-forwarded-for")
+        for valor in encabezado.split(",")
+        if valor.strip()
+    ]
+    for reenviada in reversed(reenviadas):
+        ip = reenviada
+        if not es_proxy_confiable(ip):
+            break
+    return ip
+
+
+class CubetasMemoria:
+    """
+    Cubetas de tokens en memoria del proceso. Cada clave tiene `capacidad`
+    tokens que se recargan de forma continua hasta llenarse en `periodo`
+    segundos; una solicitud consume un token.
+    """
+
+    def __init__(self, max_cubetas: int = LIMITE_MAX_CUBETAS):
+        self.max_cubetas = max_cubetas
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, clave: str, capacidad: int, periodo: float) -> float:
+        """Consume un token. Devuelve 0 si se permitió o los segundos hasta el siguiente token"""
+        ahora = time.monotonic()
+        recarga = capacidad / periodo
+        with self._lock:
+            tokens, ultimo = self._cubetas.get(clave, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - ultimo) * recarga)
+            if tokens < 1:
+                self._cubetas[clave] = (tokens, ahora)
+                return (1 - tokens) / recarga
+            self._cubetas[clave] = (tokens - 1, ahora)
+            if len(self._cubetas) > self.max_cubetas:
+                self._podar()
+            return 0
+
+    def _podar(self):
+        # Se descartan las que llevan más tiempo sin usarse: son las que más se
+        # recargaron y descartar una cubeta llena no cambia nada
+        viejas = sorted(self._cubetas.items(), key=lambda item: item[1][1])
+        for clave, _ in viejas[:len(viejas) - self.max_cubetas // 2]:
+            del self._cubetas[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._cubetas.clear()
+
+
+# Recarga y consumo atómicos en Redis: un hash por clave con los tokens y la
+# marca de tiempo, que expira cuando la cubeta se habría llenado sola
+_SCRIPT_CUBETA = """
+local capacidad = tonumber(ARGV[1])
+local periodo = tonumber(ARGV[2])
+local ahora = tonumber(ARGV[3])
+local recarga = capacidad / periodo
+local datos = redis.call('HMGET', KEYS[1], 'tokens', 'ultimo')
+local tokens = tonumber(datos[1]) or capacidad
+local ultimo = tonumber(datos[2]) or ahora
+tokens = math.min(capacidad, tokens + math.max(0, ahora - ultimo) * recarga)
+local espera = 0
+if tokens < 1 then
+    espera = (1 - tokens) / recarga
+else
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ultimo', ahora)
+redis.call('EXPIRE', KEYS[1], math.ceil(periodo))
+return tostring(espera)
+"""
+
+
+class CubetasRedis:
+    """Cubetas de tokens compartidas entre workers (requiere el paquete `redis`)"""
+
+    def __init__(self, url: str, prefijo: str = "foodplaza:limite:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("LIMITE_BACKEND=redis requiere instalar el paquete 'redis'")
+        self.cliente = redis.Redis.from_url(url)
+        self.prefijo = prefijo
+        self._script = self.cliente.register_script(_SCRIPT_CUBETA)
+
+    def consumir(self, clave: str, capacidad: int, periodo: float) -> float:
+        return float(self._script(keys=[self.prefijo + clave], args=[capacidad, periodo, time.time()]))
+
+    def limpiar(self):
+        for clave in self.cliente.scan_iter(f"{self.prefijo}*"):
+            self.cliente.delete(clave)
+
+
+def crear_cubetas():
+    if LIMITE_BACKEND == "redis":
+        return CubetasRedis(LIMITE_REDIS_URL)
+    return CubetasMemoria()
+
+
+# Cubetas de este proceso (o compartidas, con LIMITE_BACKEND=redis)
+cubetas = crear_cubetas()
+
+
+def limitar(*reglas: tuple):
+    """
+    Aplica las reglas (clave, capacidad, periodo) y lanza 429 con Retry-After si
+    alguna se agotó. Se revisan todas para que cada cubeta cuente el intento.
+    """
+    espera = max(cubetas.consumir(clave, capacidad, periodo) for clave, capacidad, periodo in reglas)
+    if espera > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas solicitudes, intente más tarde",
+            headers={"Retry-After": str(math.ceil(espera))}
+        )
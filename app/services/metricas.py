@@ -0,0 +1,144 @@
+import os
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Cargar variables de entorno
+load_dotenv()
+
+METRICAS_HABILITADAS = os.getenv("METRICAS_HABILITADAS", "true").lower() in ("1", "true", "si", "yes")
+# Si se define, /metrics exige "Authorization: Bearer <token>"
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN")
+# Con gunicorn cada worker escribe sus métricas en archivos de este directorio
+# y /metrics las suma (modo multiproceso de prometheus_client). Lo define
+# gunicorn.conf.py; sin él las métricas son solo del proceso actual.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+SIN_RUTA = "(sin ruta)"
+
+solicitudes = Counter(
+    "foodplaza_http_solicitudes_total",
+    "Solicitudes HTTP atendidas",
+    ["metodo", "ruta", "codigo"],
+)
+duracion_solicitudes = Histogram(
+    "foodplaza_http_duracion_segundos",
+    "Duración de las solicitudes HTTP hasta el último byte de la respuesta",
+    ["metodo", "ruta"],
+)
+solicitudes_en_curso = Gauge(
+    "foodplaza_http_en_curso",
+    "Solicitudes HTTP en curso",
+    multiprocess_mode="livesum",
+)
+conexiones_pool = Gauge(
+    "foodplaza_db_pool_conexiones",
+    "Conexiones del pool de base de datos en uso y de desborde",
+    ["estado"],
+    multiprocess_mode="livesum",
+)
+capacidad_pool = Gauge(
+    "foodplaza_db_pool_capacidad",
+    "Conexiones máximas del pool (pool_size + max_overflow)",
+    multiprocess_mode="livesum",
+)
+duracion_externa = Histogram(
+    "foodplaza_externo_duracion_segundos",
+    "Duración de las llamadas a servicios externos",
+    ["servicio", "operacion", "resultado"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+@contextmanager
+def medir_externo(servicio: str, operacion: str):
+    """Registra la duración de una llamada externa (Cloudinary, SMTP) con su resultado"""
+    inicio = time.perf_counter()
+    resultado = "error"
+    try:
+        yield
+        resultado = "ok"
+    finally:
+        duracion_externa.labels(servicio, operacion, resultado).observe(time.perf_counter() - inicio)
+
+
+def instrumentar_pool(engine, max_overflow: int):
+    """Actualiza los gauges del pool en cada checkout/checkin de este proceso"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+    capacidad_pool.set(pool.size() + max_overflow)
+
+    en_uso = conexiones_pool.labels("en_uso")
+    desborde = conexiones_pool.labels("desborde")
+
+    # El evento checkin se emite antes de que el pool descuente la conexión,
+    # así que "en uso" se lleva con inc/dec en lugar de leer checkedout()
+    def al_tomar(*_):
+        en_uso.inc()
+        desborde.set(max(0, pool.overflow()))
+
+    def al_devolver(*_):
+        en_uso.dec()
+        desborde.set(max(0, pool.overflow()))
+
+    event.listen(pool, "checkout", al_tomar)
+    event.listen(pool, "checkin", al_devolver)
+
+
+def exportar() -> tuple:
+    """Texto de Prometheus con las métricas de todos los workers (o de este proceso)"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro), CONTENT_TYPE_LATEST
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI que cuenta solicitudes por método, plantilla de ruta y
+    código, mide su duración y mantiene el gauge de solicitudes en curso. Se
+    usa la plantilla (/api/pedidos/{pedido_id}) y no la ruta concreta para no
+    crear una serie por id.
+    """
+
+    def __init__(self, app, excluir: tuple = ("/metrics",)):
+        self.app = app
+        self.excluir = excluir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluir:
+            await self.app(scope, receive, send)
+            return
+
+        codigo = 500
+        inicio = time.perf_counter()
+        solicitudes_en_curso.inc()
+
+        async def enviar(mensaje):
+            nonlocal codigo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            solicitudes_en_curso.dec()
+            ruta = getattr(scope.get("route"), "path", None) or SIN_RUTA
+            metodo = scope["method"]
+            solicitudes.labels(metodo, ruta, str(codigo)).inc()
+            duracion_solicitudes.labels(metodo, ruta).observe(time.perf_counter() - inicio)
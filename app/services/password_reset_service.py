@@ -1,91 +1,243 @@
+import hashlib
+import hmac
 import os
-import random
-import string
+import secrets
+import threading
+import time
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
 from dotenv import load_dotenv
 from ..models import ResetCodeDB
+from ..crud.purga import purgar_por_lotes
+from ..crud.usuarios import normalizar_email
+from .limite_solicitudes import limitar
+from .token_service import JWT_SECRET_KEY
 
 # Cargar variables de entorno
 load_dotenv()
 
+PASSWORD_RESET_CODE_EXPIRE_MINUTES = int(os.getenv("PASSWORD_RESET_CODE_EXPIRE_MINUTES", 15))
+PASSWORD_RESET_CODE_LENGTH = int(os.getenv("PASSWORD_RESET_CODE_LENGTH", 6))
+# Dónde se guardan los códigos: "sql" (tabla reset_codes), "memoria" (solo
+# sirve con un único proceso) o "redis" (compartido y con expiración propia)
+PASSWORD_RESET_BACKEND = os.getenv("PASSWORD_RESET_BACKEND", "sql")
+PASSWORD_RESET_REDIS_URL = os.getenv("PASSWORD_RESET_REDIS_URL", os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+# Clave del HMAC de los códigos; cambiarla invalida los códigos vigentes
+PASSWORD_RESET_SECRET = os.getenv("PASSWORD_RESET_SECRET") or JWT_SECRET_KEY
+
+# Cubetas de tokens: capacidad por correo / por IP y segundos en recargarse por completo
+PASSWORD_RESET_LIMITE_EMAIL = int(os.getenv("PASSWORD_RESET_LIMITE_EMAIL", 3))
+PASSWORD_RESET_LIMITE_IP = int(os.getenv("PASSWORD_RESET_LIMITE_IP", 10))
+PASSWORD_RESET_LIMITE_PERIODO = int(os.getenv("PASSWORD_RESET_LIMITE_PERIODO", 900))
+# Intentos de verificación por correo / por IP en el mismo periodo
+PASSWORD_RESET_VERIFICAR_EMAIL = int(os.getenv("PASSWORD_RESET_VERIFICAR_EMAIL", 5))
+PASSWORD_RESET_VERIFICAR_IP = int(os.getenv("PASSWORD_RESET_VERIFICAR_IP", 20))
+
+# 128 bits del HMAC en hex: cabe en reset_codes.code (VARCHAR(32))
+LONGITUD_HUELLA = 32
+
+
+def huella_codigo(email: str, codigo: str) -> str:
+    """HMAC del código ligado al correo: el mismo código de otro correo da otra huella"""
+    return hmac.new(
+        PASSWORD_RESET_SECRET.encode(), f"{email}:{codigo}".encode(), hashlib.sha256
+    ).hexdigest()[:LONGITUD_HUELLA]
+
+
+def limitar_solicitud(email: str, ip: str):
+    """429 si el correo o la IP pidieron demasiados códigos; se llama antes de tocar la base de datos o el SMTP"""
+    limitar(
+        (f"reset:email:{normalizar_email(email)}", PASSWORD_RESET_LIMITE_EMAIL, PASSWORD_RESET_LIMITE_PERIODO),
+        (f"reset:ip:{ip}", PASSWORD_RESET_LIMITE_IP, PASSWORD_RESET_LIMITE_PERIODO),
+    )
+
+
+def limitar_verificacion(email: str, ip: str):
+    """429 si se intentaron demasiados códigos para el correo o desde la IP"""
+    limitar(
+        (f"reset-verificar:email:{normalizar_email(email)}", PASSWORD_RESET_VERIFICAR_EMAIL, PASSWORD_RESET_LIMITE_PERIODO),
+        (f"reset-verificar:ip:{ip}", PASSWORD_RESET_VERIFICAR_IP, PASSWORD_RESET_LIMITE_PERIODO),
+    )
+
+
+class CodigosSQL:
+    """Códigos en la tabla reset_codes; las filas vencidas se eliminan con purgar()"""
+
+    def guardar(self, db: Session, email: str, huella: str, expira_en: datetime):
+        # Invalida los códigos anteriores y agrega el nuevo sin confirmar: la
+        # transacción se confirma junto con el correo encolado
+        db.query(ResetCodeDB).filter(
+            ResetCodeDB.email == email,
+            ResetCodeDB.used == False
+        ).update({"used": True}, synchronize_session=False)
+        db.add(ResetCodeDB(email=email, code=huella, expires_at=expira_en, used=False))
+
+    def _vigente(self, db: Session, email: str, huella: str):
+        codigos = db.query(ResetCodeDB.id, ResetCodeDB.code).filter(
+            ResetCodeDB.email == email,
+            ResetCodeDB.used == False,
+            ResetCodeDB.expires_at > datetime.utcnow()
+        ).all()
+        # Se recorren todos los candidatos para que el tiempo no dependa de cuál coincide
+        encontrado = None
+        for codigo_id, guardada in codigos:
+            if hmac.compare_digest(guardada, huella):
+                encontrado = codigo_id
+        return encontrado
+
+    def validar(self, db: Session, email: str, huella: str) -> bool:
+        return self._vigente(db, email, huella) is not None
+
+    def consumir(self, db: Session, email: str, huella: str) -> bool:
+        codigo_id = self._vigente(db, email, huella)
+        if codigo_id is None:
+            return False
+        # UPDATE condicional: si dos solicitudes usan el mismo código, solo una lo consume
+        usados = db.query(ResetCodeDB).filter(
+            ResetCodeDB.id == codigo_id,
+            ResetCodeDB.used == False
+        ).update({"used": True}, synchronize_session=False)
+        db.commit()
+        return usados == 1
+
+    def purgar(self, db: Session, lote: int = 1000) -> int:
+        """Elimina hasta `lote` códigos vencidos; devuelve cuántos borró"""
+        return purgar_por_lotes(db, ResetCodeDB, ResetCodeDB.expires_at <= datetime.utcnow(), lote=lote)
+
+
+class CodigosMemoria:
+    """
+    Un código vigente por correo en memoria del proceso, con expiración. Solo
+    sirve con un único worker: el código debe verificarse en el mismo proceso
+    que lo creó.
+    """
+
+    def __init__(self):
+        self._codigos = {}
+        self._lock = threading.Lock()
+        self._proxima_purga = 0
+
+    def guardar(self, db: Session, email: str, huella: str, expira_en: datetime):
+        ahora = time.time()
+        ttl = (expira_en - datetime.utcnow()).total_seconds()
+        with self._lock:
+            self._codigos[email] = (huella, ahora + ttl)
+            if ahora >= self._proxima_purga:
+                self._proxima_purga = ahora + 60
+                for clave in [c for c, (_, expira) in self._codigos.items() if expira <= ahora]:
+                    del self._codigos[clave]
+
+    def _coincide(self, email: str, huella: str) -> bool:
+        guardado = self._codigos.get(email)
+        return guardado is not None and guardado[1] > time.time() and hmac.compare_digest(guardado[0], huella)
+
+    def validar(self, db: Session, email: str, huella: str) -> bool:
+        with self._lock:
+            return self._coincide(email, huella)
+
+    def consumir(self, db: Session, email: str, huella: str) -> bool:
+        with self._lock:
+            if not self._coincide(email, huella):
+                return False
+            del self._codigos[email]
+            return True
+
+    def purgar(self, db: Session, lote: int = 1000) -> int:
+        return 0
+
+
+# Borra la clave solo si sigue guardando la huella ya comparada en Python
+_SCRIPT_CONSUMIR = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class CodigosRedis:
+    """Un código vigente por correo en Redis; la expiración la aplica Redis (requiere el paquete `redis`)"""
+
+    def __init__(self, url: str, prefijo: str = "foodplaza:reset:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("PASSWORD_RESET_BACKEND=redis requiere instalar el paquete 'redis'")
+        self.cliente = redis.Redis.from_url(url)
+        self.prefijo = prefijo
+        self._consumir = self.cliente.register_script(_SCRIPT_CONSUMIR)
+
+    def guardar(self, db: Session, email: str, huella: str, expira_en: datetime):
+        ttl = max(1, int((expira_en - datetime.utcnow()).total_seconds()))
+        self.cliente.set(self.prefijo + email, huella, ex=ttl)
+
+    def validar(self, db: Session, email: str, huella: str) -> bool:
+        guardada = self.cliente.get(self.prefijo + email)
+        return guardada is not None and hmac.compare_digest(guardada.decode(), huella)
+
+    def consumir(self, db: Session, email: str, huella: str) -> bool:
+        if not self.validar(db, email, huella):
+            return False
+        return self._consumir(keys=[self.prefijo + email], args=[huella]) == 1
+
+    def purgar(self, db: Session, lote: int = 1000) -> int:
+        return 0
+
+
+def crear_almacen():
+    if PASSWORD_RESET_BACKEND == "redis":
+        return CodigosRedis(PASSWORD_RESET_REDIS_URL)
+    if PASSWORD_RESET_BACKEND == "memoria":
+        return CodigosMemoria()
+    return CodigosSQL()
+
+
+# Almacén de códigos de este proceso
+almacen_codigos = crear_almacen()
+
+
 class PasswordResetService:
     def __init__(self, db: Session):
         self.db = db
-        self.code_expire_minutes = int(os.getenv("PASSWORD_RESET_CODE_EXPIRE_MINUTES", 15))
-        self.code_length = int(os.getenv("PASSWORD_RESET_CODE_LENGTH", 6))
-    
+        self.code_expire_minutes = PASSWORD_RESET_CODE_EXPIRE_MINUTES
+        self.code_length = PASSWORD_RESET_CODE_LENGTH
+        self.almacen = almacen_codigos
+
     def generate_verification_code(self) -> str:
         """Genera un código de verificación numérico"""
-        return ''.join(random.choices(string.digits, k=self.code_length))
-    
-    def create_reset_code(self, email: str) -> ResetCodeDB:
+        return ''.join(secrets.choice("0123456789") for _ in range(self.code_length))
+
+    def create_reset_code(self, email: str) -> str:
         """
-        Crea un nuevo código de restablecimiento para el correo electrónico proporcionado.
-        Si ya existe un código sin usar para este correo, lo invalida.
+        Crea un nuevo código de restablecimiento para el correo electrónico
+        proporcionado, invalidando el anterior, y lo devuelve en claro para
+        enviarlo. Solo se guarda su HMAC. Con el almacén SQL no confirma: el
+        código se confirma en la misma transacción que el correo encolado.
         """
-        # Invalidar códigos existentes para este correo
-        self.db.query(ResetCodeDB).filter(
-            ResetCodeDB.email == email,
-            ResetCodeDB.used == False
-        ).update({"used": True})
-        self.db.commit()
-        
-        # Crear nuevo código
+        email = normalizar_email(email)
+        codigo = self.generate_verification_code()
         expires_at = datetime.utcnow() + timedelta(minutes=self.code_expire_minutes)
-        new_code = ResetCodeDB(
-            email=email,
-            code=self.generate_verification_code(),
-            expires_at=expires_at,
-            used=False
-        )
-        
-        self.db.add(new_code)
-        self.db.commit()
-        self.db.refresh(new_code)
-        
-        return new_code
-    
+        self.almacen.guardar(self.db, email, huella_codigo(email, codigo), expires_at)
+        return codigo
+
     def verify_reset_code(self, email: str, code: str) -> bool:
         """
-        Verifica si el código de restablecimiento es válido para el correo electrónico dado.
-        Un código es válido si:
-        1. Existe en la base de datos
-        2. No ha sido usado
-        3. No ha expirado
-        4. Corresponde al correo electrónico
+        Verifica el código y lo marca como usado. Un código es válido si
+        corresponde al correo, no fue usado y no ha expirado. La comparación es
+        en tiempo constante.
         """
-        current_time = datetime.utcnow()
-        
-        reset_code = self.db.query(ResetCodeDB).filter(
-            ResetCodeDB.email == email,
-            ResetCodeDB.code == code,
-            ResetCodeDB.used == False,
-            ResetCodeDB.expires_at > current_time
-        ).first()
-        
-        if not reset_code:
-            return False
-            
-        # Marcar el código como usado
-        reset_code.used = True
-        self.db.commit()
-        
-        return True
-    
+        email = normalizar_email(email)
+        return self.almacen.consumir(self.db, email, huella_codigo(email, code))
+
     def is_valid_reset_code(self, email: str, code: str) -> bool:
         """
         Verifica si el código de restablecimiento es válido sin marcarlo como usado.
         Útil para validar antes de permitir el cambio de contraseña.
         """
-        current_time = datetime.utcnow()
-        
-        reset_code = self.db.query(ResetCodeDB).filter(
-            ResetCodeDB.email == email,
-            ResetCodeDB.code == code,
-            ResetCodeDB.used == False,
-            ResetCodeDB.expires_at > current_time
-        ).first()
-        
-        return reset_code is not None
+        email = normalizar_email(email)
+        return self.almacen.validar(self.db, email, huella_codigo(email, code))
+
+
+def purgar_codigos_vencidos(db: Session, lote: int = 1000) -> int:
+    """Elimina hasta `lote` códigos vencidos del almacén SQL; los otros almacenes expiran solos"""
+    return almacen_codigos.purgar(db, lote)
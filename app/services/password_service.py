@@ -0,0 +1,45 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+from passlib.context import CryptContext
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Costo de bcrypt (2^rounds iteraciones). Al cambiarlo, los hashes existentes
+# se actualizan en el siguiente inicio de sesión de cada usuario.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Hashes simultáneos por proceso. bcrypt libera el GIL, así que con un hilo por
+# núcleo se usa toda la CPU sin que los inicios de sesión saturen el threadpool
+# de los endpoints ni detengan el event loop.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+ejecutor_hash = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+def hash_password(password: str) -> str:
+    """Genera el hash de una contraseña en el pool de bcrypt (para código síncrono)"""
+    return ejecutor_hash.submit(pwd_context.hash, password).result()
+
+
+def verify_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica una contraseña en el pool de bcrypt (para código síncrono).
+    Devuelve (valida, nuevo_hash); nuevo_hash no es None si el hash guardado
+    usa un costo distinto de BCRYPT_ROUNDS y debe reemplazarse.
+    """
+    return ejecutor_hash.submit(pwd_context.verify_and_update, password, hashed).result()
+
+
+async def hash_password_async(password: str) -> str:
+    """Versión no bloqueante de `hash_password`"""
+    return await asyncio.wrap_future(ejecutor_hash.submit(pwd_context.hash, password))
+
+
+async def verify_password_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Versión no bloqueante de `verify_password`"""
+    return await asyncio.wrap_future(ejecutor_hash.submit(pwd_context.verify_and_update, password, hashed))
@@ -0,0 +1,125 @@
+import os
+import time
+import uuid
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from ..schemas.auth import UsuarioToken
+
+# Cargar variables de entorno
+load_dotenv()
+
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+if not JWT_SECRET_KEY:
+    # Una clave generada por proceso no serviría entre workers ni tras un
+    # reinicio, y es también la clave por defecto del HMAC de los códigos de
+    # restablecimiento: sin ella la aplicación no arranca
+    raise RuntimeError("JWT_SECRET_KEY no está configurada")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_ACCESS_MINUTES = int(os.getenv("JWT_ACCESS_MINUTES", 15))
+JWT_REFRESH_DAYS = int(os.getenv("JWT_REFRESH_DAYS", 7))
+# Tokens verificados que se recuerdan por proceso (evita repetir la firma HMAC)
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 4096))
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+esquema_bearer = HTTPBearer(auto_error=False)
+
+
+def _crear_token(usuario_id: int, rol: str, tipo: str, duracion: int) -> str:
+    ahora = int(time.time())
+    claims = {
+        "sub": str(usuario_id),
+        "rol": rol,
+        "tipo": tipo,
+        "iat": ahora,
+        "exp": ahora + duracion,
+        "jti": uuid.uuid4().hex,
+    }
+    return jwt.encode(claims, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+
+def crear_tokens(usuario) -> dict:
+    """Emite el par de tokens (acceso y renovación) para un usuario"""
+    duracion_acceso = JWT_ACCESS_MINUTES * 60
+    return {
+        "access_token": _crear_token(usuario.id, usuario.rol, ACCESS, duracion_acceso),
+        "refresh_token": _crear_token(usuario.id, usuario.rol, REFRESH, JWT_REFRESH_DAYS * 86400),
+        "token_type": "bearer",
+        "expires_in": duracion_acceso,
+    }
+
+
+@lru_cache(maxsize=JWT_CACHE_SIZE)
+def _decodificar(token: str) -> dict:
+    # La expiración se comprueba en cada uso (ver verificar_token), no aquí,
+    # para que un token en caché deje de valer al expirar
+    return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], options={"verify_exp": False})
+
+
+def verificar_token(token: str, tipo: str = ACCESS) -> dict:
+    """
+    Devuelve los claims de un token válido del tipo indicado o lanza ValueError.
+    Solo verifica firma y expiración: no consulta la base de datos.
+    """
+    try:
+        claims = _decodificar(token)
+    except JWTError:
+        raise ValueError("Token inválido")
+    if claims.get("tipo") != tipo:
+        raise ValueError("Tipo de token incorrecto")
+    if claims.get("exp", 0) < time.time():
+        raise ValueError("El token ha expirado")
+    return claims
+
+
+def _usuario_desde_credenciales(credenciales: Optional[HTTPAuthorizationCredentials]) -> Optional[UsuarioToken]:
+    if credenciales is None:
+        return None
+    try:
+        claims = verificar_token(credenciales.credentials, ACCESS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return UsuarioToken(id=int(claims["sub"]), rol=claims["rol"])
+
+
+def obtener_usuario_opcional(
+    credenciales: Optional[HTTPAuthorizationCredentials] = Depends(esquema_bearer)
+) -> Optional[UsuarioToken]:
+    """Dependencia: usuario del token si se envió uno (401 si es inválido), o None"""
+    return _usuario_desde_credenciales(credenciales)
+
+
+def obtener_usuario_actual(
+    credenciales: Optional[HTTPAuthorizationCredentials] = Depends(esquema_bearer)
+) -> UsuarioToken:
+    """Dependencia: usuario autenticado por el token de acceso (401 si falta o es inválido)"""
+    usuario = _usuario_desde_credenciales(credenciales)
+    if usuario is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No autenticado",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return usuario
+
+
+def require_roles(*roles: str):
+    """Dependencia que exige uno de los roles indicados (403 si no lo tiene)"""
+    def verificar_rol(usuario: UsuarioToken = Depends(obtener_usuario_actual)) -> UsuarioToken:
+        if usuario.rol not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tiene permisos para realizar esta acción"
+            )
+        return usuario
+    return verificar_rol
@@ -0,0 +1 @@
+# Scripts de benchmark de la API (se ejecutan con: python -m benchmarks.<modulo>)
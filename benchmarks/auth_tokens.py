@@ -0,0 +1,86 @@
+"""
+Costo de autenticar una solicitud: JWT frente a sesión en base de datos.
+
+Compara, por llamada:
+  - verificación del token de acceso con la caché de claims
+  - verificación del token sin caché (firma HMAC + decodificación)
+  - consulta del usuario en la base de datos (lo que haría una sesión en servidor)
+
+Luego llama N veces a un endpoint protegido por rol y cuenta las consultas SQL.
+
+Uso:
+    python -m benchmarks.auth_tokens --iteraciones 20000
+"""
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal, create_tables, engine
+from app.main import app
+from app.models import UsuarioDB
+from app.services.token_service import _decodificar, crear_tokens, verificar_token
+
+
+def obtener_admin():
+    db = SessionLocal()
+    try:
+        admin = db.query(UsuarioDB).filter(UsuarioDB.email == "bench_admin@bench.foodplaza.com").first()
+        if admin is None:
+            admin = UsuarioDB(nombre="bench admin", email="bench_admin@bench.foodplaza.com",
+                              password="-", rol="administrador", estado="activo")
+            db.add(admin)
+            db.commit()
+            db.refresh(admin)
+        return admin.id, admin.rol
+    finally:
+        db.close()
+
+
+def medir(nombre: str, iteraciones: int, funcion):
+    inicio = time.perf_counter()
+    for _ in range(iteraciones):
+        funcion()
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<32} {duracion / iteraciones * 1e6:9.1f} µs/llamada")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iteraciones", type=int, default=20000)
+    parser.add_argument("--solicitudes", type=int, default=500)
+    args = parser.parse_args()
+
+    create_tables()
+    usuario_id, rol = obtener_admin()
+    token = crear_tokens(UsuarioDB(id=usuario_id, rol=rol))["access_token"]
+
+    def sesion_en_bd():
+        db = SessionLocal()
+        try:
+            db.query(UsuarioDB.id, UsuarioDB.rol).filter(
+                UsuarioDB.id == usuario_id, UsuarioDB.estado == "activo"
+            ).one()
+        finally:
+            db.close()
+
+    medir("JWT (claims en caché)", args.iteraciones, lambda: verificar_token(token))
+    medir("JWT (sin caché)", args.iteraciones, lambda: _decodificar.__wrapped__(token))
+    medir("Sesión en base de datos", max(1, args.iteraciones // 10), sesion_en_bd)
+
+    consultas = []
+    event.listen(engine, "before_cursor_execute", lambda *a: consultas.append(a[2]))
+    with TestClient(app) as cliente:
+        consultas.clear()
+        encabezados = {"Authorization": f"Bearer {token}"}
+        inicio = time.perf_counter()
+        for _ in range(args.solicitudes):
+            assert cliente.get("/api/admin/cache", headers=encabezados).status_code == 200
+        duracion = time.perf_counter() - inicio
+    print(f"GET /api/admin/cache x{args.solicitudes}: {duracion / args.solicitudes * 1000:.2f} ms/solicitud, "
+          f"consultas SQL: {len(consultas)}")
+
+
+if __name__ == "__main__":
+    main()
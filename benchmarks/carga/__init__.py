@@ -0,0 +1,14 @@
+"""
+Pruebas de carga reproducibles de la API.
+
+Siembra una base de datos local con volúmenes realistas y ejecuta una mezcla
+de escenarios (lecturas del catálogo, creación de pedidos y consultas de
+cocina) contra la aplicación ASGI en proceso, contra uvicorn en un hilo o
+contra un servidor ya levantado. Reporta p50/p95/p99 y throughput por
+endpoint y puede compararlos con una ejecución base para detectar regresiones.
+
+Uso:
+    DATABASE_URL=sqlite:////tmp/carga.db python -m benchmarks.carga sembrar --escala pequena
+    DATABASE_URL=sqlite:////tmp/carga.db python -m benchmarks.carga ejecutar --duracion 30 --salida base.json
+    DATABASE_URL=sqlite:////tmp/carga.db python -m benchmarks.carga ejecutar --duracion 30 --comparar base.json
+"""
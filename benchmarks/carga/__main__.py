@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import sys
+
+from . import __doc__ as DESCRIPCION
+from .escenarios import MEZCLA_PREDETERMINADA, cargar_contexto, parsear_mezcla
+from .reporte import comparar, guardar, imprimir
+from .sembrar import ESCALAS, sembrar
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.carga", description=DESCRIPCION,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_sembrar = comandos.add_parser("sembrar", help="Crear datos de prueba")
+    p_sembrar.add_argument("--escala", choices=list(ESCALAS), default="minima")
+    p_sembrar.add_argument("--semilla", type=int, default=42)
+
+    p_ejecutar = comandos.add_parser("ejecutar", help="Ejecutar la mezcla de escenarios y reportar percentiles")
+    p_ejecutar.add_argument("--modo", choices=("proceso", "uvicorn", "url"), default="proceso")
+    p_ejecutar.add_argument("--url", help="Servidor para --modo url (p. ej. http://localhost:8000)")
+    p_ejecutar.add_argument("--mezcla", type=parsear_mezcla,
+                            default=MEZCLA_PREDETERMINADA, help="Pesos, p. ej. catalogo=70,pedidos=10,cocina=20")
+    p_ejecutar.add_argument("--concurrencia", type=int, default=16)
+    p_ejecutar.add_argument("--duracion", type=float, default=30, help="Segundos medidos")
+    p_ejecutar.add_argument("--calentamiento", type=float, default=3, help="Segundos iniciales que no se miden")
+    p_ejecutar.add_argument("--semilla", type=int, default=42)
+    p_ejecutar.add_argument("--salida", help="Guardar el resumen en JSON (sirve como base para --comparar)")
+    p_ejecutar.add_argument("--comparar", help="Resumen JSON de una ejecución base")
+    p_ejecutar.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento permitido (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    if args.comando == "sembrar":
+        conteo = sembrar(args.escala, args.semilla)
+        print(f"Datos creados: {conteo}")
+        return
+
+    if args.modo == "url" and not args.url:
+        parser.error("--modo url requiere --url")
+
+    async def correr():
+        from .ejecutar import crear_cliente, ejecutar
+        contexto = cargar_contexto(args.semilla)
+        async with crear_cliente(args.modo, args.concurrencia, args.url) as cliente:
+            return await ejecutar(
+                cliente, contexto, args.mezcla, args.concurrencia,
+                args.duracion, args.calentamiento, args.semilla
+            )
+
+    resumen = asyncio.run(correr())
+    resumen.update(modo=args.modo, concurrencia=args.concurrencia, mezcla=args.mezcla)
+    imprimir(resumen)
+    if args.salida:
+        guardar(resumen, args.salida)
+    if args.comparar:
+        regresiones = comparar(resumen, args.comparar, args.tolerancia)
+        if regresiones:
+            print(f"\nRegresiones respecto a {args.comparar} (tolerancia {args.tolerancia:.0%}):")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            sys.exit(1)
+        print(f"\nSin regresiones respecto a {args.comparar}")
+
+
+if __name__ == "__main__":
+    main()
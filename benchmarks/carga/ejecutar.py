@@ -0,0 +1,99 @@
+"""Ejecución de la mezcla de escenarios con trabajadores concurrentes en lazo cerrado"""
+import asyncio
+import random
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+from .escenarios import ESCENARIOS, Contexto, iniciar_sesion
+from .reporte import Registro
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def crear_cliente(modo: str, concurrencia: int, url: str = None):
+    """
+    Cliente HTTP según el modo:
+    - proceso: transporte ASGI directo, sin red (mide la aplicación sola).
+    - uvicorn: levanta uvicorn en un hilo de este proceso y lo usa por HTTP.
+    - url: un servidor ya levantado (p. ej. gunicorn con el Procfile).
+    """
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    if modo == "url":
+        async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as cliente:
+            yield cliente
+        return
+
+    from app.main import app
+    if modo == "proceso":
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as cliente:
+            yield cliente
+        return
+
+    import uvicorn
+    puerto = _puerto_libre()
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning", access_log=False))
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    while not servidor.started:
+        await asyncio.sleep(0.05)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{puerto}", limits=limites, timeout=60) as cliente:
+            yield cliente
+    finally:
+        servidor.should_exit = True
+        hilo.join(timeout=10)
+
+
+async def ejecutar(
+    cliente: httpx.AsyncClient,
+    contexto: Contexto,
+    mezcla: dict,
+    concurrencia: int,
+    duracion: float,
+    calentamiento: float = 0,
+    semilla: int = 42,
+) -> dict:
+    """
+    Lanza `concurrencia` trabajadores que envían solicitudes una tras otra
+    durante `calentamiento` + `duracion` segundos; solo se miden las que
+    empiezan después del calentamiento.
+    """
+    await iniciar_sesion(cliente, contexto)
+    nombres = list(mezcla)
+    pesos = [mezcla[nombre] for nombre in nombres]
+    registro = Registro()
+    inicio_medicion = time.perf_counter() + calentamiento
+    fin = inicio_medicion + duracion
+
+    async def trabajador(numero: int):
+        # Una semilla por trabajador: la secuencia de solicitudes es reproducible
+        azar = random.Random(semilla * 1000 + numero)
+        while True:
+            inicio = time.perf_counter()
+            if inicio >= fin:
+                return
+            solicitud = ESCENARIOS[azar.choices(nombres, pesos)[0]](contexto, azar)
+            encabezados = {"Authorization": f"Bearer {solicitud.token}"} if solicitud.token else None
+            try:
+                respuesta = await cliente.request(solicitud.metodo, solicitud.url, json=solicitud.json, headers=encabezados)
+                codigo = respuesta.status_code
+            except httpx.HTTPError:
+                respuesta, codigo = None, 0
+            segundos = time.perf_counter() - inicio
+            correcto = codigo in solicitud.esperados
+            if correcto and solicitud.al_responder is not None:
+                solicitud.al_responder(respuesta)
+            if inicio >= inicio_medicion:
+                registro.agregar(solicitud.etiqueta, segundos, codigo, not correcto)
+
+    await asyncio.gather(*(trabajador(numero) for numero in range(concurrencia)))
+    return registro.resumen(duracion)
@@ -0,0 +1,157 @@
+"""
+Escenarios de carga: cada uno elige la siguiente solicitud a partir de una
+muestra de ids reales de la base de datos.
+
+- catalogo: lecturas del catálogo (plazas, locales por plaza, catálogo de un
+  local y productos de un menú).
+- pedidos: creación de pedidos con 1 a 4 productos disponibles del local.
+- cocina: consulta de pedidos pendientes de un local y avance de estado de
+  los pedidos creados durante la prueba.
+"""
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.database import SessionLocal
+from app.models import LocaleDB, MenuDB, PlazaDB, ProductoDB, UsuarioDB
+
+from .sembrar import DOMINIO, PASSWORD
+
+MEZCLA_PREDETERMINADA = {"catalogo": 70, "pedidos": 10, "cocina": 20}
+# Locales de la muestra: suficientes para no leer siempre las mismas filas
+LOCALES_MUESTRA = 200
+
+
+@dataclass
+class Solicitud:
+    etiqueta: str
+    metodo: str
+    url: str
+    json: Optional[dict] = None
+    token: Optional[str] = None
+    # Códigos que no cuentan como error (p. ej. 409 al avanzar un pedido que otro trabajador ya avanzó)
+    esperados: tuple = (200,)
+    # Se llama con la respuesta cuando el código es uno de los esperados
+    al_responder: Optional[Callable] = None
+
+
+@dataclass
+class Contexto:
+    plazas: List[int]
+    locales: List[int]
+    menus: List[int]
+    productos_por_local: Dict[int, List[tuple]]
+    email_cliente: str
+    email_gerente: str
+    token_cliente: Optional[str] = None
+    token_gerente: Optional[str] = None
+    # Pedidos creados en la prueba que la cocina puede avanzar
+    pedidos_creados: deque = field(default_factory=lambda: deque(maxlen=10000))
+
+
+def cargar_contexto(semilla: int = 42) -> Contexto:
+    """Toma una muestra de plazas, locales, menús y productos y los usuarios de prueba"""
+    azar = random.Random(semilla)
+    db = SessionLocal()
+    try:
+        plazas = [fila.id for fila in db.query(PlazaDB.id)]
+        locales = [fila.id for fila in db.query(LocaleDB.id)]
+        if not plazas or not locales:
+            raise RuntimeError("La base de datos no tiene datos de prueba: ejecute primero 'sembrar'")
+        muestra = azar.sample(locales, min(LOCALES_MUESTRA, len(locales)))
+
+        menus = db.query(MenuDB.id, MenuDB.id_local).filter(MenuDB.id_local.in_(muestra)).all()
+        productos_por_local = {}
+        for id_producto, precio, id_local in db.query(ProductoDB.id, ProductoDB.precio, MenuDB.id_local).join(
+            MenuDB, MenuDB.id == ProductoDB.id_menu
+        ).filter(MenuDB.id_local.in_(muestra), ProductoDB.disponible == True):
+            productos_por_local.setdefault(id_local, []).append((id_producto, float(precio)))
+
+        def email_de(rol: str) -> str:
+            usuario = db.query(UsuarioDB.email).filter(
+                UsuarioDB.rol == rol, UsuarioDB.email.like(f"bench_%@{DOMINIO}")
+            ).first()
+            if usuario is None:
+                raise RuntimeError(f"No hay usuarios de prueba con rol '{rol}': ejecute primero 'sembrar'")
+            return usuario.email
+
+        return Contexto(
+            plazas=plazas,
+            locales=[local for local in muestra if local in productos_por_local],
+            menus=[menu.id for menu in menus],
+            productos_por_local=productos_por_local,
+            email_cliente=email_de("usuario"),
+            email_gerente=email_de("gerente"),
+        )
+    finally:
+        db.close()
+
+
+async def iniciar_sesion(cliente, contexto: Contexto):
+    """Obtiene los tokens del cliente y del gerente de prueba"""
+    for email, atributo in ((contexto.email_cliente, "token_cliente"), (contexto.email_gerente, "token_gerente")):
+        respuesta = await cliente.post("/api/usuarios/login", json={"email": email, "password": PASSWORD})
+        respuesta.raise_for_status()
+        setattr(contexto, atributo, respuesta.json()["access_token"])
+
+
+def catalogo(contexto: Contexto, azar: random.Random) -> Solicitud:
+    opcion = azar.random()
+    if opcion < 0.2:
+        return Solicitud("GET /api/plazas/", "GET", "/api/plazas/?limit=20")
+    if opcion < 0.45:
+        return Solicitud("GET /api/locales/?plaza_id", "GET", f"/api/locales/?plaza_id={azar.choice(contexto.plazas)}&limit=20")
+    if opcion < 0.8:
+        return Solicitud("GET /api/locales/{id}/catalogo", "GET", f"/api/locales/{azar.choice(contexto.locales)}/catalogo")
+    return Solicitud("GET /api/productos/menu/{id}", "GET", f"/api/productos/menu/{azar.choice(contexto.menus)}")
+
+
+def pedidos(contexto: Contexto, azar: random.Random) -> Solicitud:
+    id_local = azar.choice(contexto.locales)
+    disponibles = contexto.productos_por_local[id_local]
+    items = [
+        {"id_producto": id_producto, "cantidad": azar.randint(1, 3), "precio_unitario": precio}
+        for id_producto, precio in azar.sample(disponibles, min(len(disponibles), azar.randint(1, 4)))
+    ]
+    return Solicitud(
+        "POST /api/pedidos/", "POST", "/api/pedidos/",
+        json={"id_local": id_local, "items": items},
+        token=contexto.token_cliente, esperados=(201,),
+        al_responder=lambda respuesta: contexto.pedidos_creados.append((respuesta.json()["id"], None))
+    )
+
+
+SIGUIENTE_ESTADO = {None: "en_preparacion", "en_preparacion": "listo_para_recoger", "listo_para_recoger": "completado"}
+
+
+def cocina(contexto: Contexto, azar: random.Random) -> Solicitud:
+    if contexto.pedidos_creados and azar.random() < 0.3:
+        pedido_id, estado = contexto.pedidos_creados.popleft()
+        siguiente = SIGUIENTE_ESTADO[estado]
+        if siguiente != "completado":
+            contexto.pedidos_creados.append((pedido_id, siguiente))
+        return Solicitud(
+            "PATCH /api/pedidos/{id}", "PATCH", f"/api/pedidos/{pedido_id}",
+            json={"estado_pedido": siguiente}, token=contexto.token_gerente, esperados=(200, 409)
+        )
+    return Solicitud(
+        "GET /api/pedidos/local/{id}?estado=pendiente", "GET",
+        f"/api/pedidos/local/{azar.choice(contexto.locales)}?estado=pendiente&limit=20",
+        token=contexto.token_gerente
+    )
+
+
+ESCENARIOS = {"catalogo": catalogo, "pedidos": pedidos, "cocina": cocina}
+
+
+def parsear_mezcla(texto: str) -> dict:
+    """'catalogo=70,pedidos=10,cocina=20' → {'catalogo': 70, ...}"""
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        nombre = nombre.strip()
+        if nombre not in ESCENARIOS:
+            raise ValueError(f"Escenario desconocido '{nombre}'. Disponibles: {', '.join(ESCENARIOS)}")
+        mezcla[nombre] = float(peso or 1)
+    return mezcla
@@ -0,0 +1,83 @@
+"""Percentiles por endpoint y comparación contra una ejecución base"""
+import json
+from collections import defaultdict
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+class Registro:
+    """Latencias y errores por etiqueta de endpoint"""
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.codigos = defaultdict(lambda: defaultdict(int))
+
+    def agregar(self, etiqueta: str, segundos: float, codigo: int, error: bool):
+        self.latencias[etiqueta].append(segundos)
+        self.codigos[etiqueta][codigo] += 1
+        if error:
+            self.errores[etiqueta] += 1
+
+    def resumen(self, duracion: float) -> dict:
+        def fila(latencias, errores):
+            return {
+                "solicitudes": len(latencias),
+                "errores": errores,
+                "por_segundo": round(len(latencias) / duracion, 1),
+                "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+                "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+                "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+                "max_ms": round(max(latencias) * 1000, 2),
+            }
+
+        endpoints = {
+            etiqueta: dict(fila(latencias, self.errores[etiqueta]), codigos=dict(self.codigos[etiqueta]))
+            for etiqueta, latencias in sorted(self.latencias.items())
+        }
+        todas = [valor for latencias in self.latencias.values() for valor in latencias]
+        total = fila(todas, sum(self.errores.values())) if todas else {}
+        return {"duracion_s": round(duracion, 2), "total": total, "endpoints": endpoints}
+
+
+def imprimir(resumen: dict):
+    print(f"\n{'endpoint':<46}{'n':>8}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    filas = list(resumen["endpoints"].items()) + [("TOTAL", resumen["total"])]
+    for etiqueta, datos in filas:
+        if not datos:
+            continue
+        print(f"{etiqueta:<46}{datos['solicitudes']:>8}{datos['errores']:>6}{datos['por_segundo']:>9}"
+              f"{datos['p50_ms']:>9}{datos['p95_ms']:>9}{datos['p99_ms']:>9}{datos['max_ms']:>9}")
+    print("(latencias en ms)")
+
+
+def guardar(resumen: dict, ruta: str):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(resumen, archivo, indent=2, ensure_ascii=False)
+
+
+def comparar(resumen: dict, ruta_base: str, tolerancia: float) -> list:
+    """
+    Compara contra una ejecución guardada con --salida. Es regresión que el p95
+    o el p99 de un endpoint crezcan más que `tolerancia` (0.2 = 20 %), que su
+    throughput caiga en la misma proporción o que aparezcan errores nuevos.
+    """
+    with open(ruta_base, encoding="utf-8") as archivo:
+        base = json.load(archivo)
+
+    regresiones = []
+    for etiqueta, actual in resumen["endpoints"].items():
+        anterior = base["endpoints"].get(etiqueta)
+        if anterior is None:
+            continue
+        for metrica in ("p95_ms", "p99_ms"):
+            if actual[metrica] > anterior[metrica] * (1 + tolerancia):
+                regresiones.append(f"{etiqueta}: {metrica} {anterior[metrica]} → {actual[metrica]}")
+        if actual["por_segundo"] < anterior["por_segundo"] * (1 - tolerancia):
+            regresiones.append(f"{etiqueta}: req/s {anterior['por_segundo']} → {actual['por_segundo']}")
+        if actual["errores"] > anterior["errores"]:
+            regresiones.append(f"{etiqueta}: errores {anterior['errores']} → {actual['errores']}")
+    return regresiones
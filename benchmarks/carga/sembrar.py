@@ -0,0 +1,29 @@
+"""
+Datos de prueba con volúmenes realistas para las pruebas de carga.
+
+Cada escala es una configuración del generador de datos sintéticos
+(benchmarks.generar_datos), que escribe con INSERT multi-fila por lotes. Los
+datos se agregan a los existentes: conviene usar una base de datos dedicada
+(DATABASE_URL).
+"""
+from benchmarks.generar_datos import DOMINIO, PASSWORD, Configuracion, Rango, generar
+
+# Volúmenes por escala: locales por plaza, menús por local y productos por
+# menú se eligen dentro de cada rango (los ítems por pedido, entre 1 y 4)
+ESCALAS = {
+    "minima": dict(plazas=5, locales_por_plaza=Rango(8, 12), menus_por_local=Rango(2, 2),
+                   productos_por_menu=Rango(15, 25), usuarios=500, pedidos=10_000),
+    "pequena": dict(plazas=50, locales_por_plaza=Rango(8, 12), menus_por_local=Rango(2, 2),
+                    productos_por_menu=Rango(15, 25), usuarios=5_000, pedidos=100_000),
+    "media": dict(plazas=500, locales_por_plaza=Rango(3, 5), menus_por_local=Rango(2, 2),
+                  productos_por_menu=Rango(20, 30), usuarios=20_000, pedidos=1_000_000),
+    "grande": dict(plazas=2_000, locales_por_plaza=Rango(2, 3), menus_por_local=Rango(2, 2),
+                   productos_por_menu=Rango(8, 12), usuarios=50_000, pedidos=3_000_000),
+}
+
+__all__ = ["DOMINIO", "PASSWORD", "ESCALAS", "sembrar"]
+
+
+def sembrar(escala: str = "minima", semilla: int = 42, progreso=print) -> dict:
+    """Crea los datos de la escala indicada; devuelve cuántas filas insertó por tabla"""
+    return generar(Configuracion(semilla=semilla, **ESCALAS[escala]), progreso)
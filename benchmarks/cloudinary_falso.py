@@ -0,0 +1,56 @@
+"""
+Servidor local que imita la API de subida de Cloudinary.
+
+Permite probar las subidas de imágenes sin cuenta real y con una latencia
+controlada. Iniciar el servidor y apuntar la aplicación a él:
+
+    python -m benchmarks.cloudinary_falso --puerto 8090 --latencia 0.5
+
+    CLOUDINARY_UPLOAD_PREFIX=http://localhost:8090
+    CLOUDINARY_CLOUD_NAME=local CLOUDINARY_API_KEY=x CLOUDINARY_API_SECRET=x
+"""
+import argparse
+import asyncio
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+app = FastAPI()
+app.state.latencia = 0.0
+app.state.imagenes = {}
+
+
+@app.post("/v1_1/{cloud_name}/{resource_type}/upload")
+async def upload(cloud_name: str, resource_type: str, request: Request):
+    formulario = await request.form()
+    await asyncio.sleep(app.state.latencia)
+    public_id = formulario.get("public_id") or f"imagen_{len(app.state.imagenes) + 1}"
+    if formulario.get("folder"):
+        public_id = f"{formulario['folder']}/{public_id}"
+    contenido = formulario.get("file")
+    tamano = len(await contenido.read()) if hasattr(contenido, "read") else len(contenido or "")
+    app.state.imagenes[public_id] = tamano
+    url = f"{request.base_url}{cloud_name}/{resource_type}/upload/{public_id}"
+    return {"public_id": public_id, "secure_url": url, "url": url, "bytes": tamano}
+
+
+@app.post("/v1_1/{cloud_name}/{resource_type}/destroy")
+async def destroy(cloud_name: str, resource_type: str, request: Request):
+    formulario = await request.form()
+    await asyncio.sleep(app.state.latencia)
+    encontrada = app.state.imagenes.pop(formulario.get("public_id"), None) is not None
+    return {"result": "ok" if encontrada else "not found"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--puerto", type=int, default=8090)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de espera por llamada")
+    args = parser.parse_args()
+
+    app.state.latencia = args.latencia
+    uvicorn.run(app, host="127.0.0.1", port=args.puerto)
+
+
+if __name__ == "__main__":
+    main()
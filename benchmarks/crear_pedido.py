@@ -0,0 +1,97 @@
+"""
+Benchmark de la etapa de cálculo de precios de crear_pedido.
+
+Compara la búsqueda anterior (un SELECT por ítem) contra la consulta única
+IN (...) de `calcular_items_pedido` para distintos tamaños de pedido.
+Usa la base de datos configurada en .env; los datos de prueba se crean dentro
+de una transacción que se revierte al final.
+
+Uso:
+    python -m benchmarks.crear_pedido --items 1 5 10 25 50 --repeticiones 50
+"""
+import argparse
+import statistics
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.crud.pedidos import calcular_items_pedido
+from app.models import PlazaDB, LocaleDB, MenuDB, ProductoDB
+
+
+def calcular_items_por_item(db, items):
+    """Implementación anterior: una consulta por cada ítem del pedido"""
+    total = 0
+    for item in items:
+        producto = db.query(ProductoDB).filter(ProductoDB.id == item.id_producto).first()
+        if not producto or not producto.disponible:
+            raise ValueError(f"Producto con ID {item.id_producto} no disponible")
+        total += float(producto.precio) * item.cantidad
+    return total
+
+
+def sembrar_productos(db, cantidad: int):
+    """Crea una plaza, un local, un menú y `cantidad` productos"""
+    plaza = PlazaDB(nombre="Plaza benchmark", direccion="N/A")
+    local = LocaleDB(
+        nombre="Local benchmark", direccion="N/A",
+        horario_apertura="08:00", horario_cierre="22:00", plaza=plaza
+    )
+    db.add_all([plaza, local])
+    db.flush()
+    menu = MenuDB(id_local=local.id, nombre_menu="Menú benchmark")
+    db.add(menu)
+    db.flush()
+    productos = [
+        ProductoDB(nombre=f"Producto {i}", precio=10 + i, id_menu=menu.id, disponible=True)
+        for i in range(cantidad)
+    ]
+    db.add_all(productos)
+    db.flush()
+    return [p.id for p in productos]
+
+
+def medir(funcion, repeticiones: int):
+    """Ejecuta la función y devuelve (mediana en ms, consultas por ejecución)"""
+    consultas = [0]
+
+    def contar(*args):
+        consultas[0] += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    return statistics.median(tiempos), consultas[0] / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    transaccion = db.begin()
+    try:
+        ids = sembrar_productos(db, max(args.items))
+        print(f"{'ítems':>6} | {'por ítem (ms)':>14} | {'consultas':>9} | {'IN (...) (ms)':>14} | {'consultas':>9}")
+        for n in args.items:
+            items = [SimpleNamespace(id_producto=i, cantidad=2, instrucciones_especiales=None) for i in ids[:n]]
+            anterior, q_anterior = medir(lambda: calcular_items_por_item(db, items), args.repeticiones)
+            nuevo, q_nuevo = medir(lambda: calcular_items_pedido(db, items), args.repeticiones)
+            print(f"{n:>6} | {anterior:>14.2f} | {q_anterior:>9.0f} | {nuevo:>14.2f} | {q_nuevo:>9.0f}")
+    finally:
+        transaccion.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Comprueba con EXPLAIN que los listados no recorren tablas completas.
+
+Ejecuta las funciones CRUD de los listados con filtros (pedidos por local,
+usuario y estado, productos por menú, locales por plaza y tipo, menús por
+local), captura cada SELECT que emiten y lo pasa por EXPLAIN (EXPLAIN QUERY
+PLAN en SQLite). Termina con código 1 si alguno hace un recorrido completo de
+tabla, así que sirve como verificación en CI después de aplicar las migraciones.
+Los datos de prueba se crean dentro de una transacción que se revierte al final.
+
+Uso:
+    python -m benchmarks.explicar_consultas --pedidos 500 --verbose
+"""
+import argparse
+import re
+import sys
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, create_tables, engine
+from app.migrations import aplicar_migraciones
+from app.crud.locales import get_catalogo_local, get_locales
+from app.crud.menus import get_menus_by_local
+from app.crud.pedidos import get_pedidos
+from app.crud.productos import get_productos_by_menu
+from app.models import LocaleDB, MenuDB, PedidoDB, PedidoItemDB, PlazaDB, ProductoDB, UsuarioDB
+from app.services.cache_service import cache_catalogo
+
+# "SCAN pedidos" sin "USING INDEX" (o "SCAN TABLE pedidos" en SQLite < 3.36)
+RECORRIDO_SQLITE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def sembrar(db, locales: int, pedidos: int):
+    """Crea datos suficientes para que el optimizador elija índices como en producción"""
+    usuario = UsuarioDB(nombre="Explain", email="explain@bench.foodplaza.com", password="x")
+    plaza = PlazaDB(nombre="Plaza explain", direccion="N/A")
+    db.add_all([usuario, plaza])
+    db.flush()
+
+    lista_locales = [
+        LocaleDB(nombre=f"Local {i}", descripcion="N/A", direccion="N/A",
+                 horario_apertura="08:00", horario_cierre="22:00",
+                 tipo_comercio=("restaurante", "cafeteria", "tienda")[i % 3], plaza_id=plaza.id)
+        for i in range(locales)
+    ]
+    db.add_all(lista_locales)
+    db.flush()
+    menus = [MenuDB(id_local=local.id, nombre_menu=f"Menú {local.id}") for local in lista_locales]
+    db.add_all(menus)
+    db.flush()
+    productos = [
+        ProductoDB(nombre=f"Producto {menu.id}-{i}", precio=10, id_menu=menu.id, disponible=i % 4 != 0)
+        for menu in menus for i in range(8)
+    ]
+    db.add_all(productos)
+    db.flush()
+
+    estados = ("pendiente", "en_preparacion", "listo_para_recoger", "completado", "cancelado")
+    lista_pedidos = [
+        PedidoDB(id_usuario=usuario.id, id_local=lista_locales[i % locales].id, estado_pedido=estados[i % 5],
+                 total_pedido=10, tiempo_preparacion_estimado=15)
+        for i in range(pedidos)
+    ]
+    db.add_all(lista_pedidos)
+    db.flush()
+    db.add_all([
+        PedidoItemDB(id_pedido=pedido.id, id_producto=productos[0].id, cantidad=1, precio_unitario=10)
+        for pedido in lista_pedidos
+    ])
+    db.flush()
+    return usuario.id, plaza.id, lista_locales[0].id, menus[0].id
+
+
+def capturar_selects(funcion) -> list:
+    """Ejecuta la función y devuelve los SELECT (sentencia, parámetros) que emitió"""
+    capturadas = []
+
+    def registrar(conn, cursor, sentencia, parametros, contexto, executemany):
+        if sentencia.lstrip().upper().startswith("SELECT"):
+            capturadas.append((sentencia, parametros))
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        funcion()
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+    return capturadas
+
+
+def recorridos_completos(db, sentencia: str, parametros) -> tuple:
+    """Devuelve (tablas recorridas completas, plan legible) para una sentencia"""
+    conexion = db.connection()
+    if conexion.dialect.name == "sqlite":
+        filas = conexion.exec_driver_sql("EXPLAIN QUERY PLAN " + sentencia, parametros).all()
+        plan = [fila[-1] for fila in filas]
+        tablas = [m.group(1) for m in map(RECORRIDO_SQLITE.match, plan) if m]
+    else:
+        filas = conexion.exec_driver_sql("EXPLAIN " + sentencia, parametros).mappings().all()
+        plan = [f"{fila['table']}: type={fila['type']} key={fila['key']} rows={fila['rows']}" for fila in filas]
+        tablas = [fila["table"] for fila in filas if fila["type"] == "ALL"]
+    return tablas, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locales", type=int, default=20)
+    parser.add_argument("--pedidos", type=int, default=500)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar el plan de cada consulta")
+    args = parser.parse_args()
+
+    create_tables()
+    aplicar_migraciones()
+    # Sin caché: cada llamada debe llegar a la base de datos
+    cache_catalogo.habilitado = False
+
+    db = SessionLocal()
+    transaccion = db.begin()
+    try:
+        usuario_id, plaza_id, local_id, menu_id = sembrar(db, args.locales, args.pedidos)
+        listados = {
+            "pedidos (sin filtros)": lambda: get_pedidos(db),
+            "pedidos por local": lambda: get_pedidos(db, local_id=local_id),
+            "pedidos por local y estado": lambda: get_pedidos(db, local_id=local_id, estado="pendiente"),
+            "pedidos por usuario": lambda: get_pedidos(db, usuario_id=usuario_id),
+            "pedidos por usuario y estado": lambda: get_pedidos(db, usuario_id=usuario_id, estado="completado"),
+            "productos por menú": lambda: get_productos_by_menu(db, menu_id),
+            "productos por menú (todos)": lambda: get_productos_by_menu(db, menu_id, solo_disponibles=False),
+            "locales por plaza": lambda: get_locales(db, plaza_id=plaza_id),
+            "locales por plaza y tipo": lambda: get_locales(db, plaza_id=plaza_id, tipo_comercio="cafeteria"),
+            "menús por local": lambda: get_menus_by_local(db, local_id),
+            "catálogo del local": lambda: get_catalogo_local(db, local_id),
+        }
+
+        fallos = 0
+        for nombre, funcion in listados.items():
+            for sentencia, parametros in capturar_selects(funcion):
+                tablas, plan = recorridos_completos(db, sentencia, parametros)
+                estado = "OK" if not tablas else f"RECORRIDO COMPLETO: {', '.join(tablas)}"
+                fallos += bool(tablas)
+                print(f"{nombre:<30} {estado}")
+                if args.verbose or tablas:
+                    print("    " + " ".join(sentencia.split()))
+                    for paso in plan:
+                        print(f"      {paso}")
+    finally:
+        transaccion.rollback()
+        db.close()
+
+    if fallos:
+        print(f"\n{fallos} consulta(s) recorren tablas completas")
+        sys.exit(1)
+    print("\nNingún listado recorre tablas completas")
+
+
+if __name__ == "__main__":
+    main()
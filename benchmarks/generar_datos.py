@@ -0,0 +1,311 @@
+"""
+Generador de datos sintéticos para pruebas de capacidad.
+
+Crea grafos consistentes plazas → locales → menús → productos, usuarios y
+pedidos → pedido_items sin pasar por las funciones CRUD (que confirman y
+recargan fila por fila): arma las filas en Python con ids asignados a partir
+del máximo existente y las escribe con INSERT multi-fila (un solo INSERT con
+miles de VALUES) por lote, confirmando cada lote. Los datos se agregan a los
+existentes; conviene usar una base de datos dedicada (DATABASE_URL).
+
+Las cantidades por padre se dan como rangos ("2-4" elige uniformemente entre
+2 y 4) y la popularidad de locales, productos y usuarios en los pedidos sigue
+una ley de Zipf con el exponente indicado (0 = uniforme), como en producción,
+donde pocos locales concentran la mayoría de los pedidos.
+
+Uso:
+    python -m benchmarks.generar_datos --plazas 2000 --locales-por-plaza 2-3 \\
+        --productos-por-menu 8-12 --usuarios 50000 --pedidos 3000000 --sesgo-locales 1.1
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func, select
+
+from app.database import create_tables, engine
+from app.models import LocaleDB, MenuDB, PedidoDB, PedidoItemDB, PlazaDB, ProductoDB, UsuarioDB
+from app.services.password_service import hash_password
+
+PASSWORD = "Benchmark123"
+DOMINIO = "bench.foodplaza.com"
+
+TIPOS_COMERCIO = ("restaurante", "cafeteria", "tienda", "servicio", "otro")
+ESTADOS_PREDETERMINADOS = {"pendiente": 2, "en_preparacion": 1, "listo_para_recoger": 1, "completado": 90, "cancelado": 6}
+# Los pedidos abiertos son recientes: se reparten en la última hora
+ESTADOS_ABIERTOS = ("pendiente", "en_preparacion", "listo_para_recoger")
+# Máximo de parámetros por sentencia: SQLite admite 32766; en MySQL el límite
+# real es max_allowed_packet y este valor queda muy por debajo
+MAX_PARAMETROS = 32000
+
+
+@dataclass
+class Rango:
+    minimo: int
+    maximo: int
+
+    @classmethod
+    def parsear(cls, texto: str) -> "Rango":
+        minimo, _, maximo = str(texto).partition("-")
+        rango = cls(int(minimo), int(maximo or minimo))
+        if rango.minimo < 0 or rango.maximo < rango.minimo:
+            raise argparse.ArgumentTypeError(f"Rango inválido: {texto}")
+        return rango
+
+    def elegir(self, azar: random.Random) -> int:
+        return azar.randint(self.minimo, self.maximo)
+
+
+def parsear_pesos(texto: str) -> Dict[str, float]:
+    """'completado=90,cancelado=6' → {'completado': 90.0, 'cancelado': 6.0}"""
+    pesos = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        if nombre.strip() not in ESTADOS_PREDETERMINADOS:
+            raise argparse.ArgumentTypeError(f"Estado de pedido desconocido: {nombre}")
+        pesos[nombre.strip()] = float(peso)
+    return pesos
+
+
+@dataclass
+class Configuracion:
+    plazas: int = 10
+    locales_por_plaza: Rango = field(default_factory=lambda: Rango(5, 15))
+    menus_por_local: Rango = field(default_factory=lambda: Rango(1, 3))
+    productos_por_menu: Rango = field(default_factory=lambda: Rango(5, 15))
+    # Fracción de productos disponibles
+    disponibilidad: float = 0.9
+    usuarios: int = 1000
+    # Uno de cada N usuarios es gerente
+    gerente_cada: int = 100
+    pedidos: int = 10000
+    items_por_pedido: Rango = field(default_factory=lambda: Rango(1, 4))
+    cantidad_por_item: Rango = field(default_factory=lambda: Rango(1, 3))
+    estados: Dict[str, float] = field(default_factory=lambda: dict(ESTADOS_PREDETERMINADOS))
+    dias_historial: int = 180
+    # Exponentes de Zipf para elegir local, producto del local y usuario de cada pedido
+    sesgo_locales: float = 1.0
+    sesgo_productos: float = 0.8
+    sesgo_usuarios: float = 0.5
+    filas_por_lote: int = 5000
+    semilla: int = 42
+
+
+class SelectorZipf:
+    """Elige elementos con probabilidad proporcional a 1 / rango^s (en O(log n) por elección)"""
+
+    def __init__(self, elementos: list, exponente: float, azar: random.Random):
+        self.elementos = list(elementos)
+        azar.shuffle(self.elementos)
+        self.azar = azar
+        self.acumulados = list(itertools.accumulate(1 / (i ** exponente) for i in range(1, len(self.elementos) + 1)))
+
+    def elegir(self):
+        objetivo = self.azar.random() * self.acumulados[-1]
+        return self.elementos[bisect.bisect_left(self.acumulados, objetivo)]
+
+
+class EscritorLotes:
+    """
+    Acumula filas de una tabla y las escribe con un INSERT multi-fila por lote.
+    La sentencia se arma una vez por tamaño de lote con el estilo de parámetros
+    del driver y se ejecuta con exec_driver_sql, sin compilar una expresión de
+    SQLAlchemy con miles de VALUES.
+    """
+
+    def __init__(self, conexion, tabla, columnas: tuple, filas_por_lote: int):
+        self.conexion = conexion
+        self.columnas = columnas
+        self.filas_por_lote = max(1, min(filas_por_lote, MAX_PARAMETROS // len(columnas)))
+        self.filas = []
+        self.escritas = 0
+        citar = conexion.dialect.identifier_preparer.quote
+        marcador = "?" if conexion.dialect.paramstyle == "qmark" else "%s"
+        self._encabezado = f"INSERT INTO {citar(tabla.name)} ({', '.join(citar(c) for c in columnas)}) VALUES "
+        self._tupla = "(" + ", ".join([marcador] * len(columnas)) + ")"
+        self._sentencias = {}
+
+    def agregar(self, fila: tuple):
+        self.filas.append(fila)
+        if len(self.filas) >= self.filas_por_lote:
+            self.vaciar()
+
+    def vaciar(self):
+        if not self.filas:
+            return
+        cantidad = len(self.filas)
+        sentencia = self._sentencias.get(cantidad)
+        if sentencia is None:
+            sentencia = self._sentencias[cantidad] = self._encabezado + ", ".join([self._tupla] * cantidad)
+        self.conexion.exec_driver_sql(sentencia, tuple(itertools.chain.from_iterable(self.filas)))
+        self.conexion.commit()
+        self.escritas += cantidad
+        self.filas = []
+
+
+def _siguiente_id(conexion, modelo) -> int:
+    return (conexion.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def _fecha(valor: datetime) -> str:
+    return valor.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generar(configuracion: Configuracion, progreso: Optional[Callable[[str], None]] = print) -> dict:
+    """Genera los datos según la configuración; devuelve las filas escritas por tabla y la duración"""
+    c = configuracion
+    azar = random.Random(c.semilla)
+    progreso = progreso or (lambda mensaje: None)
+    create_tables()
+    inicio = time.perf_counter()
+    conteo = {}
+
+    with engine.connect() as conexion:
+        def escritor(modelo, columnas):
+            return EscritorLotes(conexion, modelo.__table__, columnas, c.filas_por_lote)
+
+        # Usuarios: todos con la misma contraseña (un solo hash bcrypt)
+        usuarios = escritor(UsuarioDB, ("id", "nombre", "email", "password", "rol", "estado"))
+        primer_usuario = _siguiente_id(conexion, UsuarioDB)
+        hashed = hash_password(PASSWORD)
+        for usuario_id in range(primer_usuario, primer_usuario + c.usuarios):
+            rol = "gerente" if (usuario_id - primer_usuario) % c.gerente_cada == 0 else "usuario"
+            usuarios.agregar((usuario_id, f"Bench {usuario_id}", f"bench_{usuario_id}@{DOMINIO}", hashed, rol, "activo"))
+        usuarios.vaciar()
+        conteo["usuarios"] = usuarios.escritas
+        progreso(f"usuarios: {usuarios.escritas}")
+
+        plazas = escritor(PlazaDB, ("id", "nombre", "direccion", "estado"))
+        locales = escritor(LocaleDB, (
+            "id", "nombre", "descripcion", "direccion", "horario_apertura", "horario_cierre",
+            "tipo_comercio", "estado", "plaza_id",
+        ))
+        menus = escritor(MenuDB, ("id", "id_local", "nombre_menu"))
+        productos = escritor(ProductoDB, ("id", "nombre", "precio", "id_menu", "disponible"))
+        ids = {modelo: _siguiente_id(conexion, modelo) for modelo in (PlazaDB, LocaleDB, MenuDB, ProductoDB)}
+
+        # Productos disponibles (id, precio en centavos) por local para armar pedidos coherentes
+        disponibles_por_local = {}
+        for _ in range(c.plazas):
+            plaza_id = ids[PlazaDB]
+            ids[PlazaDB] += 1
+            plazas.agregar((plaza_id, f"Plaza {plaza_id}", "N/A", "activo"))
+            for _ in range(c.locales_por_plaza.elegir(azar)):
+                local_id = ids[LocaleDB]
+                ids[LocaleDB] += 1
+                locales.agregar((
+                    local_id, f"Local {local_id}", "N/A", "N/A", "08:00", "22:00",
+                    azar.choice(TIPOS_COMERCIO), "activo", plaza_id,
+                ))
+                disponibles = []
+                for numero_menu in range(1, c.menus_por_local.elegir(azar) + 1):
+                    menu_id = ids[MenuDB]
+                    ids[MenuDB] += 1
+                    menus.agregar((menu_id, local_id, f"Menú {numero_menu}"))
+                    for _ in range(c.productos_por_menu.elegir(azar)):
+                        producto_id = ids[ProductoDB]
+                        ids[ProductoDB] += 1
+                        centavos = azar.randrange(1500, 25000)
+                        disponible = azar.random() < c.disponibilidad
+                        productos.agregar((producto_id, f"Producto {producto_id}", f"{centavos / 100:.2f}", menu_id, int(disponible)))
+                        if disponible:
+                            disponibles.append((producto_id, centavos))
+                if disponibles:
+                    disponibles_por_local[local_id] = disponibles
+        for tabla, nombre in ((plazas, "plazas"), (locales, "locales"), (menus, "menus"), (productos, "productos")):
+            tabla.vaciar()
+            conteo[nombre] = tabla.escritas
+        progreso(f"catálogo: {conteo['plazas']} plazas, {conteo['locales']} locales, "
+                 f"{conteo['menus']} menús, {conteo['productos']} productos")
+
+        conteo["pedidos"] = conteo["pedido_items"] = 0
+        if c.pedidos and disponibles_por_local and c.usuarios:
+            pedidos = escritor(PedidoDB, (
+                "id", "id_usuario", "id_local", "fecha_pedido", "estado_pedido", "total_pedido",
+                "tiempo_preparacion_estimado",
+            ))
+            items = escritor(PedidoItemDB, ("id", "id_pedido", "id_producto", "cantidad", "precio_unitario"))
+            selector_locales = SelectorZipf(list(disponibles_por_local), c.sesgo_locales, azar)
+            selector_usuarios = SelectorZipf(range(primer_usuario, primer_usuario + c.usuarios), c.sesgo_usuarios, azar)
+            # Un selector de productos por local, creado cuando el local recibe su primer pedido
+            selectores_productos = {}
+            estados = list(c.estados)
+            acumulados_estados = list(itertools.accumulate(c.estados[e] for e in estados))
+            pedido_id = _siguiente_id(conexion, PedidoDB)
+            item_id = _siguiente_id(conexion, PedidoItemDB)
+            ahora = datetime.utcnow()
+            historial = c.dias_historial * 86400
+            aviso = max(1, c.pedidos // 20)
+
+            for numero in range(1, c.pedidos + 1):
+                local_id = selector_locales.elegir()
+                selector = selectores_productos.get(local_id)
+                if selector is None:
+                    selector = selectores_productos[local_id] = SelectorZipf(
+                        disponibles_por_local[local_id], c.sesgo_productos, azar
+                    )
+                elegidos = {}
+                for _ in range(min(c.items_por_pedido.elegir(azar), len(selector.elementos))):
+                    producto = selector.elegir()
+                    elegidos[producto] = elegidos.get(producto, 0) + c.cantidad_por_item.elegir(azar)
+                total = 0
+                for (producto_id, centavos), cantidad in elegidos.items():
+                    total += centavos * cantidad
+                    items.agregar((item_id, pedido_id, producto_id, cantidad, f"{centavos / 100:.2f}"))
+                    item_id += 1
+
+                estado = estados[bisect.bisect_left(acumulados_estados, azar.random() * acumulados_estados[-1])]
+                antiguedad = azar.randrange(3600 if estado in ESTADOS_ABIERTOS else historial)
+                pedidos.agregar((
+                    pedido_id, selector_usuarios.elegir(), local_id,
+                    _fecha(ahora - timedelta(seconds=antiguedad)), estado, f"{total / 100:.2f}",
+                    30 + 5 * len(elegidos),
+                ))
+                pedido_id += 1
+                if numero % aviso == 0:
+                    progreso(f"pedidos: {numero}/{c.pedidos}")
+            # Los pedidos se escriben antes que sus ítems para respetar la clave foránea
+            pedidos.vaciar()
+            items.vaciar()
+            conteo["pedidos"] = pedidos.escritas
+            conteo["pedido_items"] = items.escritas
+
+    conteo["segundos"] = round(time.perf_counter() - inicio, 1)
+    return conteo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    predeterminada = Configuracion()
+    parser.add_argument("--plazas", type=int, default=predeterminada.plazas)
+    parser.add_argument("--locales-por-plaza", type=Rango.parsear, default=predeterminada.locales_por_plaza)
+    parser.add_argument("--menus-por-local", type=Rango.parsear, default=predeterminada.menus_por_local)
+    parser.add_argument("--productos-por-menu", type=Rango.parsear, default=predeterminada.productos_por_menu)
+    parser.add_argument("--disponibilidad", type=float, default=predeterminada.disponibilidad)
+    parser.add_argument("--usuarios", type=int, default=predeterminada.usuarios)
+    parser.add_argument("--gerente-cada", type=int, default=predeterminada.gerente_cada)
+    parser.add_argument("--pedidos", type=int, default=predeterminada.pedidos)
+    parser.add_argument("--items-por-pedido", type=Rango.parsear, default=predeterminada.items_por_pedido)
+    parser.add_argument("--cantidad-por-item", type=Rango.parsear, default=predeterminada.cantidad_por_item)
+    parser.add_argument("--estados", type=parsear_pesos, default=predeterminada.estados,
+                        help="Pesos por estado, p. ej. completado=90,cancelado=6,pendiente=4")
+    parser.add_argument("--dias-historial", type=int, default=predeterminada.dias_historial)
+    parser.add_argument("--sesgo-locales", type=float, default=predeterminada.sesgo_locales)
+    parser.add_argument("--sesgo-productos", type=float, default=predeterminada.sesgo_productos)
+    parser.add_argument("--sesgo-usuarios", type=float, default=predeterminada.sesgo_usuarios)
+    parser.add_argument("--filas-por-lote", type=int, default=predeterminada.filas_por_lote)
+    parser.add_argument("--semilla", type=int, default=predeterminada.semilla)
+    args = parser.parse_args()
+
+    conteo = generar(Configuracion(**vars(args)))
+    filas = sum(valor for clave, valor in conteo.items() if clave != "segundos")
+    print(f"Filas escritas: {conteo} ({filas / max(conteo['segundos'], 0.1):.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
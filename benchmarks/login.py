@@ -0,0 +1,107 @@
+"""
+Rendimiento del inicio de sesión (bcrypt).
+
+Crea usuarios de prueba y lanza inicios de sesión concurrentes contra la
+aplicación ASGI en proceso, mientras mide en paralelo la latencia de un
+endpoint ligero (GET /) para comprobar que bcrypt no detiene el event loop.
+
+Uso:
+    BCRYPT_ROUNDS=12 PASSWORD_HASH_WORKERS=4 python -m benchmarks.login --logins 200 --concurrencia 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.database import SessionLocal, create_tables
+from app.main import app
+from app.models import UsuarioDB
+from app.services.password_service import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, hash_password
+
+PASSWORD = "Benchmark123"
+
+
+def crear_usuarios(cantidad: int):
+    """Crea (si no existen) los usuarios bench_<n>@bench.foodplaza.com"""
+    db = SessionLocal()
+    try:
+        existentes = {
+            email for (email,) in db.query(UsuarioDB.email).filter(UsuarioDB.email.like("bench_%@bench.foodplaza.com"))
+        }
+        hashed = hash_password(PASSWORD)
+        for i in range(cantidad):
+            email = f"bench_{i}@bench.foodplaza.com"
+            if email not in existentes:
+                db.add(UsuarioDB(nombre=f"bench {i}", email=email, password=hashed, rol="cliente", estado="activo"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+async def ejecutar(logins: int, concurrencia: int, usuarios: int):
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias_login = []
+    latencias_sonda = []
+    errores = []
+    terminado = asyncio.Event()
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=None) as cliente:
+        async def login(i):
+            async with semaforo:
+                inicio = time.perf_counter()
+                respuesta = await cliente.post("/api/usuarios/login", json={
+                    "email": f"bench_{i % usuarios}@bench.foodplaza.com", "password": PASSWORD
+                })
+                latencias_login.append(time.perf_counter() - inicio)
+                if respuesta.status_code != 200:
+                    errores.append(respuesta.status_code)
+
+        async def sonda():
+            # Solicitudes ligeras mientras duran los inicios de sesión
+            while not terminado.is_set():
+                inicio = time.perf_counter()
+                await cliente.get("/")
+                latencias_sonda.append(time.perf_counter() - inicio)
+                await asyncio.sleep(0.01)
+
+        tarea_sonda = asyncio.create_task(sonda())
+        inicio = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        duracion = time.perf_counter() - inicio
+        terminado.set()
+        await tarea_sonda
+
+    return duracion, latencias_login, latencias_sonda, errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--usuarios", type=int, default=20)
+    args = parser.parse_args()
+
+    create_tables()
+    crear_usuarios(args.usuarios)
+    duracion, latencias_login, latencias_sonda, errores = asyncio.run(
+        ejecutar(args.logins, args.concurrencia, args.usuarios)
+    )
+
+    print(f"bcrypt rounds={BCRYPT_ROUNDS}, hilos de hash={PASSWORD_HASH_WORKERS}")
+    print(f"Inicios de sesión: {args.logins} en {duracion:.2f}s ({args.logins / duracion:.1f}/s), errores: {len(errores)}")
+    print(f"Latencia login   p50={statistics.median(latencias_login) * 1000:.0f}ms "
+          f"p95={percentil(latencias_login, 95) * 1000:.0f}ms")
+    if latencias_sonda:
+        print(f"Latencia GET /   p50={statistics.median(latencias_sonda) * 1000:.1f}ms "
+              f"p99={percentil(latencias_sonda, 99) * 1000:.1f}ms max={max(latencias_sonda) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Prueba de carga del pool de conexiones.
+
+Lanza muchas solicitudes concurrentes contra la aplicación ASGI en proceso y
+registra el máximo de conexiones tomadas del pool al mismo tiempo. Falla
+(código de salida 1) si se supera pool_size + max_overflow o si alguna
+solicitud no obtiene conexión a tiempo.
+
+Uso:
+    python -m benchmarks.pool_carga --solicitudes 2000 --concurrencia 200
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+import httpx
+from sqlalchemy import event, text
+
+from app.database import engine, create_tables, estadisticas_pool, DB_POOL_SIZE, DB_MAX_OVERFLOW
+from app.main import app
+
+RUTAS = ["/api/plazas/?limit=20", "/api/locales/?limit=20", "/api/pedidos/?limit=20"]
+
+
+class MonitorPool:
+    """Cuenta las conexiones tomadas del pool y guarda el máximo observado"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.en_uso = 0
+        self.maximo = 0
+
+    def checkout(self, *args):
+        with self.lock:
+            self.en_uso += 1
+            self.maximo = max(self.maximo, self.en_uso)
+
+    def checkin(self, *args):
+        with self.lock:
+            self.en_uso -= 1
+
+
+async def ejecutar(solicitudes: int, concurrencia: int):
+    semaforo = asyncio.Semaphore(concurrencia)
+    errores = []
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as cliente:
+        async def una(i):
+            async with semaforo:
+                respuesta = await cliente.get(RUTAS[i % len(RUTAS)])
+                if respuesta.status_code >= 500:
+                    errores.append(respuesta.status_code)
+
+        await asyncio.gather(*(una(i) for i in range(solicitudes)))
+    return errores
+
+
+def conexiones_mysql():
+    """Conexiones abiertas según el servidor MySQL, o None en otros motores"""
+    if engine.dialect.name != "mysql":
+        return None
+    with engine.connect() as conn:
+        return conn.execute(text("SHOW STATUS LIKE 'Threads_connected'")).one()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solicitudes", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=200)
+    args = parser.parse_args()
+
+    create_tables()
+    monitor = MonitorPool()
+    event.listen(engine, "checkout", monitor.checkout)
+    event.listen(engine, "checkin", monitor.checkin)
+
+    inicio = time.perf_counter()
+    errores = asyncio.run(ejecutar(args.solicitudes, args.concurrencia))
+    duracion = time.perf_counter() - inicio
+
+    limite = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    print(f"Solicitudes: {args.solicitudes} (concurrencia {args.concurrencia}) en {duracion:.2f}s")
+    print(f"Máximo de conexiones en uso: {monitor.maximo} (límite {limite})")
+    print(f"Pool al terminar: {estadisticas_pool()['status']}")
+    servidor = conexiones_mysql()
+    if servidor is not None:
+        print(f"Threads_connected en MySQL: {servidor}")
+    print(f"Errores 5xx: {len(errores)}")
+
+    if monitor.maximo > limite or errores:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Servidor SMTP local que acepta y descarta los correos (sumidero).
+
+Sirve para probar la bandeja de salida sin un servidor real. Acepta cualquier
+usuario y contraseña y puede rechazar temporalmente los primeros correos para
+comprobar los reintentos:
+
+    python -m benchmarks.smtp_sumidero --puerto 2525 --rechazar 2
+
+    SMTP_SERVER=localhost SMTP_PORT=2525 SMTP_USERNAME=x SMTP_PASSWORD=x
+"""
+import argparse
+import asyncio
+
+
+class Sumidero:
+    def __init__(self, rechazar: int = 0, latencia: float = 0.0):
+        self.rechazar = rechazar
+        self.latencia = latencia
+        self.recibidos = 0
+        self.conexiones = 0
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        self.conexiones += 1
+        destinatarios = []
+
+        async def responder(linea: str):
+            escritor.write((linea + "\r\n").encode())
+            await escritor.drain()
+
+        await responder("220 sumidero ESMTP")
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                comando = linea.decode(errors="replace").strip()
+                verbo = comando.split(" ", 1)[0].upper()
+
+                if verbo == "EHLO":
+                    escritor.write(b"250-sumidero\r\n")
+                    await responder("250 AUTH PLAIN LOGIN")
+                elif verbo == "HELO":
+                    await responder("250 sumidero")
+                elif verbo == "AUTH":
+                    if comando.upper().startswith("AUTH LOGIN"):
+                        # Usuario y contraseña en dos pasos
+                        for _ in range(2 if len(comando.split()) == 2 else 1):
+                            await responder("334 ")
+                            await lector.readline()
+                    await responder("235 Autenticado")
+                elif verbo == "MAIL":
+                    destinatarios = []
+                    await responder("250 OK")
+                elif verbo == "RCPT":
+                    destinatarios.append(comando)
+                    await responder("250 OK")
+                elif verbo == "DATA":
+                    await responder("354 Fin con <CRLF>.<CRLF>")
+                    while (await lector.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    await asyncio.sleep(self.latencia)
+                    if self.rechazar > 0:
+                        self.rechazar -= 1
+                        await responder("451 Intente más tarde")
+                    else:
+                        self.recibidos += 1
+                        print(f"Correo {self.recibidos} recibido ({len(destinatarios)} destinatarios, conexión {self.conexiones})")
+                        await responder("250 OK")
+                elif verbo == "QUIT":
+                    await responder("221 Adiós")
+                    break
+                else:
+                    # NOOP, RSET y cualquier otro comando
+                    await responder("250 OK")
+        finally:
+            escritor.close()
+
+
+async def servir(puerto: int, sumidero: Sumidero):
+    servidor = await asyncio.start_server(sumidero.atender, "127.0.0.1", puerto)
+    print(f"Sumidero SMTP escuchando en 127.0.0.1:{puerto}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--puerto", type=int, default=2525)
+    parser.add_argument("--rechazar", type=int, default=0, help="Correos iniciales que se rechazan con 451")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de espera por correo")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(servir(args.puerto, Sumidero(args.rechazar, args.latencia)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
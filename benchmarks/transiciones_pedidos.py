@@ -0,0 +1,159 @@
+"""
+Prueba de concurrencia de las transiciones de estado de los pedidos.
+
+Crea pedidos y lanza varios hilos (cada uno con su propia sesión) que intentan
+a la vez recorrer la cadena pendiente → en_preparacion → listo_para_recoger →
+completado, más un hilo por pedido que intenta cancelarlo en un momento
+aleatorio. Al final verifica para cada pedido que:
+
+- ninguna transición se aplicó dos veces,
+- las transiciones aplicadas forman un camino válido desde 'pendiente',
+- el camino termina en el estado que quedó guardado.
+
+Termina con código 1 si algún pedido viola estas reglas. Usa la base de datos
+configurada en .env y elimina los datos creados al terminar.
+
+Uso:
+    python -m benchmarks.transiciones_pedidos --pedidos 50 --hilos 8
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import permutations
+
+from app.database import SessionLocal, create_tables
+from app.crud.pedidos import TRANSICIONES, ConflictoEstado, actualizar_pedido
+from app.models import LocaleDB, PedidoDB, PlazaDB, UsuarioDB
+
+CADENA = ("en_preparacion", "listo_para_recoger", "completado")
+
+
+def sembrar(cantidad: int):
+    db = SessionLocal()
+    try:
+        usuario = UsuarioDB(nombre="Transiciones", email="transiciones@bench.foodplaza.com", password="x")
+        plaza = PlazaDB(nombre="Plaza transiciones", direccion="N/A")
+        db.add_all([usuario, plaza])
+        db.flush()
+        local = LocaleDB(nombre="Local transiciones", descripcion="N/A", direccion="N/A",
+                         horario_apertura="08:00", horario_cierre="22:00", plaza_id=plaza.id)
+        db.add(local)
+        db.flush()
+        pedidos = [
+            PedidoDB(id_usuario=usuario.id, id_local=local.id, estado_pedido="pendiente",
+                     total_pedido=10, tiempo_preparacion_estimado=15)
+            for _ in range(cantidad)
+        ]
+        db.add_all(pedidos)
+        db.commit()
+        return usuario.id, plaza.id, [pedido.id for pedido in pedidos]
+    finally:
+        db.close()
+
+
+def limpiar(usuario_id: int, plaza_id: int):
+    db = SessionLocal()
+    try:
+        locales = [l.id for l in db.query(LocaleDB.id).filter(LocaleDB.plaza_id == plaza_id)]
+        db.query(PedidoDB).filter(PedidoDB.id_local.in_(locales)).delete(synchronize_session=False)
+        db.query(LocaleDB).filter(LocaleDB.plaza_id == plaza_id).delete(synchronize_session=False)
+        db.query(PlazaDB).filter(PlazaDB.id == plaza_id).delete(synchronize_session=False)
+        db.query(UsuarioDB).filter(UsuarioDB.id == usuario_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def transicionar(pedido_id: int, estado: str, aplicadas: list, resultados: Counter, lock: threading.Lock):
+    db = SessionLocal()
+    try:
+        actualizar_pedido(db, pedido_id, estado_pedido=estado)
+        resultado = "aplicadas"
+        with lock:
+            aplicadas.append((pedido_id, estado))
+    except ConflictoEstado:
+        resultado = "conflictos"
+    except Exception as e:
+        resultado = "errores"
+        print(f"[ERROR] pedido {pedido_id} → {estado}: {e}")
+    finally:
+        db.close()
+    with lock:
+        resultados[resultado] += 1
+
+
+def camino_valido(aplicadas: list, final: str) -> bool:
+    """Las transiciones aplicadas (sin orden) deben poder ordenarse como un camino desde 'pendiente' hasta `final`"""
+    if len(set(aplicadas)) != len(aplicadas):
+        return False
+    for orden in permutations(aplicadas):
+        estado = "pendiente"
+        for siguiente in orden:
+            if siguiente not in TRANSICIONES[estado]:
+                break
+            estado = siguiente
+        else:
+            if estado == final:
+                return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pedidos", type=int, default=50)
+    parser.add_argument("--hilos", type=int, default=8, help="Hilos que recorren la cadena por pedido")
+    args = parser.parse_args()
+
+    create_tables()
+    usuario_id, plaza_id, ids = sembrar(args.pedidos)
+    aplicadas, resultados, lock = [], Counter(), threading.Lock()
+
+    def recorrer(pedido_id: int):
+        for estado in CADENA:
+            transicionar(pedido_id, estado, aplicadas, resultados, lock)
+
+    def cancelar(pedido_id: int):
+        time.sleep(random.uniform(0, 0.05))
+        transicionar(pedido_id, "cancelado", aplicadas, resultados, lock)
+
+    hilos = []
+    for pedido_id in ids:
+        hilos += [threading.Thread(target=recorrer, args=(pedido_id,)) for _ in range(args.hilos)]
+        hilos.append(threading.Thread(target=cancelar, args=(pedido_id,)))
+    random.shuffle(hilos)
+
+    inicio = time.perf_counter()
+    try:
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        por_pedido = defaultdict(list)
+        for pedido_id, estado in aplicadas:
+            por_pedido[pedido_id].append(estado)
+        db = SessionLocal()
+        try:
+            finales = dict(db.query(PedidoDB.id, PedidoDB.estado_pedido).filter(PedidoDB.id.in_(ids)).all())
+        finally:
+            db.close()
+    finally:
+        limpiar(usuario_id, plaza_id)
+
+    invalidos = [pedido_id for pedido_id in ids if not camino_valido(por_pedido[pedido_id], finales[pedido_id])]
+    intentos = sum(resultados.values())
+    print(f"{intentos} intentos en {duracion:.2f} s: {resultados['aplicadas']} aplicados, "
+          f"{resultados['conflictos']} conflictos (409), {resultados['errores']} errores")
+    print(f"Estados finales: {dict(Counter(finales.values()))}")
+    if invalidos or resultados["errores"]:
+        print(f"Pedidos con transiciones inconsistentes: {invalidos}")
+        sys.exit(1)
+    print("Todas las transiciones fueron consistentes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+# Configuración de gunicorn (ver Procfile). Las opciones de línea de comandos
+# del Procfile tienen prioridad sobre las de este archivo.
+import os
+import shutil
+
+# Directorio donde cada worker escribe sus métricas de Prometheus; /metrics
+# las suma. Se define aquí, antes de que los workers importen la aplicación.
+directorio_metricas = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/foodplaza_metricas")
+
+# Se importa después de definir el directorio (prometheus_client lo lee al importarse)
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # Los archivos de un arranque anterior sumarían valores viejos
+    shutil.rmtree(directorio_metricas, ignore_errors=True)
+    os.makedirs(directorio_metricas, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Los gauges "livesum" de un worker terminado dejan de sumarse; sus
+    # contadores e histogramas se conservan
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,99 @@
+"""
+Configuración común de las pruebas: una base de datos SQLite temporal con el
+esquema y las migraciones aplicadas, el cliente de la API y datos mínimos.
+
+Las variables de entorno se fijan antes de importar la aplicación porque los
+módulos leen su configuración al importarse.
+"""
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+
+_DIRECTORIO = tempfile.mkdtemp(prefix="foodplaza_pruebas_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DIRECTORIO, 'pruebas.db')}"
+os.environ["EMAIL_OUTBOX_WORKER"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["SQL_LENTA_MS"] = "100000"
+os.environ.setdefault("JWT_SECRET_KEY", "clave-de-pruebas")
+# El servicio de correo exige su configuración; el remitente no se inicia
+for _variable, _valor in (("SMTP_SERVER", "localhost"), ("SMTP_USERNAME", "pruebas"),
+                          ("SMTP_PASSWORD", "pruebas"), ("SMTP_FROM_EMAIL", "pruebas@foodplaza.com")):
+    os.environ.setdefault(_variable, _valor)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal, create_tables
+from app.migrations import aplicar_migraciones
+from app.models import LocaleDB, MenuDB, PedidoDB, PedidoItemDB, PlazaDB, ProductoDB, UsuarioDB
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app as aplicacion
+    create_tables()
+    aplicar_migraciones()
+    return aplicacion
+
+
+@pytest.fixture(scope="session")
+def cliente(app):
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(app):
+    sesion = SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+@pytest.fixture
+def local(db):
+    """Una plaza con un local, un menú y tres productos disponibles (ids en un dict)"""
+    plaza = PlazaDB(nombre="Plaza pruebas", direccion="N/A")
+    db.add(plaza)
+    db.flush()
+    db_local = LocaleDB(nombre="Local pruebas", descripcion="N/A", direccion="N/A",
+                        horario_apertura="08:00", horario_cierre="22:00", plaza_id=plaza.id)
+    db.add(db_local)
+    db.flush()
+    menu = MenuDB(id_local=db_local.id, nombre_menu="Menú pruebas")
+    db.add(menu)
+    db.flush()
+    productos = [ProductoDB(nombre=f"Producto {i}", precio=Decimal("10.50"), id_menu=menu.id) for i in range(3)]
+    db.add_all(productos)
+    usuario = UsuarioDB(nombre="Cliente pruebas", email=f"{uuid.uuid4().hex}@pruebas.com", password="x")
+    db.add(usuario)
+    db.commit()
+    return {
+        "plaza": plaza.id,
+        "local": db_local.id,
+        "menu": menu.id,
+        "productos": [producto.id for producto in productos],
+        "usuario": usuario.id,
+    }
+
+
+@pytest.fixture
+def crear_pedidos(db, local):
+    """Crea `cantidad` pedidos del local con un ítem por producto; devuelve sus ids"""
+    def crear(cantidad: int, estado: str = "pendiente", fecha=None) -> list:
+        pedidos = []
+        for _ in range(cantidad):
+            pedido = PedidoDB(id_usuario=local["usuario"], id_local=local["local"], estado_pedido=estado,
+                              total_pedido=Decimal("31.50"), tiempo_preparacion_estimado=15)
+            if fecha is not None:
+                pedido.fecha_pedido = fecha
+            pedido.items = [
+                PedidoItemDB(id_producto=producto, cantidad=1, precio_unitario=Decimal("10.50"))
+                for producto in local["productos"]
+            ]
+            pedidos.append(pedido)
+        db.add_all(pedidos)
+        db.commit()
+        return [pedido.id for pedido in pedidos]
+    return crear
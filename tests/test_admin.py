@@ -0,0 +1,34 @@
+"""Todas las rutas de /api/admin exigen el rol administrador"""
+from types import SimpleNamespace
+
+from fastapi.routing import APIRoute
+
+from app.services.token_service import crear_tokens
+
+
+def encabezados(rol: str) -> dict:
+    tokens = crear_tokens(SimpleNamespace(id=1, rol=rol))
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def rutas_admin(app) -> list:
+    return [
+        (metodo, ruta.path.replace("{", "").replace("}", ""))
+        for ruta in app.routes
+        if isinstance(ruta, APIRoute) and ruta.path.startswith("/api/admin")
+        for metodo in sorted(ruta.methods)
+    ]
+
+
+def test_rutas_admin_requieren_administrador(app, cliente):
+    rutas = rutas_admin(app)
+    # pool, caché, correo, eventos y SQL
+    assert len(rutas) >= 7
+    for metodo, ruta in rutas:
+        assert cliente.request(metodo, ruta).status_code == 401, ruta
+        for rol in ("usuario", "gerente"):
+            assert cliente.request(metodo, ruta, headers=encabezados(rol)).status_code == 403, (rol, ruta)
+
+
+def test_administrador_accede(cliente):
+    assert cliente.get("/api/admin/pool", headers=encabezados("administrador")).status_code == 200
@@ -0,0 +1,52 @@
+"""La caché del catálogo solo guarda formas de respuesta y no interfiere con las escrituras"""
+from app.crud.plazas import get_plaza
+from app.models import PlazaDB
+
+
+def test_lecturas_cacheadas_no_entran_en_la_sesion(db, local):
+    primera = get_plaza(db, local["plaza"])
+    segunda = get_plaza(db, local["plaza"])
+    assert isinstance(segunda, dict) and segunda == primera
+    # Nada de lo leído desde la caché queda asociado a la sesión
+    assert not any(isinstance(entidad, PlazaDB) for entidad in db.identity_map.values())
+
+
+def test_actualizar_despues_de_leer_desde_la_cache(cliente, local):
+    url = f"/api/productos/{local['productos'][0]}"
+    assert cliente.get(url).json()["precio"] == "10.50"
+    cliente.get(url)
+
+    respuesta = cliente.put(url, json={"precio": "12.00", "nombre": "Renombrado"})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["descripcion"] is None
+    leido = cliente.get(url).json()
+    assert (leido["precio"], leido["nombre"]) == ("12.00", "Renombrado")
+
+
+def test_actualizar_inexistente(cliente):
+    assert cliente.put("/api/productos/999999", json={"precio": "1.00"}).status_code == 404
+
+
+def test_borrar_despues_de_leer_desde_la_cache(cliente, local):
+    url = f"/api/plazas/{local['plaza']}"
+    cliente.get(url)
+    cliente.get(url)
+    assert cliente.delete(url).status_code == 204
+    assert cliente.get(url).status_code == 404
+
+
+def test_invalidacion_durante_la_carga_no_deja_datos_viejos(app):
+    from pydantic import BaseModel
+
+    from app.services.cache_service import cache_catalogo, cachear
+
+    class Valor(BaseModel):
+        valor: str
+
+    def cargar_e_invalidar():
+        # Una escritura confirma e invalida mientras se estaba leyendo
+        cache_catalogo.invalidar("pruebas")
+        return Valor(valor="viejo")
+
+    assert cachear("pruebas", Valor, [1], cargar_e_invalidar) == {"valor": "viejo"}
+    assert cachear("pruebas", Valor, [1], lambda: Valor(valor="nuevo")) == {"valor": "nuevo"}
@@ -0,0 +1,87 @@
+"""Límites de las subidas de imágenes: tamaño del cuerpo y píxeles decodificados"""
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import ingesta_imagenes
+from app.services.ingesta_imagenes import (
+    IMAGEN_MAX_BYTES,
+    MARGEN_MULTIPART,
+    ImagenRecibida,
+    optimizar_imagen,
+)
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional (no está en requirements.txt)
+    Image = None
+
+requiere_pillow = pytest.mark.skipif(Image is None, reason="requiere Pillow")
+
+DEMASIADO = b"\0" * (IMAGEN_MAX_BYTES + MARGEN_MULTIPART + 1)
+
+
+def test_content_length_excedido(cliente, local):
+    respuesta = cliente.post(
+        f"/api/plazas/{local['plaza']}/imagen",
+        content=DEMASIADO,
+        headers={"Content-Type": "multipart/form-data; boundary=x"}
+    )
+    assert respuesta.status_code == 413
+
+
+def test_cuerpo_sin_content_length_excedido(cliente, local):
+    def bloques():
+        for inicio in range(0, len(DEMASIADO), 1024 * 1024):
+            yield DEMASIADO[inicio:inicio + 1024 * 1024]
+
+    respuesta = cliente.post(
+        f"/api/plazas/{local['plaza']}/imagen",
+        content=bloques(),
+        headers={"Content-Type": "multipart/form-data; boundary=x"}
+    )
+    assert respuesta.status_code == 413
+
+
+def _png(lado: int) -> ImagenRecibida:
+    archivo = io.BytesIO()
+    Image.new("RGB", (lado, lado)).save(archivo, format="PNG")
+    tamano = archivo.tell()
+    archivo.seek(0)
+    return ImagenRecibida(archivo, "image/png", tamano)
+
+
+@requiere_pillow
+@pytest.mark.parametrize("lado", [40, 100])
+def test_demasiados_pixeles(monkeypatch, lado):
+    # 40x40 supera el límite; 100x100 supera el doble (DecompressionBombError)
+    monkeypatch.setattr(ingesta_imagenes, "IMAGEN_MAX_DIMENSION", 20)
+    monkeypatch.setattr(ingesta_imagenes, "IMAGEN_MAX_PIXELES", 1000)
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    with pytest.raises(HTTPException) as error:
+        optimizar_imagen(_png(lado))
+    assert error.value.status_code == 413
+
+
+@requiere_pillow
+def test_archivo_que_no_es_imagen(monkeypatch):
+    monkeypatch.setattr(ingesta_imagenes, "IMAGEN_MAX_DIMENSION", 20)
+    archivo = io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"\0" * 32)
+    with pytest.raises(HTTPException) as error:
+        optimizar_imagen(ImagenRecibida(archivo, "image/png", 40))
+    assert error.value.status_code == 400
+
+
+@requiere_pillow
+@pytest.mark.parametrize("webp", [False, True])
+def test_imagen_truncada(monkeypatch, webp):
+    # La cabecera es válida (Image.open funciona) pero faltan los píxeles
+    monkeypatch.setattr(ingesta_imagenes, "IMAGEN_MAX_DIMENSION", 20)
+    monkeypatch.setattr(ingesta_imagenes, "IMAGEN_CONVERTIR_WEBP", webp)
+    completa = _png(40)
+    datos = completa.archivo.getvalue()
+    truncada = io.BytesIO(datos[:len(datos) // 2])
+    with pytest.raises(HTTPException) as error:
+        optimizar_imagen(ImagenRecibida(truncada, "image/png", len(datos) // 2))
+    assert error.value.status_code == 400
@@ -0,0 +1,29 @@
+"""Los tiempos por sentencia no dejan estado en la conexión cuando una sentencia falla"""
+import copy
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import engine
+from app.services.instrumentacion_sql import ConsultasSolicitud, _solicitud_actual
+
+
+def test_sentencias_fallidas_no_dejan_inicios_pendientes(app):
+    with engine.connect() as conexion:
+        conexion.execute(text("SELECT 1"))
+        antes = copy.deepcopy(dict(conexion.info))
+        for _ in range(5):
+            with pytest.raises(OperationalError):
+                conexion.execute(text("SELECT * FROM tabla_inexistente"))
+            conexion.rollback()
+        assert dict(conexion.info) == antes
+
+        solicitud = ConsultasSolicitud()
+        token = _solicitud_actual.set(solicitud)
+        try:
+            conexion.execute(text("SELECT 1"))
+        finally:
+            _solicitud_actual.reset(token)
+    assert solicitud.consultas == 1
+    assert 0 <= solicitud.tiempo_ms < 1000
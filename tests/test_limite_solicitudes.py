@@ -0,0 +1,44 @@
+"""IP del cliente para los límites de solicitudes y clave obligatoria de los tokens"""
+import ipaddress
+import os
+import subprocess
+import sys
+
+import pytest
+from starlette.requests import Request
+
+from app.services import limite_solicitudes
+from app.services.limite_solicitudes import ip_cliente
+
+
+def solicitud(ip: str, reenviadas: str = None) -> Request:
+    encabezados = [(b"x-forwarded-for", reenviadas.encode())] if reenviadas else []
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": encabezados, "client": (ip, 1234)})
+
+
+@pytest.fixture
+def proxies(monkeypatch):
+    monkeypatch.setattr(limite_solicitudes, "_REDES_CONFIABLES", [ipaddress.ip_network("10.0.0.0/8")])
+
+
+def test_sin_proxies_configurados_se_ignora_x_forwarded_for():
+    assert ip_cliente(solicitud("10.0.0.5", "1.2.3.4")) == "10.0.0.5"
+
+
+def test_detras_de_proxies_confiables(proxies):
+    assert ip_cliente(solicitud("10.0.0.5", "1.2.3.4")) == "1.2.3.4"
+    # El cliente no puede elegir su IP anteponiendo valores falsos
+    assert ip_cliente(solicitud("10.0.0.5", "6.6.6.6, 1.2.3.4, 10.0.0.7")) == "1.2.3.4"
+    # Conexión directa (no desde el proxy): el encabezado no cuenta
+    assert ip_cliente(solicitud("5.5.5.5", "1.2.3.4")) == "5.5.5.5"
+    assert ip_cliente(solicitud("10.0.0.5")) == "10.0.0.5"
+
+
+def test_sin_clave_de_tokens_no_arranca():
+    entorno = dict(os.environ, JWT_SECRET_KEY="")
+    resultado = subprocess.run(
+        [sys.executable, "-c", "import app.services.token_service"],
+        env=entorno, capture_output=True, text=True
+    )
+    assert resultado.returncode != 0
+    assert "JWT_SECRET_KEY no está configurada" in resultado.stderr
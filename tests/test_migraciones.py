@@ -0,0 +1,54 @@
+"""Las migraciones crean los índices sobre tablas ya existentes"""
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.migrations import aplicar_migraciones, estado_migraciones
+from app.migrations.operaciones import eliminar_indice
+from app.migrations.versiones.m0001_indices_compuestos import INDICES
+
+INDICES_MIGRADOS = INDICES + (("reset_codes", "ix_reset_codes_expires_at", ["expires_at"]),)
+
+
+def indices(motor, tabla: str) -> dict:
+    return {indice["name"]: indice["column_names"] for indice in inspect(motor).get_indexes(tabla)}
+
+
+def base_sin_indices(tmp_path):
+    """Tablas como las dejaba create_tables antes de las migraciones"""
+    motor = create_engine(f"sqlite:///{tmp_path / 'migraciones.db'}")
+    Base.metadata.create_all(motor)
+    with motor.begin() as conexion:
+        for tabla, nombre, _ in INDICES_MIGRADOS:
+            eliminar_indice(conexion, tabla, nombre)
+    return motor
+
+
+def test_migraciones_crean_los_indices(app, tmp_path):
+    motor = base_sin_indices(tmp_path)
+    assert not any(nombre in indices(motor, tabla) for tabla, nombre, _ in INDICES_MIGRADOS)
+
+    assert aplicar_migraciones(motor) == [1, 2]
+    for tabla, nombre, columnas in INDICES_MIGRADOS:
+        assert indices(motor, tabla).get(nombre) == columnas, nombre
+    assert all(migracion["aplicada_en"] for migracion in estado_migraciones(motor))
+
+    # Ya aplicadas: no se repiten
+    assert aplicar_migraciones(motor) == []
+
+    # El listado de pedidos de un local por estado usa el índice compuesto
+    with motor.connect() as conexion:
+        plan = " ".join(fila[-1] for fila in conexion.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM pedidos "
+            "WHERE id_local = 1 AND estado_pedido = 'pendiente' ORDER BY fecha_pedido DESC"
+        )))
+    assert "ix_pedidos_local_estado_fecha" in plan
+    motor.dispose()
+
+
+def test_migraciones_hasta_una_version(app, tmp_path):
+    motor = base_sin_indices(tmp_path)
+    assert aplicar_migraciones(motor, hasta=1) == [1]
+    assert "ix_pedidos_fecha" in indices(motor, "pedidos")
+    assert "ix_reset_codes_expires_at" not in indices(motor, "reset_codes")
+    assert aplicar_migraciones(motor) == [2]
+    motor.dispose()
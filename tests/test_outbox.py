@@ -0,0 +1,80 @@
+"""La bandeja de salida no conserva el cuerpo de los correos ya procesados"""
+import smtplib
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import EmailOutboxDB
+from app.services.email.email_service import ConexionSMTP, email_service
+from app.services.email.outbox import encolar_correo, purgar_correos_procesados, registrar_resultado
+
+
+def test_cuerpo_descartado_al_procesar(app, db):
+    enviado = encolar_correo(db, "a@ejemplo.com", "Código", "Tu código: 123456", "<b>123456</b>")
+    fallido = encolar_correo(db, "b@ejemplo.com", "Código", "Tu código: 654321", "<b>654321</b>")
+    registrar_resultado(enviado)
+    registrar_resultado(fallido, smtplib.SMTPRecipientsRefused({}))
+    db.commit()
+
+    for correo in (enviado, fallido):
+        db.refresh(correo)
+        assert (correo.texto, correo.html) == ("", None)
+    assert (enviado.estado, fallido.estado) == ("enviado", "fallido")
+
+
+def test_purgar_correos_procesados(app, db):
+    viejo = datetime.utcnow() - timedelta(hours=48)
+    correos = [
+        EmailOutboxDB(destinatario="c@ejemplo.com", asunto="x", texto="", estado=estado, fecha_creacion=viejo)
+        for estado in ("enviado", "fallido", "pendiente")
+    ]
+    reciente = EmailOutboxDB(destinatario="c@ejemplo.com", asunto="x", texto="", estado="enviado")
+    db.add_all(correos + [reciente])
+    db.commit()
+    ids = [correo.id for correo in correos + [reciente]]
+
+    while purgar_correos_procesados(db, lote=1, retencion_horas=24):
+        pass
+    restantes = {fila.id for fila in db.query(EmailOutboxDB.id).filter(EmailOutboxDB.id.in_(ids))}
+    assert restantes == {correos[2].id, reciente.id}
+
+
+class ServidorFalso:
+    def __init__(self, error=None):
+        self.error = error
+        self.enviados = []
+
+    def noop(self):
+        if self.error:
+            raise self.error
+
+    def send_message(self, mensaje):
+        if self.error:
+            raise self.error
+        self.enviados.append(mensaje)
+
+    def quit(self):
+        raise smtplib.SMTPServerDisconnected()
+
+    def close(self):
+        pass
+
+
+def conexion_con(caido: ServidorFalso, nuevo: ServidorFalso, inactiva: bool) -> ConexionSMTP:
+    conexion = ConexionSMTP(email_service)
+    conexion._conectar = lambda: nuevo
+    conexion._servidor = caido
+    conexion._ultimo_uso = time.monotonic() - (conexion.max_inactividad + 1 if inactiva else 0)
+    return conexion
+
+
+@pytest.mark.parametrize("inactiva, error", [
+    (True, ConnectionResetError()),  # detectado por NOOP
+    (False, BrokenPipeError()),      # detectado al enviar
+])
+def test_reconecta_si_el_socket_se_cerro(inactiva, error):
+    nuevo = ServidorFalso()
+    conexion = conexion_con(ServidorFalso(error), nuevo, inactiva)
+    conexion.enviar("mensaje")
+    assert nuevo.enviados == ["mensaje"]
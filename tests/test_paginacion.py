@@ -0,0 +1,35 @@
+"""Paginación por cursor (keyset) sobre (fecha_pedido, id)"""
+from datetime import datetime
+
+from app.crud.paginacion import ENCABEZADO_CURSOR
+from app.models import PedidoDB
+
+
+def recorrer(cliente, url: str, limit: int) -> list:
+    """Sigue X-Next-Cursor hasta la última página y devuelve los ids en orden"""
+    ids, cursor = [], None
+    while True:
+        parametros = {"limit": limit}
+        if cursor:
+            parametros["after"] = cursor
+        respuesta = cliente.get(url, params=parametros)
+        assert respuesta.status_code == 200
+        ids += [pedido["id"] for pedido in respuesta.json()]
+        cursor = respuesta.headers.get(ENCABEZADO_CURSOR)
+        if not cursor:
+            return ids
+
+
+def test_pedidos_con_la_misma_fecha(cliente, local, crear_pedidos):
+    # fecha_pedido por defecto (CURRENT_TIMESTAMP): todos en el mismo segundo
+    ids = crear_pedidos(5)
+    assert recorrer(cliente, f"/api/pedidos/local/{local['local']}", limit=2) == ids
+
+
+def test_fechas_con_fracciones_de_segundo(cliente, db, local, crear_pedidos):
+    # Fechas asignadas desde Python, empatadas y con microsegundos
+    ids = crear_pedidos(3, fecha=datetime(2024, 5, 1, 12, 30, 15, 123456))
+    ids += crear_pedidos(3, fecha=datetime(2024, 5, 1, 12, 30, 16))
+    ids += crear_pedidos(1)
+    assert recorrer(cliente, f"/api/pedidos/local/{local['local']}", limit=2) == ids
+    assert db.query(PedidoDB.fecha_pedido).filter(PedidoDB.id == ids[0]).scalar() == datetime(2024, 5, 1, 12, 30, 15)
@@ -0,0 +1,32 @@
+"""Dos cambios de estado simultáneos sobre el mismo pedido: uno gana y el otro recibe 409"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.models import PedidoDB
+
+RONDAS = 10
+
+
+async def en_paralelo(app, pedido_id: int, cuerpos: list) -> list:
+    async with httpx.AsyncClient(app=app, base_url="http://pruebas") as cliente:
+        return await asyncio.gather(*(
+            cliente.patch(f"/api/pedidos/{pedido_id}", json=cuerpo) for cuerpo in cuerpos
+        ))
+
+
+@pytest.mark.parametrize("cuerpos", [
+    [{"estado_pedido": "en_preparacion"}, {"estado_pedido": "en_preparacion"}],
+    [{"estado_pedido": "en_preparacion", "estado_esperado": "pendiente"},
+     {"estado_pedido": "cancelado", "estado_esperado": "pendiente"}],
+])
+def test_un_solo_cambio_gana(app, db, crear_pedidos, cuerpos):
+    for pedido_id in crear_pedidos(RONDAS):
+        respuestas = asyncio.run(en_paralelo(app, pedido_id, cuerpos))
+        codigos = sorted(respuesta.status_code for respuesta in respuestas)
+        assert codigos == [200, 409], [respuesta.text for respuesta in respuestas]
+
+        ganadora = next(respuesta for respuesta in respuestas if respuesta.status_code == 200)
+        db.expire_all()
+        assert db.get(PedidoDB, pedido_id).estado_pedido == ganadora.json()["estado_pedido"]
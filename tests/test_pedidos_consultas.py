@@ -0,0 +1,34 @@
+"""Los listados de pedidos cargan los ítems en un número fijo de consultas (sin N+1)"""
+import re
+
+import pytest
+
+
+def consultas(respuesta) -> int:
+    """Consultas de la solicitud según el contador de instrumentacion_sql (encabezado Server-Timing)"""
+    coincidencia = re.search(r'desc="(\d+) consultas"', respuesta.headers["Server-Timing"])
+    return int(coincidencia.group(1))
+
+
+@pytest.mark.parametrize("ruta", ["/api/pedidos/?local_id={local}", "/api/pedidos/local/{local}"])
+def test_listado_no_crece_con_los_pedidos(cliente, local, crear_pedidos, ruta):
+    url = ruta.format(local=local["local"])
+    crear_pedidos(1)
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200
+    con_uno = consultas(respuesta)
+
+    crear_pedidos(20)
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200
+    assert len(respuesta.json()) == 21
+    assert all(len(pedido["items"]) == 3 for pedido in respuesta.json())
+    assert consultas(respuesta) == con_uno
+
+
+def test_listado_usa_pocas_consultas(cliente, local, crear_pedidos):
+    crear_pedidos(10)
+    respuesta = cliente.get(f"/api/pedidos/usuario/{local['usuario']}")
+    assert respuesta.status_code == 200
+    # Una para los pedidos y una (selectin) para los ítems de toda la página
+    assert consultas(respuesta) <= 2
@@ -0,0 +1,90 @@
+"""Idempotency-Key al crear pedidos: repetición, cuerpo distinto, claves abandonadas y alcance por usuario"""
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.models import IdempotenciaDB, PedidoDB
+from app.schemas.pedidos import PedidoCreate
+from app.services import idempotencia
+from app.services.token_service import crear_tokens
+
+
+def encabezados(usuario_id: int, clave: str = None) -> dict:
+    tokens = crear_tokens(SimpleNamespace(id=usuario_id, rol="usuario"))
+    resultado = {"Authorization": f"Bearer {tokens['access_token']}"}
+    if clave is not None:
+        resultado["Idempotency-Key"] = clave
+    return resultado
+
+
+def cuerpo(local: dict, cantidad: int = 1) -> dict:
+    return {
+        "id_local": local["local"],
+        "items": [{"id_producto": local["productos"][0], "cantidad": cantidad, "precio_unitario": "10.50"}],
+    }
+
+
+def pedidos_del_usuario(db, usuario_id: int) -> int:
+    db.expire_all()
+    return db.query(PedidoDB).filter(PedidoDB.id_usuario == usuario_id).count()
+
+
+def test_reintento_repite_la_respuesta(cliente, db, local):
+    clave = uuid.uuid4().hex
+    primera = cliente.post("/api/pedidos/", json=cuerpo(local), headers=encabezados(local["usuario"], clave))
+    segunda = cliente.post("/api/pedidos/", json=cuerpo(local), headers=encabezados(local["usuario"], clave))
+
+    assert (primera.status_code, segunda.status_code) == (201, 201)
+    assert segunda.json()["id"] == primera.json()["id"]
+    assert segunda.headers.get(idempotencia.ENCABEZADO_REPETIDA) == "true"
+    assert idempotencia.ENCABEZADO_REPETIDA not in primera.headers
+    assert pedidos_del_usuario(db, local["usuario"]) == 1
+
+
+def test_misma_clave_con_otro_cuerpo(cliente, db, local):
+    clave = uuid.uuid4().hex
+    assert cliente.post("/api/pedidos/", json=cuerpo(local), headers=encabezados(local["usuario"], clave)).status_code == 201
+    respuesta = cliente.post("/api/pedidos/", json=cuerpo(local, cantidad=2), headers=encabezados(local["usuario"], clave))
+    assert respuesta.status_code == 422
+    assert pedidos_del_usuario(db, local["usuario"]) == 1
+
+
+def test_clave_en_proceso_y_abandonada(cliente, db, local):
+    clave_cliente = uuid.uuid4().hex
+    clave = idempotencia.calcular_clave(clave_cliente, "crear_pedido", local["usuario"])
+    huella = idempotencia.calcular_huella(PedidoCreate(**cuerpo(local)).model_dump(mode="json"))
+    ahora = datetime.utcnow()
+    fila = IdempotenciaDB(clave=clave, huella=huella, fecha_creacion=ahora, expira_en=ahora + timedelta(hours=1))
+    db.add(fila)
+    db.commit()
+
+    # La solicitud original sigue en proceso
+    respuesta = cliente.post("/api/pedidos/", json=cuerpo(local), headers=encabezados(local["usuario"], clave_cliente))
+    assert respuesta.status_code == 409
+    assert respuesta.headers["Retry-After"] == "1"
+
+    # El proceso que la tomó murió: pasado el plazo otro reintento la ejecuta
+    fila.fecha_creacion = ahora - timedelta(seconds=idempotencia.IDEMPOTENCIA_PROCESO_SEGUNDOS + 1)
+    db.commit()
+    respuesta = cliente.post("/api/pedidos/", json=cuerpo(local), headers=encabezados(local["usuario"], clave_cliente))
+    assert respuesta.status_code == 201
+    assert pedidos_del_usuario(db, local["usuario"]) == 1
+
+
+def test_claves_por_usuario(cliente, db, local):
+    clave = uuid.uuid4().hex
+    otro = local["usuario"] + 100000
+    primera = cliente.post("/api/pedidos/", json=cuerpo(local), headers=encabezados(local["usuario"], clave))
+    # Otro usuario con la misma clave no recibe el pedido ajeno
+    segunda = cliente.post("/api/pedidos/", json=cuerpo(local), headers=encabezados(otro, clave))
+    assert (primera.status_code, segunda.status_code) == (201, 201)
+    assert segunda.json()["id"] != primera.json()["id"]
+    assert idempotencia.ENCABEZADO_REPETIDA not in segunda.headers
+
+
+def test_clave_sin_token(cliente, db, local):
+    antes = db.query(PedidoDB).count()
+    respuesta = cliente.post("/api/pedidos/", json=cuerpo(local), headers={"Idempotency-Key": uuid.uuid4().hex})
+    assert respuesta.status_code == 401
+    db.expire_all()
+    assert db.query(PedidoDB).count() == antes
@@ -0,0 +1,37 @@
+"""Purga por lotes compartida por los trabajos de app.jobs.purgar"""
+import uuid
+from datetime import datetime, timedelta
+
+from app.crud.purga import purgar_por_lotes
+from app.jobs.purgar import OBJETIVOS, cargar_purga, purgar
+from app.models import TrabajoImagenDB
+
+
+def crear_trabajos(db, cantidad: int, vencidos: bool) -> list:
+    expira = datetime.utcnow() + timedelta(seconds=-1 if vencidos else 3600)
+    trabajos = [TrabajoImagenDB(id=uuid.uuid4().hex, estado="completado", expira_en=expira) for _ in range(cantidad)]
+    db.add_all(trabajos)
+    db.commit()
+    return [trabajo.id for trabajo in trabajos]
+
+
+def test_purgar_por_lotes(app, db):
+    vencidos = crear_trabajos(db, 3, vencidos=True)
+    vigentes = crear_trabajos(db, 1, vencidos=False)
+    filtro = TrabajoImagenDB.id.in_(vencidos)
+
+    assert purgar_por_lotes(db, TrabajoImagenDB, filtro, lote=2) == 2
+    assert purgar_por_lotes(db, TrabajoImagenDB, filtro, lote=2) == 1
+    assert purgar_por_lotes(db, TrabajoImagenDB, filtro, lote=2) == 0
+    assert db.get(TrabajoImagenDB, vigentes[0]) is not None
+
+
+def test_trabajo_recorre_todos_los_lotes(app, db):
+    vencidos = crear_trabajos(db, 5, vencidos=True)
+    assert purgar("trabajos_imagen", lote=2) >= 5
+    assert db.query(TrabajoImagenDB).filter(TrabajoImagenDB.id.in_(vencidos)).count() == 0
+
+
+def test_objetivos_importables(app):
+    for objetivo in OBJETIVOS:
+        assert callable(cargar_purga(objetivo))
@@ -0,0 +1,57 @@
+"""El estado de las subidas en segundo plano se guarda en la base de datos"""
+import uuid
+from datetime import datetime, timedelta
+
+from app.models import TrabajoImagenDB
+from app.services.cache_service import cache_catalogo
+from app.services.imagenes_service import guardar_trabajo, purgar_trabajos_vencidos
+
+
+def test_estado_visible_desde_otra_sesion(cliente):
+    trabajo_id = uuid.uuid4().hex
+    guardar_trabajo(trabajo_id)
+    guardar_trabajo(trabajo_id, estado="completado", url="https://img/x.jpg", public_id="x")
+    # Vaciar la caché no afecta a los trabajos
+    cache_catalogo.limpiar()
+
+    respuesta = cliente.get(f"/api/imagenes/trabajos/{trabajo_id}")
+    assert respuesta.status_code == 200
+    assert respuesta.json() == {
+        "id": trabajo_id, "estado": "completado", "url": "https://img/x.jpg", "public_id": "x", "error": None
+    }
+
+
+def test_trabajos_vencidos(cliente, db):
+    trabajo_id = uuid.uuid4().hex
+    db.add(TrabajoImagenDB(id=trabajo_id, estado="error", expira_en=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+    assert cliente.get(f"/api/imagenes/trabajos/{trabajo_id}").status_code == 404
+    assert purgar_trabajos_vencidos(db) >= 1
+    assert db.get(TrabajoImagenDB, trabajo_id) is None
+    assert cliente.get(f"/api/imagenes/trabajos/{uuid.uuid4().hex}").status_code == 404
+
+
+def test_subida_sincrona_sin_trabajo_ni_conexiones_retenidas(cliente, db, local, monkeypatch):
+    from app.database import engine
+    from app.services import imagenes_service
+
+    conexiones = []
+
+    def subir_falso(archivo, folder, public_id=None):
+        # Mientras se espera a Cloudinary la solicitud no retiene conexiones
+        conexiones.append(engine.pool.checkedout())
+        return {"url": f"https://img/{public_id}.png", "public_id": public_id}
+
+    monkeypatch.setattr(imagenes_service, "upload_image", subir_falso)
+    trabajos = db.query(TrabajoImagenDB).count()
+    db.rollback()
+
+    respuesta = cliente.post(
+        f"/api/plazas/{local['plaza']}/imagen",
+        files={"file": ("x.png", b"\x89PNG\r\n\x1a\n" + b"\0" * 64, "image/png")}
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["public_id"] == f"plaza_{local['plaza']}"
+    assert conexiones == [0]
+    assert db.query(TrabajoImagenDB).count() == trabajos
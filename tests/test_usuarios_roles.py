@@ -0,0 +1,56 @@
+"""El rol no se elige al registrarse: solo lo cambia un administrador"""
+import uuid
+from types import SimpleNamespace
+
+from app.models import UsuarioDB
+from app.services.token_service import crear_tokens
+
+
+def encabezados(rol: str) -> dict:
+    tokens = crear_tokens(SimpleNamespace(id=1, rol=rol))
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def nuevo_usuario(cliente, **extra) -> dict:
+    datos = {"nombre": "Prueba", "email": f"{uuid.uuid4().hex[:12]}@ejemplo.com", "password": "Secreta123", **extra}
+    respuesta = cliente.post("/api/usuarios/", json=datos)
+    assert respuesta.status_code == 201
+    return respuesta.json()
+
+
+def test_registro_ignora_el_rol(cliente, db):
+    usuario = nuevo_usuario(cliente, rol="administrador")
+    assert usuario["rol"] == "usuario"
+    assert db.get(UsuarioDB, usuario["id"]).rol == "usuario"
+
+
+def test_actualizar_perfil_no_cambia_el_rol(cliente, db):
+    usuario = nuevo_usuario(cliente)
+    respuesta = cliente.put(f"/api/usuarios/{usuario['id']}", json={"nombre": "Otro", "rol": "administrador"})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["rol"] == "usuario"
+
+
+def test_cambio_de_rol_por_administrador(cliente, db):
+    usuario = nuevo_usuario(cliente)
+    url = f"/api/admin/usuarios/{usuario['id']}/rol"
+
+    assert cliente.put(url, json={"rol": "gerente"}, headers=encabezados("usuario")).status_code == 403
+    assert cliente.put(url, json={"rol": "superusuario"}, headers=encabezados("administrador")).status_code == 422
+    respuesta = cliente.put(url, json={"rol": "gerente"}, headers=encabezados("administrador"))
+    assert respuesta.status_code == 200
+    assert respuesta.json()["rol"] == "gerente"
+    assert db.get(UsuarioDB, usuario["id"]).rol == "gerente"
+    assert cliente.put("/api/admin/usuarios/999999/rol", json={"rol": "gerente"},
+                       headers=encabezados("administrador")).status_code == 404
+
+
+def test_usuario_inactivo_no_inicia_sesion(cliente):
+    usuario = nuevo_usuario(cliente)
+    credenciales = {"email": usuario["email"], "password": "Secreta123"}
+    assert cliente.post("/api/usuarios/login", json=credenciales).status_code == 200
+
+    assert cliente.delete(f"/api/usuarios/{usuario['id']}").status_code == 204
+    respuesta = cliente.post("/api/usuarios/login", json=credenciales)
+    assert respuesta.status_code == 403
+    assert "access_token" not in respuesta.json()